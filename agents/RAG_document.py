@@ -1,18 +1,149 @@
+import asyncio
 import json
+import os
+import threading
 from state import AgentGraphState
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 import logging
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# --- Configuration ---
+DIAGNOSE_EMBEDDING_MODEL = "models/embedding-001"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIAGNOSE_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "cache", "diagnose_embeddings.npz")
+FEEDBACK_CSV_PATH = os.path.join(PROJECT_ROOT, "data", "feedback.csv")
+EMBED_BATCH_SIZE = 100  # Texts per embed_documents call
+
+_embedding_model: Optional[GoogleGenerativeAIEmbeddings] = None
+
+
+def get_embedding_model() -> GoogleGenerativeAIEmbeddings:
+    global _embedding_model
+    if _embedding_model is None:
+        _embedding_model = GoogleGenerativeAIEmbeddings(model=DIAGNOSE_EMBEDDING_MODEL)
+    return _embedding_model
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DiagnoseEmbeddingStore:
+    """
+    Normalized embedding matrix of every `Diagnose` text seen so far, persisted to disk.
+    The `Diagnose` fields are static, so each one is embedded once (in batches) instead
+    of on every request; the first use also pre-embeds every Diagnose in feedback.csv.
+    """
+    def __init__(self, cache_path: str = DIAGNOSE_CACHE_PATH, model_name: str = DIAGNOSE_EMBEDDING_MODEL):
+        self.cache_path = cache_path
+        self.model_name = model_name
+        self._texts: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self) -> List[str]:
+        """Reads the on-disk cache; returns the feedback.csv Diagnose texts it does not cover yet."""
+        self._loaded = True
+        if os.path.exists(self.cache_path):
+            try:
+                with np.load(self.cache_path, allow_pickle=False) as cached:
+                    if str(cached["model"]) == self.model_name:
+                        self._texts = [str(t) for t in cached["texts"]]
+                        self._matrix = cached["matrix"].astype(np.float32)
+                        self._rows = {text: row for row, text in enumerate(self._texts)}
+                        logger.info(f"RAGDocumentNode: Loaded {len(self._texts)} cached Diagnose embeddings.")
+            except Exception as e:
+                logger.warning(f"RAGDocumentNode: Ignoring unreadable embedding cache {self.cache_path}: {e}")
+
+        # Pre-embed the whole feedback table so later requests never hit the embedding API for it.
+        if os.path.exists(FEEDBACK_CSV_PATH):
+            try:
+                import pandas as pd
+                diagnoses = pd.read_csv(FEEDBACK_CSV_PATH, usecols=["Diagnose"])["Diagnose"].dropna().astype(str)
+                return self._missing(diagnoses.unique().tolist())
+            except (ValueError, KeyError):
+                pass  # No Diagnose column in this table
+            except Exception as e:
+                logger.warning(f"RAGDocumentNode: Could not read Diagnose texts from {FEEDBACK_CSV_PATH}: {e}")
+        return []
+
+    def _missing(self, texts: List[str]) -> List[str]:
+        return [t for t in dict.fromkeys(texts) if t and t not in self._rows]
+
+    def _add_missing(self, missing: List[str]) -> None:
+        """Embeds `missing` without holding the lock (these are network calls), then merges the rows in under it."""
+        if not missing:
+            return
+        model = get_embedding_model()
+        vectors = []
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            vectors.extend(model.embed_documents(missing[start:start + EMBED_BATCH_SIZE]))
+        new_rows = _normalize(vectors)
+
+        with self._lock:
+            # Another request may have embedded some of the same texts in the meantime.
+            keep = [i for i, text in enumerate(missing) if text not in self._rows]
+            if not keep:
+                return
+            new_rows = new_rows[keep]
+            self._matrix = new_rows if self._matrix is None else np.vstack([self._matrix, new_rows])
+            for i in keep:
+                self._rows[missing[i]] = len(self._texts)
+                self._texts.append(missing[i])
+            logger.info(f"RAGDocumentNode: Embedded {len(keep)} new Diagnose texts ({len(self._texts)} cached).")
+            self._save()
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp.npz"
+            np.savez(tmp_path, model=self.model_name, texts=np.array(self._texts, dtype=str), matrix=self._matrix)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"RAGDocumentNode: Could not persist Diagnose embeddings: {e}")
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            pending = self._load()
+        try:
+            self._add_missing(pending)
+        except Exception as e:
+            logger.warning(f"RAGDocumentNode: Could not pre-embed Diagnose texts from {FEEDBACK_CSV_PATH}: {e}")
+
+    def warm_up(self) -> None:
+        """Loads the cache and pre-embeds feedback.csv; call at startup, off the event loop."""
+        self._ensure_loaded()
+
+    def matrix_for(self, texts: List[str]) -> np.ndarray:
+        """Returns the normalized embeddings of `texts` (one row each), embedding any new ones."""
+        self._ensure_loaded()
+        with self._lock:
+            missing = self._missing(texts)
+        self._add_missing(missing)
+        with self._lock:
+            return self._matrix[[self._rows[t] for t in texts]]
+
+
+diagnose_embedding_store = DiagnoseEmbeddingStore()
+
 
 def semantic_search_by_diagnose(
     data_entries: List[Dict[str, Any]], query: str, top_k: int = 10
 ) -> List[Dict[str, Any]]:
     """
     Perform semantic search on the data entries using Google Generative AI embeddings via LangChain.
+    Entry embeddings come from the precomputed Diagnose store, so a request costs one query
+    embedding plus a single matrix-vector product.
 
     Args:
         data_entries: List of data entries (dictionaries)
@@ -22,44 +153,35 @@ def semantic_search_by_diagnose(
     Returns:
         List of top_k data entries that best match the query semantically
     """
-    # Initialize the Google Generative AI embeddings model
     try:
-        embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
         # Generate embedding for the query
-        query_embedding = embedding_model.embed_query(query)
+        query_embedding = _normalize(get_embedding_model().embed_query(query))
     except Exception as e:
-        print(f"Error generating query embedding: {e}")
+        logger.error(f"Error generating query embedding: {e}")
         return []
 
-    # Generate embeddings for each entry's diagnose field
-    entry_embeddings = []
-    for idx, entry in enumerate(data_entries):
-        try:
-            if "Diagnose" in entry and entry["Diagnose"]:
-                diagnose_embedding = embedding_model.embed_query(entry["Diagnose"])
-                entry_embeddings.append((idx, diagnose_embedding))
-            else:
-                print(f"Entry {idx} missing 'Diagnose' field or it's empty")
-        except Exception as e:
-            print(f"Error generating embedding for entry {idx}: {e}")
-
-    # Calculate similarity scores
-    similarities = []
-    for idx, entry_embedding in entry_embeddings:
-        # Cosine similarity calculation
-        similarity = np.dot(query_embedding, entry_embedding) / (
-            np.linalg.norm(query_embedding) * np.linalg.norm(entry_embedding)
-        )
-        similarities.append((idx, similarity))
-
-    # Sort by similarity (highest first) and get top_k results
-    top_indices = [
-        idx for idx, _ in sorted(similarities, key=lambda x: x[1], reverse=True)[:top_k]
+    candidates = [
+        idx for idx, entry in enumerate(data_entries)
+        if isinstance(entry.get("Diagnose"), str) and entry["Diagnose"]
     ]
+    if not candidates:
+        logger.warning("RAGDocumentNode: No entries with a 'Diagnose' field to search.")
+        return []
+
+    try:
+        entry_matrix = diagnose_embedding_store.matrix_for([data_entries[idx]["Diagnose"] for idx in candidates])
+    except Exception as e:
+        logger.error(f"Error generating Diagnose embeddings: {e}")
+        return []
+
+    # Rows and query are unit-length, so the dot product is the cosine similarity.
+    similarities = entry_matrix @ query_embedding
+    k = min(top_k, len(candidates))
+    top = np.argpartition(-similarities, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+    top = top[np.argsort(-similarities[top], kind="stable")]
 
     # Return the top_k entries with all fields intact
-    results = [data_entries[idx] for idx in top_indices]
-    return results
+    return [data_entries[candidates[i]] for i in top]
 
 
 async def RAG_document_node(state: AgentGraphState) -> dict:
@@ -71,7 +193,9 @@ async def RAG_document_node(state: AgentGraphState) -> dict:
     query = state.get("explanation", "")
     logger.info(f"RAGDocumentNode: Query: {query}")
 
-    results = semantic_search_by_diagnose(document_data, query)
+    # Embedding calls block (and the first one may pre-embed all of feedback.csv), so the
+    # search runs on a worker thread.
+    results = await asyncio.to_thread(semantic_search_by_diagnose, document_data, query)
     logger.info(f"RAGDocumentNode: Found Results")
 
     return {"document_data": results}
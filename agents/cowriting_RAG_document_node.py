@@ -2,6 +2,7 @@
 
 import logging
 from state import AgentGraphState
+from graph.rag_queries import cowriting_query
 from graph.utils import query_knowledge_base
 
 logger = logging.getLogger(__name__)
@@ -13,13 +14,7 @@ async def cowriting_RAG_document_node(state: AgentGraphState) -> dict:
     """
     logger.info("---Executing Co-writing RAG Node---")
 
-    query_parts = [
-        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
-        f"Student's written text: {state.get('Student_Written_Input_Chunk', '')}",
-        f"Assessed issue with the text: {state.get('Immediate_Assessment_of_Input', '')}",
-        f"Student's stated thought process: {state.get('Student_Articulated_Thought', '')}",
-    ]
-    query_string = " \n ".join(filter(None, query_parts)).strip()
+    query_string = cowriting_query(state)
 
     if not query_string:
         logger.warning("Co-writing RAG Node: Query string is empty. Skipping vector search.")
@@ -2,6 +2,7 @@
 
 import logging
 from state import AgentGraphState
+from graph.rag_queries import feedback_query
 from graph.utils import query_knowledge_base
 
 logger = logging.getLogger(__name__)
@@ -14,13 +15,7 @@ async def feedback_RAG_document_node(state: AgentGraphState) -> dict:
     logger.info("---Executing Feedback RAG Node---")
 
     # Query for feedback should focus on the error and the student's emotional state
-    query_parts = [
-        f"Student Error Type: {state.get('diagnosed_error_type', '')}",
-        f"Student Affective State: {state.get('Student_Affective_State', '')}",
-        f"Student Proficiency: {state.get('Student_Comfort_Level', '')}",
-        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
-    ]
-    query_string = " \n ".join(filter(None, query_parts)).strip()
+    query_string = feedback_query(state)
 
     if not query_string:
         logger.warning("Feedback RAG Node: Query string is empty. Skipping vector search.")
@@ -2,6 +2,7 @@ import logging
 from typing import Dict, Any
 from state import AgentGraphState
 from memory import memory_stub # Import the shared instance # Assuming Mem0Memory is accessible
+from memory.student_summary import student_summary_manager
 import json
 
 logger = logging.getLogger(__name__)
@@ -54,6 +55,9 @@ async def finalize_session_in_mem0_node(state: AgentGraphState) -> Dict[str, Any
             metadata={'type': 'session_summary', mem0_memory_client.user_id_field: user_id}
         )
         logger.info(f"Successfully saved session summary to Mem0 for user {user_id}.")
+
+        # Fold whatever is still buffered into the rolling student summary.
+        student_summary_manager.flush(user_id)
         
         # Optionally, clear the final_session_data_to_save from state after saving
         return {"final_session_data_to_save": None} 
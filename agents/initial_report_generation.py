@@ -40,7 +40,7 @@ async def initial_report_generation_node(state: AgentGraphState) -> dict:
             "vocabulary_enrichment": ""
         }}
         """
-        internal_response = model.generate_content(prompt1)
+        internal_response = await model.generate_content_async(prompt1)
         internal_report_json = json.loads(internal_response.text)
 
         # Second prompt for the main report, using the internal analysis
@@ -70,7 +70,7 @@ async def initial_report_generation_node(state: AgentGraphState) -> dict:
             "vocabulary": ""
         }}
         """
-        final_response_genai = model.generate_content(prompt2)
+        final_response_genai = await model.generate_content_async(prompt2)
         final_report_json = json.loads(final_response_genai.text)
         
         logger.debug(f"Generated initial report: {final_report_json}") # Changed print to logger.debug
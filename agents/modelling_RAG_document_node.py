@@ -1,56 +1,20 @@
 import logging
-import os
-import chromadb
-from chromadb.utils import embedding_functions
 from state import AgentGraphState
+from graph.rag_queries import modelling_query
+from graph.utils import query_knowledge_base
 
 logger = logging.getLogger(__name__)
 
-# --- Configuration ---
-DB_DIRECTORY = "chroma_db"
-COLLECTION_NAME = "tutor_knowledge_base"
-EMBEDDING_MODEL = "all-MiniLM-L6-v2" # Must match the model used for ingestion
-TOP_K_RESULTS = 3 # Number of similar examples to retrieve
-
-# Columns from the state to construct the query for embedding
-QUERY_CONTEXT_COLUMNS = [
-    "example_prompt_text",
-    "student_goal_context",
-    "student_confidence_context",
-    "teacher_initial_impression",
-    "student_struggle_context"
-]
-
-# --- ChromaDB Client Initialization ---
-# Initialize the client once and reuse it.
-# This assumes the DB is in the root of the `backend_ai_service_langgraph` directory.
-client = None
-try:
-    client = chromadb.PersistentClient(path=DB_DIRECTORY)
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
-    collection = client.get_collection(
-        name=COLLECTION_NAME,
-        embedding_function=sentence_transformer_ef
-    )
-    logger.info(f"Successfully connected to ChromaDB collection '{COLLECTION_NAME}'.")
-except Exception as e:
-    logger.error(f"Failed to connect to ChromaDB. Ensure the database has been created by running the ingestion script. Error: {e}", exc_info=True)
-    client = None # Ensure client is None if connection fails
-
 async def modelling_RAG_document_node(state: AgentGraphState) -> dict:
     """
-    Queries the ChromaDB vector store to find relevant modeling examples based on student context.
+    Queries the unified knowledge base to find relevant modeling examples based on student context.
+    The Chroma client and embedding model are the shared ones from graph.registry, opened on
+    first use rather than at import time.
     """
     logger.info("---Executing RAG Node (Vector DB Version)---")
 
-    if not client or not collection:
-        error_msg = "ChromaDB client is not available. Cannot perform RAG."
-        logger.error(error_msg)
-        return {"rag_document_data": [], "error": error_msg}
-
     # 1. Construct the query string from the state
-    query_parts = [str(state.get(key, "")) for key in QUERY_CONTEXT_COLUMNS]
-    query_string = " \n\n ".join(filter(None, query_parts)).strip()
+    query_string = modelling_query(state)
 
     if not query_string:
         logger.warning("RAG Node: Query string is empty. Skipping vector search.")
@@ -58,29 +22,19 @@ async def modelling_RAG_document_node(state: AgentGraphState) -> dict:
 
     logger.info(f"RAG Node: Constructed query for vector search: '{query_string[:200]}...'")
 
-    try:
-        # 2. Query the ChromaDB collection
-        # The embedding function handles embedding the query_string automatically.
-        query_results = collection.query(
-            query_texts=[query_string],
-            n_results=TOP_K_RESULTS,
-            # include=['metadatas', 'documents', 'distances'] # For debugging
-        )
-
-        # 3. Extract and format the results
-        # The full original data is stored in the metadata.
-        retrieved_documents = query_results.get('metadatas', [[]])[0]
-        
-        if not retrieved_documents:
-            logger.info("RAG Node: No documents found in ChromaDB for the given query.")
-        else:
-            logger.info(f"RAG Node: Retrieved {len(retrieved_documents)} documents from ChromaDB.")
+    # 2. Query the shared knowledge base, restricted to modelling examples
+    # The full original data is stored in the metadata.
+    retrieved_documents = await query_knowledge_base(
+        query_string=query_string,
+        category="modelling"
+    )
 
-        return {"rag_document_data": retrieved_documents}
+    if not retrieved_documents:
+        logger.info("RAG Node: No modelling examples found in the knowledge base for the given query.")
+    else:
+        logger.info(f"RAG Node: Retrieved {len(retrieved_documents)} documents from the knowledge base.")
 
-    except Exception as e:
-        logger.error(f"RAG Node: An error occurred during ChromaDB query: {e}", exc_info=True)
-        return {"rag_document_data": [], "error": f"Failed to query vector database: {e}"}
+    return {"rag_document_data": retrieved_documents}
 
 # Example usage (for local testing if needed)
 async def main_test():
@@ -192,10 +146,5 @@ async def main_test():
 if __name__ == "__main__":
     import asyncio
     logging.basicConfig(level=logging.INFO)
-    # IMPORTANT: Set GOOGLE_API_KEY environment variable before running this test.
-    # e.g., export GOOGLE_API_KEY='your_api_key_here'
-    if not os.getenv("GOOGLE_API_KEY"):
-        print("Error: GOOGLE_API_KEY environment variable is not set. RAG tests will fail.")
-        print("Please set it before running: export GOOGLE_API_KEY='your_api_key'")
-    else:
-        asyncio.run(main_test())
+    # Retrieval embeds locally (graph.registry), so no API key is needed for these tests.
+    asyncio.run(main_test())
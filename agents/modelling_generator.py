@@ -5,6 +5,7 @@ import json
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from state import AgentGraphState
+from graph.projections import compact_json
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +19,8 @@ def format_rag_for_prompt(rag_data: list) -> str:
         example = rag_data[0]
         # We only need the 'modeling_and_think_aloud_sequence_json' as the example
         sequence_example_str = example.get('modeling_and_think_aloud_sequence_json', '{}')
-        # Pretty-print the JSON so the LLM can easily read the structure
-        sequence_example_json = json.dumps(json.loads(sequence_example_str), indent=2)
+        # Re-serialize compactly: the structure is what the LLM needs, not the indentation
+        sequence_example_json = compact_json(json.loads(sequence_example_str))
         return f"Follow this example structure for the sequence:\n{sequence_example_json}"
     except Exception as e:
         logger.warning(f"Could not format RAG example for prompt: {e}")
@@ -1,14 +1,18 @@
+import asyncio
 import logging
 import os
 import json
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
+from langchain_core.runnables import RunnableConfig
 from state import AgentGraphState
 from typing import Dict, Any
+from memory.student_context import get_student_context
+from memory.retrieval import get_relevant_interactions, format_interactions_for_prompt
 
 logger = logging.getLogger(__name__)
 
-async def motivational_support_node(state: AgentGraphState) -> Dict[str, Any]:
+async def motivational_support_node(state: AgentGraphState, config: RunnableConfig = None) -> Dict[str, Any]:
     logger.info(f"Motivational Support Node activated for user {state.get('user_id', 'unknown_user')}")
 
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -38,11 +42,19 @@ async def motivational_support_node(state: AgentGraphState) -> Dict[str, Any]:
         
         student_memory = state.get("student_memory_context")
         if student_memory is None:
-            student_memory = {}
+            # Loading the context blocks on Mem0, so it runs on a worker thread.
+            student_memory = await asyncio.to_thread(get_student_context(config, user_id).memory_context)
         affective_state = student_memory.get("affective_state", "neutral")
         student_name = student_memory.get("name", "Student")
         active_persona = state.get("active_persona", "Nurturer") # Default to Nurturer if not set
         triggering_event = state.get("triggering_event_for_motivation", "general check-in")
+        # Semantic search is a blocking Mem0 call (query embedding + vector lookup).
+        interaction_history = await asyncio.to_thread(
+            get_relevant_interactions,
+            user_id,
+            query=f"{triggering_event}. {affective_state}. {transcript or ''}",
+            history=student_memory.get("interaction_history"),
+        )
 
         # This is a condensed version of your example prompt logic
         prompt_parts = [
@@ -52,7 +64,8 @@ async def motivational_support_node(state: AgentGraphState) -> Dict[str, Any]:
             f"The student's last message (if relevant) was: '{transcript}'.",
             f"They are currently at task stage: '{task_stage}'.",
             f"Here is the student's profile data for context: {json.dumps(student_memory.get('profile', {}), indent=2)}",
-            f"And here is the student's recent interaction history for context (e.g., to see recent struggles or successes): {json.dumps(student_memory.get('interaction_history', [])[-5:], indent=2)} (showing last 5 interactions)",
+            f"Here is a rolling summary of the student's strengths, recurring errors and mood trend: {json.dumps(student_memory.get('summary', {}), separators=(',', ':'))}",
+            f"And here is the student's recent and relevant interaction history for context (e.g., to see recent struggles or successes): {format_interactions_for_prompt(interaction_history)}",
             "Your goal is to provide a brief, supportive, and motivational message that:",
             "1. Acknowledges and validates their current feeling (if negative), using their name if available from the profile.",
             "2. Normalizes the struggle if appropriate, possibly referencing general patterns or specific recent interactions from their history if relevant and helpful.",
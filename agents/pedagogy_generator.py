@@ -7,22 +7,12 @@ import httpx
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from state import AgentGraphState
+from graph.projections import compact_json
+# These are the keys for the student's context, which are still needed for the prompt.
+from graph.rag_queries import PEDAGOGY_PROFILE_COLUMNS as query_columns
 
 logger = logging.getLogger(__name__)
 
-# These are the keys for the student's context, which are still needed for the prompt.
-query_columns = [
-    "Goal",
-    "Feeling",
-    "Confidence",
-    "Estimated Overall English Comfort Level",
-    "Initial Impression",
-    "Speaking Strengths",
-    "Fluency",
-    "Grammar",
-    "Vocabulary",
-]
-
 async def pedagogy_generator_node(state: AgentGraphState) -> dict:
     """
     Generates a personalized pedagogy plan, returning a structured object with both the
@@ -77,8 +67,11 @@ async def pedagogy_generator_node(state: AgentGraphState) -> dict:
         **Initial Assessment Report:**
         {initial_report}
 
+        **Pedagogy plans experts chose for similar students (retrieved by pedagogy_rag_node):**
+        {compact_json(rag_data)}
+
         **Your Task:**
-        Design the *very next* learning step for this student. Return a SINGLE JSON object with two main keys: `pedagogy_plan` and `layered_content`.
+        Design the *very next* learning step for this student, using the expert plans above as reference. Return a SINGLE JSON object with two main keys: `pedagogy_plan` and `layered_content`.
 
         1.  `pedagogy_plan`: A list containing a SINGLE JSON object for the next task. The object must have `type`, `task`, `topic`, and `level`.
         2.  `layered_content`: A JSON object containing the content to present this plan to the student. It must have these four keys:
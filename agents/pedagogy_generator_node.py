@@ -8,91 +8,20 @@ import logging
 import os
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
-import pandas as pd
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document
-
-query_columns = [
-    "Goal",
-    "Feeling",
-    "Confidence",
-    "Estimated Overall English Comfort Level",
-    "Initial Impression",
-    "Speaking Strengths",
-    "Fluency",
-    "Grammar",
-    "Vocabulary",
-]
-
-vectorstore = None
-embedding_model = None # Will be initialized by get_pedagogy_vectorstore
-
-def get_pedagogy_vectorstore():
-    global vectorstore, embedding_model
-    if vectorstore is None:
-        # Build an absolute path to the persist directory to ensure it's always found
-        script_dir = os.path.dirname(__file__)
-        base_dir = os.path.dirname(script_dir)  # This should be the project root
-        persist_directory = os.path.join(base_dir, "data", "pedagogy_chroma")
-
-        pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Initializing GoogleGenerativeAIEmbeddings...")
-        embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Initialized GoogleGenerativeAIEmbeddings.")
-
-        if os.path.exists(persist_directory):
-            pedagogy_logger.info(f"PEDAGOGY_GENERATOR.PY: Loading existing vectorstore from {persist_directory}...")
-            vectorstore = Chroma(persist_directory=persist_directory, embedding_function=embedding_model)
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Finished loading vectorstore.")
-        else:
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: No existing vectorstore found. Building from scratch...")
-            script_dir = os.path.dirname(__file__)
-            file_path = os.path.join(script_dir, '..', 'data', 'pedagogy_data.csv')
-            
-            pedagogy_logger.info(f"PEDAGOGY_GENERATOR.PY: Reading CSV from {file_path}...")
-            df = pd.read_csv(file_path)
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Finished reading CSV.")
-
-            df.rename(columns={
-                "Answer One": "Goal",
-                "Answer Two": "Feeling",
-                "Answer Three": "Confidence"
-            }, inplace=True)
-
-            df["combined_text_for_embedding"] = df[query_columns].astype(str).agg(" ".join, axis=1)
-            langchain_documents = []
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Preparing documents for Chroma...")
-            for index, row in df.iterrows():
-                page_content = row["combined_text_for_embedding"]
-                metadata = row.drop("combined_text_for_embedding").to_dict()
-                langchain_documents.append(Document(page_content=page_content, metadata=metadata))
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Finished preparing documents.")
-
-            pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Calling Chroma.from_documents() to build and persist vectorstore...")
-            try:
-                vectorstore = Chroma.from_documents(
-                    documents=langchain_documents,
-                    embedding=embedding_model,
-                    persist_directory=persist_directory,
-                )
-                pedagogy_logger.info("PEDAGOGY_GENERATOR.PY: Finished building and persisting vectorstore.")
-            except Exception as e:
-                pedagogy_logger.error(f"PEDAGOGY_GENERATOR.PY: An error occurred during Chroma.from_documents: {e}", exc_info=True)
-                raise
-    return vectorstore
-
-def query_similar_documents(query_values):
-    print(query_values)
-    current_vectorstore = get_pedagogy_vectorstore()
-    query_text = " ".join([str(query_values[col]) for col in query_columns])
-    similar_documents = current_vectorstore.similarity_search(query_text, k=10)
-    print(f"Top 10 similar rows to your query:\n---")
-    metadata_list = []
-    for i, doc in enumerate(similar_documents):
-        print(f"Result {i+1}:")
-        metadata_list.append(doc.metadata)
-        print("---")
-    return metadata_list
+from graph.projections import compact_json
+from graph.rag_queries import pedagogy_profile_query
+from graph.utils import query_knowledge_base
+
+PEDAGOGY_CATEGORY = "pedagogy_profile"  # Built offline by scripts/ingest_pedagogy_profiles.py
+SIMILAR_PROFILES_K = 10
+
+async def query_similar_documents(query_values):
+    """
+    Finds the stored pedagogy profiles most similar to the student's. The profiles live in
+    the shared knowledge base (locally embedded, indexed in memory at startup), so this
+    makes no network embedding calls and never builds a store on the request path.
+    """
+    return await query_knowledge_base(pedagogy_profile_query(query_values), category=PEDAGOGY_CATEGORY, top_k=SIMILAR_PROFILES_K)
 
 
 logger = logging.getLogger(__name__)
@@ -132,14 +61,14 @@ async def pedagogy_generator_node(state: AgentGraphState) -> dict:
         "Grammar": grammar,
         "Vocabulary": vocabulary,
     }
-    metadata_list = query_similar_documents(query_values)
+    metadata_list = await query_similar_documents(query_values)
     prompt = f"""
     You are an expert pedagogue in English. A student who we judged as:
     {query_values}
     wants to study for TOFEL. You need to design a pedagogy for this student.
 
     A few examples of the pedagogy for similar cases are:
-    {metadata_list}
+    {compact_json(metadata_list)}
     
     Return a JSON object:
     {{
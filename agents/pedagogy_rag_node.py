@@ -1,6 +1,7 @@
 # langgraph-service/agents/pedagogy_rag_node.py
 import logging
 from state import AgentGraphState
+from graph.rag_queries import pedagogy_query
 from graph.utils import query_knowledge_base
 
 logger = logging.getLogger(__name__)
@@ -13,12 +14,7 @@ async def pedagogy_rag_node(state: AgentGraphState) -> dict:
     logger.info("---PEDAGOGY RAG NODE---")
 
     # Construct a query based on the student's state
-    query_parts = [
-        f"Current learning objective: {state.get('Learning_Objective_Focus', 'Not specified')}",
-        f"Recent student transcript: {state.get('transcript', '')}",
-        f"Current student model summary: {state.get('student_model', {}).get('summary', 'No summary available.')}"
-    ]
-    query_string = " \n ".join(filter(None, query_parts)).strip()
+    query_string = pedagogy_query(state)
 
     if not query_string or query_string.isspace():
         logger.warning("Pedagogy RAG Node: Query string is empty. Skipping vector search.")
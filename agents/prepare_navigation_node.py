@@ -1,14 +1,18 @@
+import asyncio
 import logging
 import os
 import json
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
+from langchain_core.runnables import RunnableConfig
 from state import AgentGraphState
 from typing import Dict, Any, List
+from memory.student_context import get_student_context
+from memory.retrieval import get_relevant_interactions
 
 logger = logging.getLogger(__name__)
 
-async def prepare_navigation_node(state: AgentGraphState) -> Dict[str, Any]:
+async def prepare_navigation_node(state: AgentGraphState, config: RunnableConfig = None) -> Dict[str, Any]:
     user_id = state.get("user_id", "unknown_user")
     logger.info(f"Prepare Navigation Node activated for user {user_id}")
 
@@ -42,18 +46,29 @@ async def prepare_navigation_node(state: AgentGraphState) -> Dict[str, Any]:
             
             # Add null checking to prevent NoneType errors
             if student_memory is None:
-                student_memory = {}
-                logger.warning("Student memory context is None, using empty dictionary for navigation")
+                # Loading the context blocks on Mem0, so it runs on a worker thread.
+                student_memory = await asyncio.to_thread(get_student_context(config, user_id).memory_context)
+                logger.warning("Student memory context is None, using the run's memoized student context for navigation")
                 
             profile = student_memory.get("profile", {})
             student_name = profile.get("name", "there") # Default to 'there' if name not found
-            interaction_history = student_memory.get("interaction_history", [])
             active_persona = state.get("active_persona", "Nurturer")
             
             # Extract task details
             task_title = next_task_details.get("title", "the selected task")
             task_type = next_task_details.get("type", "activity")
 
+            # Only the latest interaction matters for the transition phrase, so there is no
+            # need to look past it or run a semantic search.
+            interaction_history = await asyncio.to_thread(
+                get_relevant_interactions,
+                user_id,
+                query=f"{task_title} {task_type}",
+                top_k=0,
+                recent_n=1,
+                history=student_memory.get("interaction_history"),
+            )
+
             # Get student level and preferences if available
             student_level = profile.get("level", "")
             student_preferences = profile.get("preferences", {})
@@ -1,14 +1,19 @@
+import asyncio
 import logging
 import os
 import json
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
+from langchain_core.runnables import RunnableConfig
 from state import AgentGraphState
 from typing import Dict, Any
+from memory.student_context import get_student_context
+from memory.retrieval import get_relevant_interactions, format_interactions_for_prompt
+from memory.tiering import query_archive
 
 logger = logging.getLogger(__name__)
 
-async def progress_reporter_node(state: AgentGraphState) -> Dict[str, Any]:
+async def progress_reporter_node(state: AgentGraphState, config: RunnableConfig = None) -> Dict[str, Any]:
     logger.info(f"Progress Reporter Node activated for user {state.get('user_id', 'unknown_user')}")
 
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -30,7 +35,11 @@ async def progress_reporter_node(state: AgentGraphState) -> Dict[str, Any]:
 
         user_id = state.get("user_id", "student")
         transcript = state.get("transcript", "") # Student's query
-        student_memory = state.get("student_memory_context", {})
+        # Fall back to the run's memoized context rather than re-reading Mem0; loading it
+        # blocks on Mem0, so it runs on a worker thread.
+        student_memory = state.get("student_memory_context")
+        if not student_memory:
+            student_memory = await asyncio.to_thread(get_student_context(config, user_id).memory_context)
         active_persona = state.get("active_persona", "Nurturer")
         # p1_extracted_entities = state.get("p1_extracted_entities", {})
         # current_context = state.get("current_context")
@@ -49,11 +58,31 @@ async def progress_reporter_node(state: AgentGraphState) -> Dict[str, Any]:
         #     "fluency_trend_data": [{"date": "2024-05-01", "score": 60}, {"date": "2024-05-15", "score": 65}, {"date": "2024-05-30", "score": 68}]
         # }
 
+        # Only the interactions relevant to the student's question (plus the latest few) are
+        # sent, so the prompt stays bounded no matter how long the student has been with us.
+        interaction_history = await asyncio.to_thread(
+            get_relevant_interactions,
+            user_id,
+            query=f"progress, scores, feedback and recurring errors. {transcript or ''}",
+            history=student_memory.get("interaction_history"),
+        )
+
+        # Progress reports are the one place that looks past the hot window: give the model
+        # a compact view of the archived (older) interactions for long-range trends.
+        archived_history = await asyncio.to_thread(query_archive, user_id)
+        long_range_overview = {
+            "archived_interactions": len(archived_history),
+            "first_interaction_at": archived_history[0].get("timestamp") if archived_history else None,
+            "earliest_examples": archived_history[:2],
+        }
+
         prompt_parts = [
             f"You are Rox, an AI TOEFL Tutor, currently embodying the '{active_persona}' persona.",
             f"The student (user_id: {user_id}) asked: '{transcript}'.",
-            f"Here is the student's profile data: {json.dumps(student_memory.get('profile', {}), indent=2)}",
-            f"And here is the student's interaction history: {json.dumps(student_memory.get('interaction_history', []), indent=2)}",
+            f"Here is the student's profile data: {json.dumps(student_memory.get('profile', {}), separators=(',', ':'))}",
+            f"Here is a rolling summary of the student's learning so far: {json.dumps(student_memory.get('summary', {}), separators=(',', ':'))}",
+            f"And here is the student's relevant interaction history: {format_interactions_for_prompt(interaction_history)}",
+            f"For long-range comparison, here is an overview of their older, archived history: {json.dumps(long_range_overview, separators=(',', ':'), default=str)}",
             "Your task is to synthesize this data into a clear, encouraging, and actionable progress report.",
             "Instructions:",
             "1. Acknowledge the student's query or concern (from their transcript).",
@@ -1,11 +1,89 @@
 import json
+import os
+import threading
+import time
+from itertools import product
 from state import AgentGraphState
 import logging
 import pandas as pd
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# --- Configuration ---
+FEEDBACK_CSV_PATH = Path(__file__).parent.parent / "data" / "feedback.csv"
+FILTER_COLUMNS = ("Task", "Proficiency", "Error")  # Applied in this order, each only if it keeps rows
+FALLBACK_ROWS = 5
+MTIME_CHECK_INTERVAL_S = 2.0  # How often the CSV's mtime is checked for changes
+
+_ANY = None  # Wildcard in index keys: the column is not filtered on
+
+
+class FeedbackTable:
+    """
+    feedback.csv loaded once into records plus an index of every (Task, Proficiency, Error)
+    combination with wildcards, so the sequential "filter, but keep the previous rows if
+    the filter empties them" lookup is a few dict probes instead of DataFrame masks.
+    The file is reloaded when its mtime changes.
+    """
+    def __init__(self, path: Path = FEEDBACK_CSV_PATH):
+        self.path = path
+        self._records: List[Dict[str, Any]] = []
+        self._index: Dict[Tuple, List[int]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < MTIME_CHECK_INTERVAL_S:
+            return
+        with self._lock:
+            self._checked_at = now
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            df = pd.read_csv(self.path)
+            records = df.to_dict(orient="records")
+            columns = [df[column].tolist() if column in df.columns else [None] * len(df) for column in FILTER_COLUMNS]
+            values = list(zip(*columns))
+
+            index: Dict[Tuple, List[int]] = {}
+            for row, row_values in enumerate(values):
+                # Register the row under every combination of "filtered on this column" / wildcard.
+                for mask in product((True, False), repeat=len(FILTER_COLUMNS)):
+                    if any(use and pd.isna(value) for use, value in zip(mask, row_values)):
+                        continue
+                    key = tuple(value if use else _ANY for use, value in zip(mask, row_values))
+                    index.setdefault(key, []).append(row)
+
+            self._records, self._index, self._mtime = records, index, mtime
+            logger.info(f"QueryDocumentNode: Loaded {len(records)} feedback rows ({len(index)} index keys) from {self.path}")
+
+    def lookup(self, task: str, proficiency: str, error: str) -> List[Dict[str, Any]]:
+        """Same result as filtering on Task, then Proficiency, then Error, skipping any filter that would empty the rows."""
+        self._maybe_reload()
+        # At most one probe per filter column; nothing keyed on request values is kept.
+        key = [_ANY] * len(FILTER_COLUMNS)
+        for position, value in enumerate((task, proficiency, error)):
+            if not value:
+                continue
+            candidate = key.copy()
+            candidate[position] = value
+            if tuple(candidate) in self._index:
+                key = candidate
+        rows = self._index.get(tuple(key), [])
+
+        if not rows:
+            logger.warning("No data matched filters, using fallback data selection")
+            rows = list(range(min(FALLBACK_ROWS, len(self._records))))
+        # Copies, so callers can't mutate the cached table.
+        return [dict(self._records[row]) for row in rows]
+
+
+feedback_table = FeedbackTable()
+
 
 def query_document_node(state: AgentGraphState) -> dict:
     logger.info(
@@ -29,38 +107,9 @@ def query_document_node(state: AgentGraphState) -> dict:
     logger.info(f"QueryDocumentNode: User Level: {user_level}")
     logger.info(f"QueryDocumentNode: Primary Error: {primary_error}")
 
-    data_path = Path(__file__).parent.parent / "data" / "feedback.csv"
-    df = pd.read_csv(data_path)
-    
-    # Apply filters sequentially and keep track of dataframe size
-    # Only apply filter if the filter value is not empty
-    if question_stage:
-        df_filtered = df[df["Task"] == question_stage]
-        # If filter results in empty dataframe, revert to the original
-        if not df_filtered.empty:
-            df = df_filtered
-    
-    if user_level:
-        df_filtered = df[df["Proficiency"] == user_level]
-        if not df_filtered.empty:
-            df = df_filtered
-    
-    if primary_error:
-        df_filtered = df[df["Error"] == primary_error]
-        if not df_filtered.empty:
-            df = df_filtered
-    
-    # If we still have no data, take a fallback approach - get some data regardless of filters
-    if df.empty:
-        logger.warning("No data matched filters, using fallback data selection")
-        df = pd.read_csv(data_path)
-        # Limit to at most 5 rows as a fallback
-        df = df.head(5)
-    
-    print(f"Data shape after filtering: {df.shape}")
-
-    # Always return at least the available data
-    document_data = df.to_dict(orient="records")
+    # Filters are applied in order (Task, Proficiency, Error), each only if it keeps some rows;
+    # the table is indexed in memory, so this is a few dict lookups with no disk I/O.
+    document_data = feedback_table.lookup(question_stage, user_level, primary_error)
     logger.info(f"QueryDocumentNode: Returning {len(document_data)} documents")
 
     return {"document_data": document_data}
@@ -2,6 +2,7 @@
 
 import logging
 from state import AgentGraphState
+from graph.rag_queries import scaffolding_query
 from graph.utils import query_knowledge_base
 
 logger = logging.getLogger(__name__)
@@ -14,13 +15,7 @@ async def scaffolding_RAG_document_node(state: AgentGraphState) -> dict:
     logger.info("---Executing Scaffolding RAG Node---")
 
     # The query for scaffolding should be highly focused on the specific problem
-    query_parts = [
-        f"Learning Task: {state.get('Learning_Objective_Task', '')}",
-        f"Specific Struggle Point: {state.get('Specific_Struggle_Point', '')}",
-        f"Student English Level: {state.get('English_Comfort_Level', '')}",
-        f"Student Attitude: {state.get('Student_Attitude_Context', '')}",
-    ]
-    query_string = " \n ".join(filter(None, query_parts)).strip()
+    query_string = scaffolding_query(state)
 
     if not query_string:
         logger.warning("Scaffolding RAG Node: Query string is empty. Skipping vector search.")
@@ -5,6 +5,7 @@ import json
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from state import AgentGraphState
+from graph.projections import compact_json
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,7 @@ def format_rag_for_prompt(rag_data: list) -> str:
         return "No specific expert examples were retrieved. Rely on general pedagogical principles for scaffolding."
     # Use the top 1-2 examples to guide the LLM
     try:
-        examples_str = "\n---\n".join([json.dumps(item, indent=2) for item in rag_data[:2]])
+        examples_str = "\n---\n".join([compact_json(item) for item in rag_data[:2]])
         return f"Follow the patterns in these expert examples:\n{examples_str}"
     except Exception as e:
         logger.warning(f"Could not format RAG example for prompt: {e}")
@@ -91,7 +91,7 @@ async def session_wrap_up_node(state: AgentGraphState) -> Dict[str, Any]:
         "user_id": user_id,
         "session_end_time_utc": datetime.datetime.utcnow().isoformat(),
         "reason_for_ending": reason_for_ending,
-        "session_activity_summary": student_memory.get("interaction_history_summary", "No summary available"), # Placeholder
+        "session_activity_summary": student_memory.get("summary") or "No summary available",
         "chat_history_on_end": state.get("chat_history", [])
         # Add any other relevant session data, e.g., incomplete tasks, final state of student_memory_context
     }
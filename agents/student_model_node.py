@@ -1,24 +1,36 @@
+import asyncio
 import logging
 import json
 from datetime import datetime
 from typing import Any, Dict
 
+from langchain_core.runnables import RunnableConfig
+
 from state import AgentGraphState
 from memory.mem0_client import shared_mem0_client
+from memory.retrieval import INTERACTION_TYPES
+from memory.student_context import get_student_context
+from memory.student_summary import student_summary_manager
+from memory.tiering import select_hot, schedule_tiering
 
 logger = logging.getLogger(__name__)
 
-async def load_student_data_node(state: AgentGraphState) -> dict:
+async def load_student_data_node(state: AgentGraphState, config: RunnableConfig = None) -> dict:
     """
     Loads student data from Mem0, extracts 'next_task_details' from the most recent
-    interaction, and updates the state.
+    interaction, and updates the state. The Mem0 reads are blocking, so they run on a
+    worker thread and the event loop keeps serving the graph's other branches.
     """
+    return await asyncio.to_thread(_load_student_data, state, config)
+
+def _load_student_data(state: AgentGraphState, config: RunnableConfig = None) -> dict:
     user_id = state["user_id"]
     logger.info(f"StudentModelNode: Loading student data for user_id: '{user_id}' from Mem0")
+    student_context = get_student_context(config, user_id)
 
-    # Get all memories from Mem0 for the user
+    # Get all memories from Mem0 for the user (memoized for the rest of the run)
     try:
-        all_memories = shared_mem0_client.get_all(user_id=user_id)
+        all_memories = {"results": student_context.memories}
         student_data: Dict[str, Any] = {"profile": {}, "interaction_history": []}
         
         # Handle different possible formats returned by Mem0
@@ -118,6 +130,7 @@ async def load_student_data_node(state: AgentGraphState) -> dict:
             
         # Process all memories regardless of metadata type
         for mem in memories_list:
+            history_length = len(student_data["interaction_history"])
             # Handle different memory formats
             try:
                 # Extract metadata - could be an attribute or a dictionary key
@@ -182,6 +195,12 @@ async def load_student_data_node(state: AgentGraphState) -> dict:
                                 student_data["profile"].update(profile_dict)
                         except (json.JSONDecodeError, TypeError):
                             logger.warning(f"Could not parse profile memory for user {user_id}: {mem_data}")
+
+                elif memory_type not in INTERACTION_TYPES:
+                    # Summaries, checkpoints and other records are not interactions; the
+                    # rolling summary is attached separately below.
+                    logger.debug(f"Skipping non-interaction memory of type '{memory_type}' for user {user_id}")
+                    continue
                 
                 elif memory_type == 'structured_interaction':
                     # Special handling for structured_interaction memories
@@ -293,14 +312,25 @@ async def load_student_data_node(state: AgentGraphState) -> dict:
                 logger.warning(f"Error processing individual memory: {inner_e}. Skipping this memory.")
                 continue
 
-        # Sort history just in case, though mem0 usually returns latest first
-        student_data["interaction_history"].sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+            # Date undated entries by their memory, as memory_to_interaction does, so the
+            # hot-window age cutoff below sees when they were stored.
+            created_at = mem.get('created_at') or mem.get('updated_at') if isinstance(mem, dict) else None
+            history = student_data["interaction_history"]
+            for j in range(history_length, len(history)):
+                if created_at and isinstance(history[j], dict) and not history[j].get('timestamp'):
+                    history[j] = {**history[j], 'timestamp': created_at}
+
+        # Keep only the hot window (newest first); older interactions live in the cold archive
+        student_data["interaction_history"] = select_hot(student_data["interaction_history"])
 
     except Exception as e:
         logger.error(f"Failed to retrieve or process data from Mem0 for user {user_id}: {e}", exc_info=True)
         student_data = {"profile": {}, "interaction_history": []}
     logger.info(f"StudentModelNode: Retrieved student data from Mem0: {student_data}")
 
+    # Attach the rolling summary so downstream prompts can use it instead of raw history
+    student_data["summary"] = student_context.summary
+
     # Initialize updates with the full student memory context
     updates = {"student_memory_context": student_data}
 
@@ -319,7 +349,7 @@ async def load_student_data_node(state: AgentGraphState) -> dict:
 
     return updates
 
-async def save_interaction_node(state: AgentGraphState) -> dict:
+async def save_interaction_node(state: AgentGraphState, config: RunnableConfig = None) -> dict:
     """Saves the current interaction to Mem0."""
     user_id = state["user_id"]
     
@@ -442,6 +472,13 @@ async def save_interaction_node(state: AgentGraphState) -> dict:
                     logger.warning(f"Failed to save structured memory: {structured_err}")
             
             logger.info(f"Successfully saved interaction for user_id: '{user_id}' to Mem0.")
+            # Anything read later in this run should see the interaction just written.
+            get_student_context(config, user_id).invalidate()
+
+            # Feed the rolling summary; it is refreshed in the background every few interactions.
+            student_summary_manager.record_interaction(user_id, structured_memory_data or interaction_data)
+            # Periodically move interactions outside the hot window to the cold archive.
+            schedule_tiering(user_id)
         except Exception as e:
             logger.error(f"Failed to save interaction to Mem0 for user_id: '{user_id}': {e}", exc_info=True)
     else:
@@ -2,6 +2,7 @@
 
 import logging
 from state import AgentGraphState
+from graph.rag_queries import teaching_query
 from graph.utils import query_knowledge_base # We will create a shared utility for the DB query
 
 logger = logging.getLogger(__name__)
@@ -14,14 +15,8 @@ async def teaching_RAG_document_node(state: AgentGraphState) -> dict:
     logger.info("---Executing Teaching RAG Node---")
 
     # Define which parts of the state form the query for 'teaching'
-    # This might be different from other flows. For teaching, the objective is key.
-    query_parts = [
-        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
-        f"Student Proficiency: {state.get('STUDENT_PROFICIENCY', '')}",
-        f"Student Affective State: {state.get('STUDENT_AFFECTIVE_STATE', '')}",
-        f"Key concepts to explain: {state.get('LESSON_FOR_STUDENT', '')}",
-    ]
-    query_string = " \n ".join(filter(None, query_parts)).strip()
+    # This might be different from other flows (see graph/rag_queries.py).
+    query_string = teaching_query(state)
 
     if not query_string:
         logger.warning("Teaching RAG Node: Query string is empty. Skipping vector search.")
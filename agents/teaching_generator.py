@@ -6,6 +6,7 @@ import os
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 from state import AgentGraphState
+from graph.projections import compact_json
 
 logger = logging.getLogger(__name__)
 
@@ -47,7 +48,7 @@ You are an expert AI TOEFL Tutor with the persona of 'The Structuralist'.
 - Student's Affective State: {state.get('STUDENT_AFFECTIVE_STATE', 'Neutral')}
 
 **Expert Examples from Knowledge Base (for inspiration on structure and tone):**
-{json.dumps(rag_data, indent=2)}
+{compact_json(rag_data)}
 
 **Your Task:**
 Generate a "Layered Content" payload for a teaching module. This payload must be a single JSON object containing four keys:
@@ -14,22 +14,30 @@ import logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', force=True)
 logger = logging.getLogger("uvicorn.error") # Ensure logger is defined before use in endpoints
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uuid
 import json
 import asyncio
+import codecs
+import secrets
 from typing import Dict, Any, Optional, List
-from pydantic import BaseModel, Field # For UserRegistrationRequest
+from pydantic import BaseModel, Field, ValidationError # For UserRegistrationRequest
 from fastapi import UploadFile, File
 from deepgram import DeepgramClient
 from deepgram import PrerecordedOptions
 
 from memory import initialize_memory
+from memory.student_context import StudentContext, CONTEXT_CONFIG_KEY
 import memory
  
 from graph_builder import build_graph
+from graph.utils import warm_up_knowledge_base, get_query_batcher_stats
+from graph.embedding_cache import query_embedding_cache
+from graph.result_cache import retrieval_result_cache
+from graph.rag_executor import shutdown_rag_executors
+from agents.RAG_document import diagnose_embedding_store
 from state import AgentGraphState
 import uuid
 
@@ -58,8 +66,12 @@ async def lifespan(app: FastAPI):
     logger.info("--- Application startup: Initializing memory ---")
     initialize_memory()
     logger.info("--- Application startup: Memory initialized ---")
+    # Build the in-memory RAG index and load the encoder before serving traffic.
+    await asyncio.to_thread(warm_up_knowledge_base)
+    await asyncio.to_thread(diagnose_embedding_store.warm_up)
     yield
     logger.info("--- Application shutdown ---")
+    shutdown_rag_executors()
 
 
 app = FastAPI(
@@ -208,6 +220,19 @@ def create_initial_state(request_data: InvokeTaskRequest) -> AgentGraphState:
 
     return initial_state
 
+def build_graph_config(session_id: Optional[str], user_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Config for one graph invocation. Besides the checkpointer's thread_id it carries a
+    fresh StudentContext, so every node in the run shares one memoized Mem0 read.
+    """
+    return {
+        "configurable": {
+            "thread_id": session_id,
+            "user_id": user_id,
+            CONTEXT_CONFIG_KEY: StudentContext(user_id),
+        }
+    }
+
 @app.post("/invoke_task_streaming")
 async def invoke_task_streaming_route(request_data: InvokeTaskRequest):
     """
@@ -218,7 +243,7 @@ async def invoke_task_streaming_route(request_data: InvokeTaskRequest):
         initial_graph_state = create_initial_state(request_data)
 
         # Create the config for the graph invocation, which is essential for memory
-        config = {"configurable": {"thread_id": initial_graph_state.get("session_id")}}
+        config = build_graph_config(initial_graph_state.get("session_id"), initial_graph_state.get("user_id"))
 
         # Call the SSE streamer with the prepared state and config
         return StreamingResponse(
@@ -249,6 +274,222 @@ async def register_user(registration_data: UserRegistrationRequest):
         logger.error(f"Failed to store user profile for {registration_data.user_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to store user profile.")
 
+# --- Bulk cohort registration ---
+BULK_REGISTER_BATCH_SIZE = 100  # Rows validated and written together before results are flushed
+BULK_REGISTER_CONCURRENCY = 8  # Concurrent profile writes to Mem0
+BULK_REGISTER_MAX_ROW_CHARS = 1_000_000  # A single row longer than this (in decoded characters) is rejected
+
+def _array_element_end(buffer: str) -> Optional[int]:
+    """Index of the top-level ',' or ']' that ends the array element at the start of buffer, or None if it has not fully arrived."""
+    depth = 0
+    in_string = escaped = False
+    for i, char in enumerate(buffer):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            if depth == 0 and char == "]":
+                return i
+            depth = max(depth - 1, 0)
+        elif char == "," and depth == 0:
+            return i
+    return None
+
+async def iter_json_rows(request: Request):
+    """
+    Incrementally parses a streamed request body that is either a JSON array of objects
+    or JSONL (one object per line), yielding (row_index, row) pairs without buffering
+    the whole body. A row that cannot be parsed is yielded as a ValueError.
+    """
+    decoder = json.JSONDecoder()
+    utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode = None
+    row_index = 0
+
+    async for chunk in request.stream():
+        buffer += utf8_decoder.decode(chunk)
+        if mode is None:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            mode = "array" if buffer.startswith("[") else "jsonl"
+            if mode == "array":
+                buffer = buffer[1:]
+
+        if mode == "jsonl":
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield row_index, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_index, ValueError(f"Invalid JSON: {e}")
+                row_index += 1
+        else:
+            while True:
+                buffer = buffer.lstrip().lstrip(",").lstrip()
+                if not buffer or buffer.startswith("]"):
+                    break
+                try:
+                    row, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError as e:
+                    element_end = _array_element_end(buffer)
+                    if element_end is None:
+                        # The row is split across chunks; wait for more data.
+                        break
+                    # The whole row is here and still does not parse: report it and resume at the next one.
+                    yield row_index, ValueError(f"Invalid JSON: {e}")
+                    row_index += 1
+                    buffer = buffer[element_end:]
+                    continue
+                yield row_index, row
+                row_index += 1
+                buffer = buffer[end:]
+
+        if len(buffer) > BULK_REGISTER_MAX_ROW_CHARS:
+            yield row_index, ValueError("Row exceeds the maximum allowed size.")
+            return
+
+    buffer += utf8_decoder.decode(b"", final=True)
+    remainder = buffer.strip()
+    if mode == "jsonl" and remainder:
+        try:
+            yield row_index, json.loads(remainder)
+        except json.JSONDecodeError as e:
+            yield row_index, ValueError(f"Invalid JSON: {e}")
+    elif mode == "array" and remainder.lstrip(",").strip() not in ("", "]"):
+        yield row_index, ValueError("Malformed JSON array near end of body.")
+
+@app.post("/users/register_bulk")
+async def register_users_bulk(request: Request):
+    """
+    Registers a cohort of users from a JSON array or JSONL body.
+    Rows are validated and written in batches through the raw profile-record path
+    (no Mem0 inference) with bounded concurrency. Per-row results are streamed back
+    as NDJSON, followed by a final summary line.
+    """
+    logger.info("Received bulk registration request.")
+    semaphore = asyncio.Semaphore(BULK_REGISTER_CONCURRENCY)
+
+    async def write_row(row_index: int, registration: UserRegistrationRequest) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                memory_ids = await asyncio.to_thread(
+                    memory.memory_stub.add_profile_record,
+                    registration.user_id,
+                    registration.model_dump(exclude={"user_id"}),
+                )
+                if not memory_ids:
+                    logger.error(f"Bulk registration: Mem0 stored no memory for {registration.user_id}'s profile.")
+                    return {"row": row_index, "user_id": registration.user_id, "status": "error", "detail": "No memory was created for the profile."}
+                return {"row": row_index, "user_id": registration.user_id, "status": "ok", "memory_ids": memory_ids}
+            except Exception as e:
+                logger.error(f"Bulk registration: failed to store profile for {registration.user_id}: {e}")
+                return {"row": row_index, "user_id": registration.user_id, "status": "error", "detail": str(e)}
+
+    async def stream_results():
+        counts = {"ok": 0, "invalid": 0, "error": 0}
+        batch = []
+
+        async def flush_batch():
+            results = await asyncio.gather(*(write_row(i, reg) for i, reg in batch))
+            batch.clear()
+            return results
+
+        async for row_index, row in iter_json_rows(request):
+            if isinstance(row, Exception):
+                counts["invalid"] += 1
+                yield json.dumps({"row": row_index, "status": "invalid", "detail": str(row)}) + "\n"
+                continue
+            try:
+                registration = UserRegistrationRequest.model_validate(row)
+            except ValidationError as e:
+                counts["invalid"] += 1
+                user_id = row.get("user_id") if isinstance(row, dict) else None
+                yield json.dumps({"row": row_index, "user_id": user_id, "status": "invalid", "detail": e.errors()}, default=str) + "\n"
+                continue
+
+            batch.append((row_index, registration))
+            if len(batch) >= BULK_REGISTER_BATCH_SIZE:
+                for result in await flush_batch():
+                    counts[result["status"]] += 1
+                    yield json.dumps(result) + "\n"
+
+        if batch:
+            for result in await flush_batch():
+                counts[result["status"]] += 1
+                yield json.dumps(result) + "\n"
+
+        logger.info(f"Bulk registration finished: {counts}")
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# --- Admin: bulk user-data deletion ---
+ADMIN_DELETE_MAX_WORKERS = 32  # Upper bound on concurrent Mem0 deletes a caller may request
+ADMIN_DELETE_MAX_BATCH_SIZE = 1000  # Upper bound on memory IDs per delete batch
+def require_admin_key(request: Request) -> None:
+    """Rejects the request unless it carries ADMIN_API_KEY; admin endpoints are disabled when no key is configured."""
+    admin_key = os.getenv("ADMIN_API_KEY")
+    if not admin_key:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled: ADMIN_API_KEY is not configured.")
+    if not secrets.compare_digest(request.headers.get("X-Admin-Key", ""), admin_key):
+        raise HTTPException(status_code=403, detail="Invalid admin key.")
+
+@app.delete("/admin/users/{user_id}/memories")
+async def delete_user_memories(
+    user_id: str,
+    request: Request,
+    max_workers: int = Query(8, ge=1, le=ADMIN_DELETE_MAX_WORKERS),
+    batch_size: int = Query(100, ge=1, le=ADMIN_DELETE_MAX_BATCH_SIZE),
+    use_backend: bool = False,
+):
+    """
+    Deletes every memory stored for a user and streams progress back as SSE.
+    The deletes run on a worker thread so the event loop keeps serving other requests.
+    """
+    require_admin_key(request)
+    logger.info(f"Admin: bulk delete requested for user_id: {user_id}")
+    loop = asyncio.get_running_loop()
+    progress_queue: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(done: int, total: int) -> None:
+        loop.call_soon_threadsafe(progress_queue.put_nowait, {"done": done, "total": total})
+
+    async def stream_delete_progress():
+        delete_task = asyncio.create_task(asyncio.to_thread(
+            memory.memory_stub.clear_user_memory,
+            user_id,
+            max_workers=max_workers,
+            batch_size=batch_size,
+            on_progress=on_progress,
+            use_backend=use_backend,
+        ))
+        try:
+            while not (delete_task.done() and progress_queue.empty()):
+                try:
+                    progress = await asyncio.wait_for(progress_queue.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+            report = delete_task.result()
+            yield f"event: complete\ndata: {json.dumps(report)}\n\n"
+        except Exception as e:
+            logger.error(f"Admin: bulk delete failed for {user_id}: {e}", exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(stream_delete_progress(), media_type="text/event-stream")
+
 # --- Streaming Endpoint --- 
 # In app.py
 
@@ -388,7 +629,7 @@ async def process_interaction_streaming_route(request_data: InteractionRequest):
     
     # Call the *same* reusable SSE function.
     return StreamingResponse(
-        stream_graph_responses_sse(initial_graph_state), 
+        stream_graph_responses_sse(initial_graph_state, build_graph_config(session_id, user_id)),
         media_type="text/event-stream"
     )
 
@@ -400,7 +641,7 @@ async def invoke_task_route(request_data: InvokeTaskRequest):
     logger.info(f"Received non-streaming task '{request_data.task_name}'.")
     try:
         initial_state = create_initial_state(request_data)
-        config = {"configurable": {"thread_id": initial_state["session_id"]}}
+        config = build_graph_config(initial_state["session_id"], initial_state.get("user_id"))
         
         # Use ainvoke for a single, final result.
         final_state = await toefl_tutor_graph.ainvoke(initial_state, config=config)
@@ -510,12 +751,7 @@ async def process_interaction_route(request_data: InteractionRequest):
 
     try:
         # Prepare config for LangGraph invocation
-        config = {
-            "configurable": {
-                "thread_id": session_id,
-                "user_id": user_id
-            }
-        }
+        config = build_graph_config(session_id, user_id)
         
         # Use regular ainvoke for non-streaming response
         final_state = await toefl_tutor_graph.ainvoke(initial_graph_state, config=config)
@@ -616,12 +852,7 @@ async def process_interaction_non_streaming_route(request_data: InteractionReque
         )
 
         # Prepare config for LangGraph invocation, crucial for Mem0 checkpointer
-        config = {
-            "configurable": {
-                "thread_id": request_data.session_id, # Using session_id as thread_id
-                "user_id": request_data.current_context.user_id # Optional: if user_id is also useful in config
-            }
-        }
+        config = build_graph_config(request_data.session_id, request_data.current_context.user_id)
         logger.info(f"Non-streaming endpoint: Invoking graph for session {request_data.session_id}, user {request_data.current_context.user_id}")
 
         # Invoke the graph
@@ -753,6 +984,15 @@ async def process_interaction_non_streaming_route(request_data: InteractionReque
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/rag/stats")
+async def rag_stats():
+    """Runtime counters for the RAG path (cache hit rates etc.)."""
+    return {
+        "embedding_cache": query_embedding_cache.stats(),
+        "embedding_batcher": get_query_batcher_stats(),
+        "result_cache": retrieval_result_cache.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,126 @@
+# bench/flows/critical_path.py
+
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+from unittest import mock
+
+from langgraph.graph import StateGraph, START, END
+
+# Make the project packages importable when run as `python bench/flows/critical_path.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from state import AgentGraphState
+
+# --- Configuration ---
+# Stand-in latencies (ms) per step, in the range the service logs for each kind of call.
+STEP_LATENCY_MS = {
+    "rag": 150,  # Query embedding + vector/BM25 search
+    "llm": 1500,  # One Gemini generate_content call
+    "formatter": 5,
+}
+# Steps that block in the real node and are moved off the event loop (run_retrieval's
+# thread pool); the stand-in blocks a worker thread the same way.
+BLOCKING_STEPS = {"rag"}
+JITTER = 0.2  # Each step's latency varies uniformly by +/- this fraction
+
+# Flow -> (module, subgraph factory). The current topology is always built by the real factory.
+FLOWS: Dict[str, Tuple[str, str]] = {
+    "teaching": ("graph.teaching_flow", "create_teaching_subgraph"),
+    "feedback": ("graph.feedback_flow", "create_feedback_subgraph"),
+    "scaffolding": ("graph.scaffolding_flow", "create_scaffolding_subgraph"),
+    "cowriting": ("graph.cowriting_flow", "create_cowriting_subgraph"),
+    "modelling": ("graph.modeling_flow", "create_modeling_subgraph"),
+    "pedagogy": ("graph.pedagogy_flow", "create_pedagogy_subgraph"),
+}
+# The node functions each flow ran, in order, before the fan-out change.
+PREVIOUS_CHAINS: Dict[str, List[str]] = {
+    "teaching": ["teaching_RAG_document_node", "teaching_generator_node", "teaching_output_formatter_node"],
+    "feedback": ["feedback_RAG_document_node", "feedback_generator_node", "feedback_output_formatter_node"],
+    "scaffolding": ["scaffolding_RAG_document_node", "scaffolding_generator_node", "scaffolding_output_formatter_node"],
+    "cowriting": ["cowriting_RAG_document_node", "cowriting_generator_node", "cowriting_output_formatter_node"],
+    "modelling": ["modelling_RAG_document_node", "modelling_generator", "modelling_output_formatter"],
+    "pedagogy": ["initial_report_generation_node", "pedagogy_generator_node", "pedagogy_output_formatter_node"],
+}
+# Pedagogy now also runs its RAG query (the generator puts the retrieved plans in its prompt);
+# this is what wiring it in series would have cost.
+SERIAL_CHAINS: Dict[str, List[str]] = {
+    "pedagogy": ["initial_report_generation_node", "pedagogy_rag_node", "pedagogy_generator_node", "pedagogy_output_formatter_node"],
+}
+
+def steps_for(function_name: str) -> List[str]:
+    """The stand-in steps for a node function, by what the real node calls."""
+    name = function_name.lower()
+    if name.startswith("initial_report_generation"):
+        return ["llm", "llm"]  # Two LLM calls, one after the other
+    if "rag" in name:
+        return ["rag"]
+    if "generator" in name:
+        return ["llm"]
+    if "formatter" in name:
+        return ["formatter"]
+    raise ValueError(f"No stand-in steps for node function '{function_name}'")
+
+def stand_in(function_name: str, seed: int) -> Callable:
+    # Seeded per node, so every topology replays identical latencies.
+    rng = random.Random(f"{seed}:{function_name}")
+    steps = steps_for(function_name)
+
+    async def node(state: AgentGraphState) -> dict:
+        for step in steps:
+            seconds = STEP_LATENCY_MS[step] * rng.uniform(1 - JITTER, 1 + JITTER) / 1000
+            if step in BLOCKING_STEPS:
+                await asyncio.to_thread(time.sleep, seconds)
+            else:
+                await asyncio.sleep(seconds)
+        return {}
+    return node
+
+def build_current(flow: str, seed: int):
+    """The flow's real subgraph wiring, with every node function swapped for its stand-in."""
+    module_name, factory = FLOWS[flow]
+    module = importlib.import_module(module_name)
+    node_functions = [name for name in vars(module) if name.endswith(("_node", "_generator", "_formatter")) and callable(getattr(module, name))]
+    with mock.patch.multiple(module, **{name: stand_in(name, seed) for name in node_functions}):
+        return getattr(module, factory)()
+
+def build_chain(function_names: List[str], seed: int):
+    workflow = StateGraph(AgentGraphState)
+    for name in function_names:
+        workflow.add_node(name, stand_in(name, seed))
+    workflow.add_edge(START, function_names[0])
+    for previous, name in zip(function_names, function_names[1:]):
+        workflow.add_edge(previous, name)
+    workflow.add_edge(function_names[-1], END)
+    return workflow.compile()
+
+async def time_flow(graph, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await graph.ainvoke({"user_id": "bench"})
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+async def run(runs: int, seed: int) -> None:
+    print(f"\nFlow critical path with stand-in steps {STEP_LATENCY_MS} ms (+/-{JITTER:.0%}), median of {runs} runs\n")
+    print(f"{'flow':<14}{'previous ms':>13}{'current ms':>12}{'change ms':>11}{'in series ms':>14}")
+    for flow in FLOWS:
+        previous = await time_flow(build_chain(PREVIOUS_CHAINS[flow], seed), runs)
+        current = await time_flow(build_current(flow, seed), runs)
+        serial = f"{await time_flow(build_chain(SERIAL_CHAINS[flow], seed), runs):>14.0f}" if flow in SERIAL_CHAINS else f"{'-':>14}"
+        print(f"{flow:<14}{previous:>13.0f}{current:>12.0f}{current - previous:>+11.0f}{serial}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Critical-path latency of each flow subgraph: previous chain vs current wiring.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.seed))
@@ -0,0 +1,81 @@
+# bench/ingest/embed_scaling.py
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import List
+
+# Make the project packages importable when run as `python bench/ingest/embed_scaling.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from scripts.build_knowledge_base import embed_batches
+from scripts.ingest import BATCH_SIZE
+
+# --- Configuration ---
+UNIFIED_KB_PATH = os.path.join(project_root, 'data', 'unified', 'unified_knowledge_base.jsonl')
+WORDS = "student essay paragraph grammar fluency vocabulary argument example structure clarity coherence verb subject tense".split()
+
+# Keep the pipeline's progress logs out of the results table
+logging.getLogger().setLevel(logging.WARNING)
+
+def load_documents(path: str, limit: int) -> List[str]:
+    documents = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                documents.append(json.loads(line)["document_for_embedding"])
+            if len(documents) >= limit:
+                break
+    return documents
+
+def synthetic_documents(count: int, seed: int = 0) -> List[str]:
+    # Roughly the length of a unified KB document (a few labelled parts of 20-60 words).
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 200))) for _ in range(count)]
+
+def time_workers(documents: List[str], workers: int) -> float:
+    """Steady-state records/s: timed from the first finished batch, so model loading is left out."""
+    work = [
+        ("embed", [(str(i), {"document_for_embedding": document}, "") for i, document in enumerate(documents[start:start + BATCH_SIZE], start)])
+        for start in range(0, len(documents), BATCH_SIZE)
+    ]
+    first_done = None
+    timed_records = 0
+    for _, batch, _ in embed_batches(work, workers):
+        if first_done is None:
+            first_done = time.perf_counter()
+        else:
+            timed_records += len(batch)
+    return timed_records / (time.perf_counter() - first_done)
+
+def run(documents: List[str], worker_counts: List[int]) -> None:
+    print(f"\nEmbedding throughput: {len(documents)} documents in batches of {BATCH_SIZE}, {os.cpu_count()} CPUs\n")
+    print(f"{'workers':<9}{'records/s':>11}{'speed-up':>10}{'efficiency':>12}")
+    baseline = None
+    for workers in worker_counts:
+        rate = time_workers(documents, workers)
+        baseline = baseline or rate
+        speedup = rate / baseline
+        print(f"{workers:<9}{rate:>11.1f}{speedup:>9.2f}x{speedup / workers * worker_counts[0]:>11.0%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest embedding throughput as the number of worker processes grows.")
+    parser.add_argument("--source", choices=["unified", "synthetic"], default="unified")
+    parser.add_argument("--input", default=UNIFIED_KB_PATH, help="Unified knowledge base JSONL (--source unified).")
+    parser.add_argument("--documents", type=int, default=20_000)
+    parser.add_argument(
+        "--workers", default=",".join(str(w) for w in (1, 2, 4, 8) if w <= (os.cpu_count() or 1)),
+        help="Comma-separated worker counts to compare."
+    )
+    args = parser.parse_args()
+
+    if args.source == "unified":
+        documents = load_documents(args.input, args.documents)
+    else:
+        documents = synthetic_documents(args.documents)
+    run(documents, [int(w) for w in args.workers.split(",")])
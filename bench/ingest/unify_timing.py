@@ -0,0 +1,154 @@
+# bench/ingest/unify_timing.py
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Make the project packages importable when run as `python bench/ingest/unify_timing.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from scripts.unify_knowledge_base import DOCUMENT_TEMPLATES, SOURCE_FILES, standardize_records, unify_and_standardize_cta_data
+
+# --- Configuration ---
+EXTRA_COLUMNS = 6  # Columns present in the CSVs but not used by the document templates
+NULL_RATE = 0.05  # Share of empty cells
+WORDS = "student essay paragraph grammar fluency vocabulary argument example structure clarity coherence verb subject tense".split()
+
+# Keep the per-file progress logs of the unify script out of the timing table
+logging.getLogger().setLevel(logging.WARNING)
+
+# --- Baseline: the row-at-a-time implementation the vectorized templates replaced ---
+def legacy_create_embedding_document(row: pd.Series, category: str) -> str:
+    """
+    Intelligently creates a single text document for embedding based on the category.
+    This function is the heart of the standardization process, tailored to each
+    unique CSV schema.
+    """
+    text_parts = []
+    
+    try:
+        if category == "cowriting":
+            text_parts.append(f"Learning Objective: {row.get('Learning_Objective_Focus', '')}")
+            text_parts.append(f"Student Input: {row.get('Student_Written_Input_Chunk', '')}")
+            text_parts.append(f"Struggle: {row.get('Immediate_Assessment_of_Input', '')}")
+            text_parts.append(f"AI Suggestion: {row.get('AI_Spoken_or_Suggested_Text', '')}")
+            text_parts.append(f"AI Rationale: {row.get('Rationale_for_Intervention_Style', '')}")
+            
+        elif category == "modelling":
+            text_parts.append(f"Task Prompt being modeled: {row.get('Example_Prompt_Text', '')}")
+            text_parts.append(f"Intended for student with this struggle: {row.get('Student_Struggle_Context', '')}")
+            text_parts.append(f"Setup Script: {row.get('pre_modeling_setup_script', '')}")
+            text_parts.append(f"Key takeaways from the model: {row.get('post_modeling_summary_and_key_takeaways', '')}")
+
+        elif category == "pedagogy":
+            text_parts.append(f"Student Answers: {row.get('Answer One', '')} {row.get('Answer Two', '')} {row.get('Answer Three', '')}")
+            text_parts.append(f"Teacher's initial impression: {row.get('Initial Impression', '')}")
+            text_parts.append(f"Student's assessed strengths: {row.get('Speaking Strengths', '')}")
+            # The 'Pedagogy' column contains a JSON string. We want the reasoning text inside it.
+            try:
+                pedagogy_plan = json.loads(row.get('Pedagogy', '{}'))
+                text_parts.append(f"Expert reasoning for the curriculum plan: {pedagogy_plan.get('reasoning', '')}")
+            except (json.JSONDecodeError, TypeError):
+                text_parts.append(f"Pedagogical Plan: {row.get('Pedagogy', '')}") # Fallback to raw string
+
+        elif category == "scaffolding":
+            text_parts.append(f"Learning Task: {row.get('Learning_Objective_Task', '')}")
+            text_parts.append(f"Specific Student Struggle: {row.get('Specific_Struggle_Point', '')}")
+            text_parts.append(f"Reasoning for choosing this scaffold: {row.get('reasoning_for_scaffold_choice', '')}")
+            text_parts.append(f"Script to deliver the scaffold to the student: {row.get('scaffold_delivery_script', '')}")
+            
+        elif category == "feedback":
+            text_parts.append(f"Student Proficiency and Task: {row.get('Proficiency', '')} {row.get('Task', '')}")
+            text_parts.append(f"Observed Student Behavior: {row.get('Behavior Factor', '')}")
+            text_parts.append(f"Specific Error Made by Student: {row.get('Error', '')}")
+            text_parts.append(f"Expert Diagnosis of the Error: {row.get('Diagnose', '')}")
+            text_parts.append(f"Strategy to Explain the Correction: {row.get('Explain Strategy', '')}")
+            
+        elif category == "teaching":
+            text_parts.append(f"Learning Objective: {row.get('LEARNING_OBJECTIVE', '')}")
+            text_parts.append(f"Core Teaching Strategy: {row.get('CORE_EXPLANATION_STRATEGY', '')}")
+            text_parts.append(f"Key Examples Used: {row.get('KEY_EXAMPLES', '')}")
+            text_parts.append(f"Common Misconceptions to Address: {row.get('COMMON_MISCONCEPTIONS', '')}")
+            
+        else:
+            logging.warning(f"No specific embedding document creation logic for category: '{category}'. Using a generic fallback.")
+            text_parts = [f"{k}: {v}" for k, v in row.iloc[:5].items()]
+
+        return " \n ".join(filter(None, text_parts)).strip()
+    except Exception as e:
+        logging.error(f"Error creating document for category {category} on row {row.name}: {e}")
+        return "" # Return empty string on error to avoid halting the whole process
+
+
+def legacy_standardize(df: pd.DataFrame, category: str) -> list:
+    records = []
+    df.columns = df.columns.str.strip()
+    for _, row in df.iterrows():
+        embedding_doc = legacy_create_embedding_document(row, category)
+        if not embedding_doc:
+            continue
+        metadata = {k.strip(): str(v) for k, v in row.to_dict().items()}
+        metadata['category'] = category
+        records.append({"document_for_embedding": embedding_doc, "metadata": metadata})
+    return records
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def write_synthetic_csvs(source_dir: str, rows: int, seed: int = 0) -> None:
+    """One CSV per source file, with the template columns, unused columns and some empty cells."""
+    rng = random.Random(seed)
+    for filename, category in SOURCE_FILES.items():
+        columns = [column for _, names in DOCUMENT_TEMPLATES[category] for column in names]
+        columns += [f"Extra_{i}" for i in range(EXTRA_COLUMNS)]
+        data = {
+            column: [None if rng.random() < NULL_RATE else _text(rng, rng.randint(5, 60)) for _ in range(rows)]
+            for column in columns
+        }
+        if category == "pedagogy":
+            plans = [json.dumps({"reasoning": _text(rng, 30), "steps": []}) for _ in range(50)]
+            data["Pedagogy"] = [rng.choice(plans) if rng.random() > NULL_RATE else None for _ in range(rows)]
+        pd.DataFrame(data).to_csv(os.path.join(source_dir, filename), index=False)
+
+def run(rows: int, processes: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = os.path.join(workdir, "source_cta")
+        os.makedirs(source_dir)
+        write_synthetic_csvs(source_dir, rows)
+        frames = {category: pd.read_csv(os.path.join(source_dir, filename)) for filename, category in SOURCE_FILES.items()}
+
+        print(f"\nUnify timing: {len(frames)} CSVs x {rows} rows\n")
+        print(f"{'category':<14}{'iterrows s':>12}{'vectorized s':>14}{'speed-up':>10}{'identical':>11}")
+        legacy_total = vectorized_total = 0.0
+        for category, df in frames.items():
+            start = time.perf_counter()
+            legacy = legacy_standardize(df.copy(), category)
+            legacy_s = time.perf_counter() - start
+            start = time.perf_counter()
+            vectorized = list(standardize_records(df.copy(), category))
+            vectorized_s = time.perf_counter() - start
+            legacy_total += legacy_s
+            vectorized_total += vectorized_s
+            print(f"{category:<14}{legacy_s:>12.2f}{vectorized_s:>14.2f}{legacy_s / vectorized_s:>9.1f}x{str(legacy == vectorized):>11}")
+        print(f"{'all (serial)':<14}{legacy_total:>12.2f}{vectorized_total:>14.2f}{legacy_total / vectorized_total:>9.1f}x")
+
+        # End to end (read CSV, standardize, write JSONL), one process vs the pool.
+        for workers in sorted({1, processes}):
+            start = time.perf_counter()
+            unify_and_standardize_cta_data(source_dir, os.path.join(workdir, f"unified_{workers}.jsonl"), processes=workers)
+            print(f"unify_and_standardize_cta_data, {workers} process(es): {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Row-wise vs vectorized document construction, serial vs process pool.")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows per synthetic CSV.")
+    parser.add_argument("--processes", type=int, default=min(len(SOURCE_FILES), os.cpu_count() or 1))
+    args = parser.parse_args()
+    run(args.rows, args.processes)
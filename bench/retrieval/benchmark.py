@@ -0,0 +1,248 @@
+# bench/retrieval/benchmark.py
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Make the project packages importable when run as `python bench/retrieval/benchmark.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bench.retrieval.quantization_report import synthetic_embeddings, recall_at_k
+from graph.rag_queries import QUERY_BUILDERS
+from graph.vector_index import NumpyVectorIndex, QuantizedVectorIndex, create_index, normalize_rows
+
+# --- Configuration ---
+UNIFIED_KB_PATH = os.path.join(project_root, 'data', 'unified', 'unified_knowledge_base.jsonl')
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Must match the model the service queries with
+TOP_K = 3  # What the RAG nodes request
+BACKENDS = ["chroma", "numpy", "faiss", "int8", "float16"]
+CONCURRENCY_LEVELS = [1, 4, 8, 16]  # RAG_MAX_WORKERS defaults to 4
+CHROMA_BATCH_SIZE = 5000
+
+# How a knowledge base row fills the state fields each RAG node's query template reads, so
+# replayed queries look like the ones a session produces for a student in that situation.
+# Fields a template reads under the row's own column name are taken from the row directly.
+STATE_FROM_ROW = {
+    "teaching": {"Learning_Objective_Focus": "LEARNING_OBJECTIVE", "LESSON_FOR_STUDENT": "CORE_EXPLANATION_STRATEGY"},
+    "cowriting": {},
+    "feedback": {
+        "diagnosed_error_type": "Error",
+        "Student_Affective_State": "Behavior Factor",
+        "Student_Comfort_Level": "Proficiency",
+        "Learning_Objective_Focus": "Task",
+    },
+    "scaffolding": {},
+    "pedagogy": {"transcript": "Answer One", "Learning_Objective_Focus": "Answer Two"},
+    "modelling": {
+        "example_prompt_text": "Example_Prompt_Text",
+        "student_goal_context": "Student_Goal_Context",
+        "student_confidence_context": "Student_Confidence_Context",
+        "teacher_initial_impression": "Teacher_Initial_Impression",
+        "student_struggle_context": "Student_Struggle_Context",
+    },
+}
+STUDENT_STATES = {
+    "STUDENT_PROFICIENCY": ["Beginner", "Intermediate", "Advanced"],
+    "STUDENT_AFFECTIVE_STATE": ["Neutral", "Anxious", "Confident", "Frustrated"],
+    "English_Comfort_Level": ["Beginner", "Conversational", "Advanced"],
+    "Student_Attitude_Context": ["Motivated", "Hesitant", "Discouraged"],
+}
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# category -> (ids, float32 embeddings, metadatas)
+Dataset = Dict[str, Tuple[List[str], np.ndarray, List[Dict]]]
+Queries = List[Tuple[str, np.ndarray]]
+
+def build_query_state(row: Dict, category: str, rng: random.Random) -> Dict:
+    state = dict(row)
+    state.update({key: rng.choice(values) for key, values in STUDENT_STATES.items()})
+    state.update({key: row.get(column, "") for key, column in STATE_FROM_ROW.get(category, {}).items()})
+    if category == "pedagogy":
+        state["student_model"] = {"summary": row.get("Initial Impression", "")}
+    return state
+
+def load_unified(path: str, queries_per_category: int, seed: int) -> Tuple[Dataset, Queries]:
+    """Embeds the unified KB and builds queries from sampled rows with each RAG node's template."""
+    from graph.registry import get_embedding_model
+    model = get_embedding_model(EMBEDDING_MODEL)
+    rng = random.Random(seed)
+
+    rows_by_category: Dict[str, Tuple[List[str], List[Dict]]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            metadata = record["metadata"]
+            documents, metadatas = rows_by_category.setdefault(metadata.get("category", ""), ([], []))
+            documents.append(record["document_for_embedding"])
+            metadatas.append(metadata)
+
+    dataset: Dataset = {}
+    query_texts: List[Tuple[str, str]] = []
+    for category, (documents, metadatas) in rows_by_category.items():
+        start_time = time.time()
+        embeddings = model.encode(documents, batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+        ids = [f"{category}_{i}" for i in range(len(documents))]
+        dataset[category] = (ids, np.asarray(embeddings, dtype=np.float32), metadatas)
+        logging.info(f"Embedded {len(documents)} '{category}' documents in {time.time() - start_time:.2f}s.")
+
+        build_query = QUERY_BUILDERS.get(category)
+        if build_query is None:
+            continue
+        for row in rng.choices(metadatas, k=queries_per_category):
+            query_texts.append((category, build_query(build_query_state(row, category, rng))))
+
+    query_vectors = model.encode([text for _, text in query_texts], batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+    return dataset, [(category, vector) for (category, _), vector in zip(query_texts, np.asarray(query_vectors, dtype=np.float32))]
+
+def load_synthetic(documents: int, queries_per_category: int, seed: int) -> Tuple[Dataset, Queries]:
+    """Clustered vectors per category (no model needed); queries are drawn near existing rows."""
+    dataset: Dataset = {}
+    queries: Queries = []
+    per_category = max(documents // len(QUERY_BUILDERS), TOP_K)
+    for offset, category in enumerate(QUERY_BUILDERS):
+        docs, query_vectors = synthetic_embeddings(per_category, queries_per_category, seed=seed + offset)
+        ids = [f"{category}_{i}" for i in range(per_category)]
+        dataset[category] = (ids, docs, [{"category": category, "row": i} for i in range(per_category)])
+        queries.extend((category, vector) for vector in query_vectors)
+    return dataset, queries
+
+class IndexBackend:
+    def __init__(self, index):
+        self.index = index
+        self.name = index.backend
+
+    def search(self, category: str, query: np.ndarray, top_k: int) -> List[str]:
+        return [record_id for record_id, _ in self.index.search_with_ids(query, category, top_k)]
+
+    def memory_bytes(self) -> int:
+        return self.index.memory_bytes()
+
+class ChromaBackend:
+    """The service's fallback path: an HNSW query against a persistent collection, filtered by category."""
+    name = "chroma"
+
+    def __init__(self, dataset: Dataset, path: str):
+        import chromadb
+        self.path = path
+        self.collection = chromadb.PersistentClient(path=path).create_collection(
+            name="bench", metadata={"hnsw:space": "cosine"}
+        )
+        for category, (ids, embeddings, metadatas) in dataset.items():
+            records = [{**metadata, "category": category} for metadata in metadatas]
+            for start in range(0, len(ids), CHROMA_BATCH_SIZE):
+                end = start + CHROMA_BATCH_SIZE
+                self.collection.add(ids=ids[start:end], embeddings=embeddings[start:end].tolist(), metadatas=records[start:end])
+
+    def search(self, category: str, query: np.ndarray, top_k: int) -> List[str]:
+        result = self.collection.query(
+            query_embeddings=[query.tolist()], n_results=top_k, where={"category": category}, include=[]
+        )
+        return result["ids"][0]
+
+    def memory_bytes(self) -> int:
+        # On-disk size of the collection; the HNSW segments are loaded in full when queried.
+        return sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(self.path) for name in names
+        )
+
+def build_backend(name: str, dataset: Dataset, workdir: str):
+    start_time = time.time()
+    try:
+        if name == "chroma":
+            backend = ChromaBackend(dataset, os.path.join(workdir, "chroma"))
+        else:
+            index = QuantizedVectorIndex(name, rescore_directory=os.path.join(workdir, name)) \
+                if name in ("int8", "float16") else create_index(name)
+            if index.backend != name:
+                logging.warning(f"Skipping backend '{name}': it is not available in this environment.")
+                return None
+            for category, (ids, embeddings, metadatas) in dataset.items():
+                index.add_partition(category, embeddings, metadatas, ids)
+            backend = IndexBackend(index)
+    except ImportError as e:
+        logging.warning(f"Skipping backend '{name}': {e}")
+        return None
+    logging.info(f"Built backend '{name}' in {time.time() - start_time:.2f}s.")
+    return backend
+
+def measure(backend, queries: Queries, reference: List[List[str]], concurrency_levels: List[int]) -> Dict:
+    results, latencies_ms = [], []
+    for category, query in queries:
+        start = time.perf_counter()
+        results.append(backend.search(category, query, TOP_K))
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    throughput = {}
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda item: backend.search(item[0], item[1], TOP_K), queries))
+            throughput[concurrency] = len(queries) / (time.perf_counter() - start)
+
+    return {
+        "backend": backend.name,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "qps": throughput,
+        "memory_mb": backend.memory_bytes() / 2**20,
+        "recall_at_3": recall_at_k(reference, results),
+    }
+
+def run(dataset: Dataset, queries: Queries, backends: List[str], concurrency_levels: List[int]) -> List[Dict]:
+    # Ground truth: exact cosine search over the same partitions.
+    exact = NumpyVectorIndex()
+    for category, (ids, embeddings, metadatas) in dataset.items():
+        exact.add_partition(category, embeddings, metadatas, ids)
+    reference = [[record_id for record_id, _ in exact.search_with_ids(q, c, TOP_K)] for c, q in queries]
+    queries = [(category, normalize_rows(query[None, :])[0]) for category, query in queries]
+
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in backends:
+            backend = build_backend(name, dataset, workdir)
+            if backend is not None:
+                reports.append(measure(backend, queries, reference, concurrency_levels))
+
+    documents = sum(len(ids) for ids, _, _ in dataset.values())
+    print(f"\nRetrieval benchmark: {documents} documents in {len(dataset)} categories, {len(queries)} queries, top-{TOP_K}\n")
+    qps_headers = "".join(f"{f'qps@{c}':>10}" for c in concurrency_levels)
+    print(f"{'backend':<10}{'p50 ms':>9}{'p99 ms':>9}{qps_headers}{'memory MB':>11}{'recall@3':>10}")
+    for report in reports:
+        qps = "".join(f"{report['qps'][c]:>10.0f}" for c in concurrency_levels)
+        print(f"{report['backend']:<10}{report['p50_ms']:>9.3f}{report['p99_ms']:>9.3f}{qps}{report['memory_mb']:>11.2f}{report['recall_at_3']:>10.4f}")
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency, throughput, memory and recall@3 of the retrieval backends.")
+    parser.add_argument("--source", choices=["unified", "synthetic"], default="unified")
+    parser.add_argument("--input", default=UNIFIED_KB_PATH, help="Unified knowledge base JSONL (--source unified).")
+    parser.add_argument("--documents", type=int, default=60_000, help="Total synthetic documents (--source synthetic).")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per category.")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--concurrency", default=",".join(str(c) for c in CONCURRENCY_LEVELS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    if args.source == "unified":
+        dataset, queries = load_unified(args.input, args.queries, args.seed)
+    else:
+        dataset, queries = load_synthetic(args.documents, args.queries, args.seed)
+    reports = run(dataset, queries, args.backends.split(","), [int(c) for c in args.concurrency.split(",")])
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"source": args.source, "top_k": TOP_K, "results": reports}, f, indent=2)
@@ -0,0 +1,69 @@
+# bench/retrieval/quantization_report.py
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Make the project packages importable when run as `python bench/retrieval/quantization_report.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from graph.vector_index import NumpyVectorIndex, QuantizedVectorIndex
+
+# --- Configuration ---
+DIMENSIONS = 384  # all-MiniLM-L6-v2
+TOP_K = 3  # What the RAG nodes request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def synthetic_embeddings(documents: int, queries: int, clusters: int = 50, seed: int = 0):
+    """Clustered unit vectors (KB rows come in families) and queries drawn near existing rows."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMENSIONS)).astype(np.float32)
+    docs = centers[rng.integers(0, clusters, documents)] + 0.6 * rng.normal(size=(documents, DIMENSIONS)).astype(np.float32)
+    query_vectors = docs[rng.integers(0, documents, queries)] + 0.4 * rng.normal(size=(queries, DIMENSIONS)).astype(np.float32)
+    return docs, query_vectors
+
+def recall_at_k(reference, candidate) -> float:
+    hits = sum(len(set(r) & set(c)) for r, c in zip(reference, candidate))
+    return hits / sum(len(r) for r in reference)
+
+def run(documents: int, queries: int) -> None:
+    docs, query_vectors = synthetic_embeddings(documents, queries)
+    metadatas = [{"row": i} for i in range(documents)]
+
+    exact = NumpyVectorIndex()
+    exact.add_partition("kb", docs, metadatas)
+    start = time.perf_counter()
+    reference = [[m["row"] for m in exact.search(q, "kb", TOP_K)] for q in query_vectors]
+    exact_ms = (time.perf_counter() - start) * 1000 / queries
+
+    # (backend, index, recall@3, identical top-3 incl. order, ms/query)
+    rows = [("numpy (float32)", exact, 1.0, 1.0, exact_ms)]
+    with tempfile.TemporaryDirectory() as rescore_directory:
+        for dtype in ("float16", "int8"):
+            index = QuantizedVectorIndex(dtype, rescore_directory=rescore_directory)
+            index.add_partition("kb", docs, metadatas)
+            start = time.perf_counter()
+            results = [[m["row"] for m in index.search(q, "kb", TOP_K)] for q in query_vectors]
+            per_query_ms = (time.perf_counter() - start) * 1000 / queries
+            same_order = sum(r == c for r, c in zip(reference, results)) / queries
+            rows.append((f"{dtype} + exact rescoring", index, recall_at_k(reference, results), same_order, per_query_ms))
+
+        print(f"\nQuantization report: {documents} documents x {DIMENSIONS} dims, {queries} queries, top-{TOP_K}\n")
+        print(f"{'backend':<28}{'resident MB':>12}{'recall@3':>10}{'identical top-3':>17}{'ms/query':>10}")
+        for name, index, recall, same_order, per_query_ms in rows:
+            print(f"{name:<28}{index.memory_bytes() / 2**20:>12.2f}{recall:>10.4f}{same_order:>17.4f}{per_query_ms:>10.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs memory of the quantized vector index backends.")
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args.documents, args.queries)
@@ -0,0 +1,104 @@
+# bench/retrieval/token_report.py
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Callable, Dict, List
+
+# Make the project packages importable when run as `python bench/retrieval/token_report.py`
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from graph.projections import compact_json, project_records
+
+# --- Configuration ---
+DB_DIRECTORY = "chroma_db"
+COLLECTION_NAME = "tutor_knowledge_base"
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is not installed
+SAMPLES_PER_FLOW = 50
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def _legacy_modelling(records: List[Dict]) -> str:
+    return json.dumps(json.loads(records[0].get('modeling_and_think_aloud_sequence_json', '{}')), indent=2)
+
+def _compact_modelling(records: List[Dict]) -> str:
+    return compact_json(json.loads(records[0].get('modeling_and_think_aloud_sequence_json', '{}')))
+
+# (flow, category, documents the generator inlines, serialization before, serialization now),
+# mirroring what each generator node puts into its prompt.
+FLOWS = [
+    ("teaching", "teaching", 3,
+     lambda records: json.dumps(records, indent=2),
+     compact_json),
+    ("feedback", "feedback", 3,
+     lambda records: "\n---\n".join(json.dumps(r, indent=2) for r in records),
+     lambda records: "\n---\n".join(compact_json(r) for r in records)),
+    ("scaffolding", "scaffolding", 2,
+     lambda records: "\n---\n".join(json.dumps(r, indent=2) for r in records),
+     lambda records: "\n---\n".join(compact_json(r) for r in records)),
+    ("modelling", "modelling", 1, _legacy_modelling, _compact_modelling),
+    ("pedagogy", "pedagogy_profile", 10, str, compact_json),
+]
+
+def get_token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        logging.info("Counting tokens with tiktoken (cl100k_base).")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        logging.info(f"tiktoken not installed; estimating tokens as characters / {CHARS_PER_TOKEN}.")
+        return lambda text: -(-len(text) // CHARS_PER_TOKEN)
+
+def load_from_jsonl(path: str) -> Dict[str, List[Dict]]:
+    """Groups the metadata rows of a unified knowledge base JSONL file by category."""
+    by_category: Dict[str, List[Dict]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                metadata = json.loads(line)["metadata"]
+                by_category.setdefault(metadata.get("category", ""), []).append(metadata)
+    return by_category
+
+def load_from_db(limit: int) -> Dict[str, List[Dict]]:
+    """Reads the metadata rows the service actually retrieves, per category, from the Chroma DB."""
+    from graph.registry import get_chroma_client, resolve_db_path
+    collection = get_chroma_client(resolve_db_path(DB_DIRECTORY)).get_collection(name=COLLECTION_NAME)
+    by_category = {}
+    for _, category, _, _, _ in FLOWS:
+        page = collection.get(where={"category": category}, include=["metadatas"], limit=limit)
+        by_category[category] = page.get("metadatas") or []
+    return by_category
+
+def run(by_category: Dict[str, List[Dict]], samples: int) -> None:
+    count_tokens = get_token_counter()
+    print(f"\nPrompt tokens spent on retrieved documents, mean over up to {samples} result sets per flow\n")
+    print(f"{'flow':<14}{'docs':>6}{'sets':>6}{'before':>10}{'after':>10}{'saved':>10}{'saved %':>9}")
+    total_before = total_after = 0
+    for flow, category, k, legacy, current in FLOWS:
+        rows = by_category.get(category, [])
+        # Consecutive groups of k rows stand in for the result sets a query would return.
+        result_sets = [rows[i:i + k] for i in range(0, len(rows) - k + 1, k)][:samples]
+        if not result_sets:
+            print(f"{flow:<14}{k:>6}{0:>6}{'(no ' + category + ' records)':>39}")
+            continue
+        before = sum(count_tokens(legacy(records)) for records in result_sets) / len(result_sets)
+        after = sum(count_tokens(current(project_records(records, category))) for records in result_sets) / len(result_sets)
+        total_before += before
+        total_after += after
+        print(f"{flow:<14}{k:>6}{len(result_sets):>6}{before:>10.0f}{after:>10.0f}{before - after:>10.0f}{(1 - after / before) * 100 if before else 0.0:>8.1f}%")
+    if total_before:
+        print(f"{'all flows':<26}{total_before:>10.0f}{total_after:>10.0f}{total_before - total_after:>10.0f}{(1 - total_after / total_before) * 100:>8.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-flow prompt token savings from field projection and compact JSON.")
+    parser.add_argument("--input", help="Unified knowledge base JSONL to read instead of the Chroma DB "
+                                        "(e.g. data/unified/unified_knowledge_base.jsonl).")
+    parser.add_argument("--samples", type=int, default=SAMPLES_PER_FLOW)
+    args = parser.parse_args()
+    records = load_from_jsonl(args.input) if args.input else load_from_db(limit=args.samples * 10)
+    run(records, args.samples)
@@ -0,0 +1,28 @@
+import logging
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# One sentence-transformer per model name for the whole process, shared by the RAG
+# knowledge base (graph.registry) and Mem0's local embedder (memory.local_embedder).
+# Kept free of chromadb and Mem0 imports so either package can use it without the other.
+_models: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str):
+    """Returns the process-wide sentence-transformer for `model_name`, loading it on first use."""
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info(f"Registry: Loading sentence-transformer model '{model_name}'...")
+            model = SentenceTransformer(model_name)
+            _models[model_name] = model
+        return model
+
+
+def loaded_models() -> List[str]:
+    return list(_models)
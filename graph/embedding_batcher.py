@@ -0,0 +1,115 @@
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+BATCH_MAX_ITEMS = int(os.getenv("RAG_BATCH_MAX_ITEMS", "32"))  # Flush as soon as this many texts are queued
+BATCH_MAX_WAIT_MS = float(os.getenv("RAG_BATCH_MAX_WAIT_MS", "5"))  # ...or when the oldest has waited this long
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+WAIT_MS_BUCKETS = [1, 2, 5, 10, 20, 50, 100]
+
+
+class Histogram:
+    """Fixed-bucket histogram (counts of observations <= each bound, plus an overflow bucket)."""
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.observations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.observations,
+            "mean": round(self.total / self.observations, 3) if self.observations else 0.0,
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Collects query texts from concurrent coroutines for up to `max_wait_ms` (or until
+    `max_items` are queued), encodes them with one `encode` call on `executor`, and
+    resolves each caller's future with its vector. MiniLM on CPU is far cheaper per text
+    at batch sizes of 16-64 than at 1, which is what a burst of RAG nodes would otherwise use.
+    """
+    def __init__(
+        self,
+        encode_provider: Callable[[], Callable[[List[str]], Sequence[Sequence[float]]]],
+        executor: Any = None,
+        max_items: int = BATCH_MAX_ITEMS,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        self._encode_provider = encode_provider
+        self._executor = executor
+        self.max_items = max_items
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._encode(batch))
+            task.add_done_callback(lambda t: t.exception())  # Errors are delivered through the futures
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued in batch:
+            self.wait_ms.observe((started - enqueued) * 1000)
+
+        try:
+            encode = self._encode_provider()
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self._executor, encode, [text for text, _, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"EmbeddingBatcher: Encoding a batch of {len(batch)} failed: {e}", exc_info=True)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), vector in zip(batch, vectors):
+            # A caller that timed out has cancelled its future; skip it.
+            if not future.done():
+                future.set_result(list(vector))
+        logger.debug(f"EmbeddingBatcher: Encoded {len(batch)} texts in {(time.perf_counter() - started) * 1000:.1f}ms.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_items": self.max_items,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+        }
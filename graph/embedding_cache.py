@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+EMBEDDING_CACHE_SIZE = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "2048"))  # Query embeddings kept in memory
+STATS_LOG_EVERY = 500  # Lookups between hit-rate log lines
+
+
+def normalize_query(text: str) -> str:
+    """Collapses whitespace so trivially different renderings of a query template share an entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU of query embeddings keyed on (model id, normalized text).
+    RAG queries are built from a handful of templates filled with student context, so
+    the same strings recur often; a hit skips the encoder forward pass entirely.
+    """
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], Sequence[Sequence[float]]],
+        model_id: str,
+    ) -> List[List[float]]:
+        """
+        Returns one embedding per text, calling `encode` once for all cache misses
+        (deduplicated) and storing the results.
+        """
+        keys = [(model_id, normalize_query(text)) for text in texts]
+        results: Dict[Tuple[str, str], List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in results:
+                    continue
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    results[key] = vector
+            hits = sum(1 for key in keys if key in results)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        missing = list(dict.fromkeys(key for key in keys if key not in results))
+        if missing:
+            vectors = encode([text for _, text in missing])
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    vector = list(vector)
+                    results[key] = vector
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        if (self.hits + self.misses) % STATS_LOG_EVERY < len(keys):
+            logger.info(f"EmbeddingCache: {self.stats()}")
+        return [results[key] for key in keys]
+
+    def lookup(self, text: str, model_id: str) -> Optional[List[float]]:
+        """Returns the cached embedding for a single query, counting the hit or miss."""
+        key = (model_id, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def store(self, text: str, model_id: str, vector: Sequence[float]) -> None:
+        with self._lock:
+            key = (model_id, normalize_query(text))
+            self._entries[key] = list(vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by query_knowledge_base and every RAG node that embeds queries.
+query_embedding_cache = EmbeddingCache()
+
+
+def embed_query(text: str, encode: Callable[[List[str]], Sequence[Sequence[float]]], model_id: str) -> List[float]:
+    """Embeds a single query string through the shared cache."""
+    return query_embedding_cache.embed([text], encode, model_id)[0]
@@ -0,0 +1,163 @@
+import gzip
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+LEXICAL_INDEX_FILE = "lexical_index.json.gz"  # Written next to the Chroma DB at ingest time
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion constant; damps the influence of any single ranking
+# Metadata fields whose values are indexed alongside the embedded text: objective IDs,
+# error categories, task names and the like are matched verbatim rather than semantically.
+KEY_FIELD_HINTS = ("objective", "error", "task", "skill", "topic", "category", "_id", "type")
+LOAD_PAGE_SIZE = 1000
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; underscores are kept so IDs such as G_SVA stay one term."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def lexical_text(document: str, metadata: Dict) -> str:
+    """The text indexed for a record: its embedding document plus its key metadata fields."""
+    key_values = [
+        str(value) for key, value in (metadata or {}).items()
+        if value and any(hint in key.lower() for hint in KEY_FIELD_HINTS)
+    ]
+    return " ".join([document or ""] + key_values)
+
+
+class _Partition:
+    """BM25 postings for one category."""
+    def __init__(self, ids: List[str], token_lists: List[List[str]]):
+        self.ids = ids
+        self.doc_lengths = [len(tokens) for tokens in token_lists]
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, tokens in enumerate(token_lists):
+            for term, frequency in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc, frequency))
+        n = len(ids)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query_terms: Sequence[str], top_k: int) -> List[str]:
+        scores: Dict[int, float] = {}
+        for term in set(query_terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc, frequency in docs:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc] / (self.avg_length or 1.0))
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [self.ids[doc] for doc, _ in best]
+
+
+class LexicalIndex:
+    """BM25 inverted index over the knowledge base, partitioned by category like the vector index."""
+    def __init__(self, categories: Dict[str, Tuple[List[str], List[List[str]]]]):
+        self._raw = categories
+        self._partitions = {category: _Partition(ids, tokens) for category, (ids, tokens) in categories.items()}
+
+    def search(self, query_string: str, category: str, top_k: int) -> List[str]:
+        """Returns the IDs of the best BM25 matches within `category`, best first."""
+        partition = self._partitions.get(category)
+        if partition is None or top_k <= 0:
+            return []
+        return partition.search(tokenize(query_string), top_k)
+
+    def size(self) -> int:
+        return sum(len(p.ids) for p in self._partitions.values())
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"categories": {c: {"ids": ids, "tokens": tokens} for c, (ids, tokens) in self._raw.items()}}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls({c: (p["ids"], p["tokens"]) for c, p in data["categories"].items()})
+
+
+def build_lexical_index(collection) -> LexicalIndex:
+    """Tokenizes every record (document + key metadata fields) of a Chroma collection."""
+    categories: Dict[str, Tuple[List[str], List[List[str]]]] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=LOAD_PAGE_SIZE, offset=offset)
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        for record_id, document, metadata in zip(ids, page["documents"], page["metadatas"]):
+            category = (metadata or {}).get("category", "")
+            partition = categories.setdefault(category, ([], []))
+            partition[0].append(record_id)
+            partition[1].append(tokenize(lexical_text(document, metadata)))
+        offset += len(ids)
+    return LexicalIndex(categories)
+
+
+def write_lexical_index(collection, db_path: str) -> None:
+    """Ingest-time step: builds the BM25 index from the collection and saves it next to the DB."""
+    start_time = time.time()
+    index = build_lexical_index(collection)
+    index.save(os.path.join(db_path, LEXICAL_INDEX_FILE))
+    logger.info(f"Lexical index: Indexed {index.size()} records in {time.time() - start_time:.2f}s.")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Fuses ranked ID lists: each list contributes 1 / (k + rank) to every ID it contains."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, record_id in enumerate(ranking, start=1):
+            scores[record_id] = scores.get(record_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda record_id: scores[record_id], reverse=True)
+
+
+# --- Process-wide index, loaded lazily from the DB directory ---
+_index: Optional[LexicalIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_lexical_index(db_path: str) -> Optional[LexicalIndex]:
+    """Returns the saved lexical index, or None if ingest has not produced one (vector-only retrieval)."""
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            path = os.path.join(db_path, LEXICAL_INDEX_FILE)
+            if os.path.exists(path):
+                try:
+                    _index = LexicalIndex.load(path)
+                    logger.info(f"Lexical index: Loaded {_index.size()} records from {path}.")
+                except Exception as e:
+                    logger.error(f"Lexical index: Failed to load {path}, using vector-only retrieval: {e}", exc_info=True)
+            _index_loaded = True
+    return _index
+
+
+def reset_lexical_index() -> None:
+    global _index, _index_loaded
+    with _index_lock:
+        _index = None
+        _index_loaded = False
@@ -1,37 +1,41 @@
 # graph/pedagogy_flow.py
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from state import AgentGraphState
 
 # 1. Import the agent node functions for the new architecture
 from agents import (
     initial_report_generation_node,
+    pedagogy_rag_node,
     pedagogy_generator_node,
     pedagogy_output_formatter_node,
 )
 
 # 2. Define standardized node names
 NODE_INITIAL_REPORT_GENERATION = "initial_report_generation"
-
+NODE_PEDAGOGY_RAG = "pedagogy_rag"
 NODE_PEDAGOGY_GENERATOR = "pedagogy_generator"
 NODE_PEDAGOGY_OUTPUT_FORMATTER = "pedagogy_output_formatter"
 
 def create_pedagogy_subgraph():
     """
-    Creates a LangGraph subgraph for the pedagogy flow.
-    This flow follows the standard RAG -> Generator -> Formatter architecture
-    to determine the next best task for the student.
+    Creates a LangGraph subgraph for the pedagogy flow to determine the next best task
+    for the student. The initial report and the pedagogy RAG query only depend on the
+    incoming state, so they run as parallel branches; the generator starts once both
+    have finished, followed by the formatter.
     """
     workflow = StateGraph(AgentGraphState)
 
     # 3. Add the nodes to the subgraph
     workflow.add_node(NODE_INITIAL_REPORT_GENERATION, initial_report_generation_node)
-
+    workflow.add_node(NODE_PEDAGOGY_RAG, pedagogy_rag_node)
     workflow.add_node(NODE_PEDAGOGY_GENERATOR, pedagogy_generator_node)
     workflow.add_node(NODE_PEDAGOGY_OUTPUT_FORMATTER, pedagogy_output_formatter_node)
 
-    # 4. Define the entry point and the sequential flow
-    workflow.set_entry_point(NODE_INITIAL_REPORT_GENERATION)
-    workflow.add_edge(NODE_INITIAL_REPORT_GENERATION, NODE_PEDAGOGY_GENERATOR)
+    # 4. Fan out from the start, then join: the generator waits for every branch.
+    parallel_branches = [NODE_INITIAL_REPORT_GENERATION, NODE_PEDAGOGY_RAG]
+    for branch in parallel_branches:
+        workflow.add_edge(START, branch)
+    workflow.add_edge(parallel_branches, NODE_PEDAGOGY_GENERATOR)
     workflow.add_edge(NODE_PEDAGOGY_GENERATOR, NODE_PEDAGOGY_OUTPUT_FORMATTER)
     workflow.add_edge(NODE_PEDAGOGY_OUTPUT_FORMATTER, END) # End of the subgraph
 
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+FIELD_PROJECTION_ENABLED = os.getenv("RAG_FIELD_PROJECTION", "1") != "0"  # "0" returns full metadata rows
+TRUNCATION_MARKER = "…"
+# Values unify_knowledge_base.py produces for empty CSV cells (every column is stringified).
+EMPTY_VALUES = frozenset({"", "nan", "none", "null"})
+
+# Fields each category's generator actually reads, in prompt order, with a character cap
+# per field (0 = never truncated; used for fields holding JSON the generator parses).
+FieldSpec = Tuple[str, int]
+PROJECTIONS: Dict[str, Tuple[FieldSpec, ...]] = {
+    "teaching": (
+        ("LEARNING_OBJECTIVE", 200),
+        ("CORE_EXPLANATION_STRATEGY", 1200),
+        ("KEY_EXAMPLES", 800),
+        ("COMMON_MISCONCEPTIONS", 600),
+    ),
+    "feedback": (
+        ("Task", 150),
+        ("Proficiency", 60),
+        ("Behavior Factor", 200),
+        ("Error", 300),
+        ("Diagnose", 600),
+        ("Explain Strategy", 800),
+    ),
+    "scaffolding": (
+        ("Learning_Objective_Task", 200),
+        ("Specific_Struggle_Point", 300),
+        ("reasoning_for_scaffold_choice", 600),
+        ("scaffold_delivery_script", 1200),
+    ),
+    "cowriting": (
+        ("Learning_Objective_Focus", 200),
+        ("Student_Written_Input_Chunk", 600),
+        ("Immediate_Assessment_of_Input", 400),
+        ("AI_Spoken_or_Suggested_Text", 600),
+        ("Rationale_for_Intervention_Style", 400),
+    ),
+    "modelling": (
+        ("Example_Prompt_Text", 500),
+        ("Student_Struggle_Context", 300),
+        ("modeling_and_think_aloud_sequence_json", 0),
+    ),
+    "pedagogy": (
+        ("Initial Impression", 400),
+        ("Speaking Strengths", 400),
+        ("Pedagogy", 0),
+    ),
+    "pedagogy_profile": (
+        ("Goal", 200),
+        ("Feeling", 200),
+        ("Confidence", 100),
+        ("Estimated Overall English Comfort Level", 100),
+        ("Initial Impression", 400),
+        ("Speaking Strengths", 400),
+        ("Fluency", 200),
+        ("Grammar", 200),
+        ("Vocabulary", 200),
+        ("Pedagogy", 0),
+    ),
+}
+
+
+def _clip(value: Any, max_chars: int) -> Any:
+    if not isinstance(value, str) or max_chars <= 0 or len(value) <= max_chars:
+        return value
+    return value[:max_chars].rstrip() + TRUNCATION_MARKER
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in EMPTY_VALUES)
+
+
+def project_record(record: Dict, category: str) -> Dict:
+    """
+    Keeps only the fields declared for `category`, capped to their maximum length, and drops
+    empty cells. Categories without a projection, and records that match none of the declared
+    fields (a renamed CSV column), are passed through unchanged rather than emptied.
+    """
+    fields = PROJECTIONS.get(category)
+    if not FIELD_PROJECTION_ENABLED or not fields or not record:
+        return record
+    projected = {
+        field: _clip(record[field], max_chars)
+        for field, max_chars in fields
+        if field in record and not _is_empty(record[field])
+    }
+    if not projected:
+        logger.warning(f"Projection: No declared fields found in a '{category}' record; returning it unprojected.")
+        return record
+    return projected
+
+
+def project_records(records: Sequence[Dict], category: str) -> List[Dict]:
+    return [project_record(record, category) for record in records]
+
+
+def compact_json(data: Any) -> str:
+    """Whitespace-free JSON for prompts; indentation is billed as input tokens and adds nothing for the model."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
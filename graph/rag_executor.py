@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+RAG_MAX_WORKERS = int(os.getenv("RAG_MAX_WORKERS", "4"))  # Retrievals running at once; the rest queue
+RAG_QUERY_TIMEOUT_S = float(os.getenv("RAG_QUERY_TIMEOUT_S", "5.0"))  # Per-call budget before falling back
+RAG_ENCODE_PROCESSES = int(os.getenv("RAG_ENCODE_PROCESSES", "0"))  # >0 moves query encoding into a process pool
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_rag_thread_pool() -> ThreadPoolExecutor:
+    """Dedicated, size-limited pool for retrieval so it never competes with the default executor."""
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=RAG_MAX_WORKERS, thread_name_prefix="rag")
+        return _thread_pool
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if RAG_ENCODE_PROCESSES <= 0:
+        return None
+    with _pool_lock:
+        if _process_pool is None:
+            # Spawn rather than fork: the server process already runs threads (event loop, RAG pool).
+            _process_pool = ProcessPoolExecutor(
+                max_workers=RAG_ENCODE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def _encode_in_worker(model_name: str, texts: List[str]) -> List[List[float]]:
+    # Runs inside a pool process; each process loads the model once.
+    from embedding_models import get_embedding_model
+    return get_embedding_model(model_name).encode(texts, convert_to_numpy=True).tolist()
+
+
+def make_encoder(embedding_function: Callable[[List[str]], Any], model_name: str) -> Callable[[List[str]], Any]:
+    """
+    Returns the callable used to encode query texts. With RAG_ENCODE_PROCESSES > 0 the
+    forward pass runs in a separate process, so the GIL-heavy parts of encoding don't
+    slow down the event loop's thread; otherwise the in-process embedding function is used.
+    """
+    process_pool = _get_process_pool()
+    if process_pool is None:
+        return embedding_function
+    return lambda texts: process_pool.submit(_encode_in_worker, model_name, list(texts)).result()
+
+
+async def run_retrieval(
+    fn: Callable[..., Any],
+    *args: Any,
+    timeout: float = RAG_QUERY_TIMEOUT_S,
+    fallback: Any = None,
+    label: str = "retrieval",
+    **kwargs: Any,
+) -> Any:
+    """
+    Runs a blocking retrieval call on the RAG pool and awaits it with a timeout.
+    On timeout `fallback` is returned (the worker finishes in the background), so a slow
+    encode or search never holds up the caller's stream or any other session.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_rag_thread_pool(), functools.partial(fn, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"RAGExecutor: {label} exceeded {timeout:.1f}s; returning the fallback result.")
+        return fallback
+
+
+def shutdown_rag_executors() -> None:
+    global _thread_pool, _process_pool
+    with _pool_lock:
+        if _thread_pool is not None:
+            _thread_pool.shutdown(wait=False, cancel_futures=True)
+            _thread_pool = None
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
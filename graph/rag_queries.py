@@ -0,0 +1,97 @@
+from typing import Callable, Dict, Mapping
+
+# Query templates for each RAG node. They live here rather than inside the nodes so the
+# retrieval benchmark (bench/retrieval) replays exactly the strings the service embeds.
+
+# Columns from the state to construct the modelling query for embedding
+MODELLING_QUERY_COLUMNS = [
+    "example_prompt_text",
+    "student_goal_context",
+    "student_confidence_context",
+    "teacher_initial_impression",
+    "student_struggle_context"
+]
+
+# Student-profile columns whose values form the pedagogy profile text, both when the
+# profiles are embedded (scripts/ingest_pedagogy_profiles.py) and when they are queried.
+PEDAGOGY_PROFILE_COLUMNS = [
+    "Goal",
+    "Feeling",
+    "Confidence",
+    "Estimated Overall English Comfort Level",
+    "Initial Impression",
+    "Speaking Strengths",
+    "Fluency",
+    "Grammar",
+    "Vocabulary",
+]
+
+
+def _join(query_parts, separator: str = " \n ") -> str:
+    return separator.join(filter(None, query_parts)).strip()
+
+
+def teaching_query(state: Mapping) -> str:
+    # For teaching, the objective is key.
+    return _join([
+        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
+        f"Student Proficiency: {state.get('STUDENT_PROFICIENCY', '')}",
+        f"Student Affective State: {state.get('STUDENT_AFFECTIVE_STATE', '')}",
+        f"Key concepts to explain: {state.get('LESSON_FOR_STUDENT', '')}",
+    ])
+
+
+def cowriting_query(state: Mapping) -> str:
+    return _join([
+        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
+        f"Student's written text: {state.get('Student_Written_Input_Chunk', '')}",
+        f"Assessed issue with the text: {state.get('Immediate_Assessment_of_Input', '')}",
+        f"Student's stated thought process: {state.get('Student_Articulated_Thought', '')}",
+    ])
+
+
+def feedback_query(state: Mapping) -> str:
+    # Query for feedback should focus on the error and the student's emotional state
+    return _join([
+        f"Student Error Type: {state.get('diagnosed_error_type', '')}",
+        f"Student Affective State: {state.get('Student_Affective_State', '')}",
+        f"Student Proficiency: {state.get('Student_Comfort_Level', '')}",
+        f"Learning Objective: {state.get('Learning_Objective_Focus', '')}",
+    ])
+
+
+def scaffolding_query(state: Mapping) -> str:
+    # The query for scaffolding should be highly focused on the specific problem
+    return _join([
+        f"Learning Task: {state.get('Learning_Objective_Task', '')}",
+        f"Specific Struggle Point: {state.get('Specific_Struggle_Point', '')}",
+        f"Student English Level: {state.get('English_Comfort_Level', '')}",
+        f"Student Attitude: {state.get('Student_Attitude_Context', '')}",
+    ])
+
+
+def pedagogy_query(state: Mapping) -> str:
+    return _join([
+        f"Current learning objective: {state.get('Learning_Objective_Focus', 'Not specified')}",
+        f"Recent student transcript: {state.get('transcript', '')}",
+        f"Current student model summary: {(state.get('student_model') or {}).get('summary', 'No summary available.')}"
+    ])
+
+
+def modelling_query(state: Mapping) -> str:
+    return _join([str(state.get(key, "")) for key in MODELLING_QUERY_COLUMNS], separator=" \n\n ")
+
+
+# Knowledge base category -> query template used by that category's RAG node.
+QUERY_BUILDERS: Dict[str, Callable[[Mapping], str]] = {
+    "teaching": teaching_query,
+    "cowriting": cowriting_query,
+    "feedback": feedback_query,
+    "scaffolding": scaffolding_query,
+    "pedagogy": pedagogy_query,
+    "modelling": modelling_query,
+}
+
+
+def pedagogy_profile_query(values: Mapping) -> str:
+    return " ".join(str(values[column]) for column in PEDAGOGY_PROFILE_COLUMNS)
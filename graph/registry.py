@@ -0,0 +1,60 @@
+import logging
+import os
+import threading
+from typing import Dict
+
+import chromadb
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from embedding_models import get_embedding_model, loaded_models
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One client per database path for the whole process (models are shared via embedding_models).
+_clients: Dict[str, "chromadb.ClientAPI"] = {}
+_embedding_functions: Dict[str, "SharedSentenceTransformerEmbeddingFunction"] = {}
+_lock = threading.RLock()
+
+
+def resolve_db_path(path: str) -> str:
+    """Resolves a DB path relative to the project root, so the working directory never matters."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def get_chroma_client(path: str) -> "chromadb.ClientAPI":
+    """Returns the process-wide persistent Chroma client for `path`, opening it on first use."""
+    db_path = os.path.normpath(resolve_db_path(path))
+    with _lock:
+        client = _clients.get(db_path)
+        if client is None:
+            logger.info(f"Registry: Opening Chroma client at {db_path}")
+            client = chromadb.PersistentClient(path=db_path)
+            _clients[db_path] = client
+        return client
+
+
+class SharedSentenceTransformerEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function backed by the registry's shared model instead of its own copy."""
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def __call__(self, input: Documents) -> Embeddings:
+        model = get_embedding_model(self.model_name)
+        return model.encode(list(input), convert_to_numpy=True).tolist()
+
+
+def get_embedding_function(model_name: str) -> SharedSentenceTransformerEmbeddingFunction:
+    with _lock:
+        function = _embedding_functions.get(model_name)
+        if function is None:
+            function = SharedSentenceTransformerEmbeddingFunction(model_name)
+            _embedding_functions[model_name] = function
+        return function
+
+
+def get_collection(path: str, name: str, model_name: str):
+    """Opens `name` on the shared client for `path`, embedding with the shared model."""
+    return get_chroma_client(path).get_collection(name=name, embedding_function=get_embedding_function(model_name))
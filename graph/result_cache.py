@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "1024"))  # Cached (category, query) results
+RESULT_CACHE_TTL_S = float(os.getenv("RAG_RESULT_CACHE_TTL_S", "3600"))  # Safety net on top of version invalidation
+KB_VERSION_FILE = "kb_version.json"  # Written next to the Chroma DB by scripts/ingest.py
+VERSION_CHECK_INTERVAL_S = 5.0  # How often the stamp file is re-read
+
+
+def query_hash(query_string: str) -> str:
+    return hashlib.sha1(normalize_query(query_string).encode("utf-8")).hexdigest()
+
+
+class KnowledgeBaseVersion:
+    """
+    Tracks the version stamp written by scripts/ingest.py. When it changes, the registered
+    callbacks run (result cache cleared, in-memory index rebuilt on next use).
+    """
+    def __init__(self, db_path: str):
+        self.path = os.path.join(db_path, KB_VERSION_FILE)
+        self._version = ""
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._on_change: List[Callable[[str, str], None]] = []
+
+    def on_change(self, callback: Callable[[str, str], None]) -> None:
+        self._on_change.append(callback)
+
+    def current(self) -> str:
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_CHECK_INTERVAL_S:
+            return self._version
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return self._version  # No stamp yet (KB ingested before stamps existed)
+            if mtime == self._mtime:
+                return self._version
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    version = str(json.load(f).get("version", ""))
+            except (OSError, ValueError) as e:
+                logger.warning(f"ResultCache: Could not read KB version stamp at {self.path}: {e}")
+                return self._version
+            previous, self._version, self._mtime = self._version, version, mtime
+
+        # "No stamp" -> a stamp is a change too: the KB was re-ingested after the service started.
+        if version != previous:
+            logger.info(f"ResultCache: Knowledge base version changed ({previous} -> {version}); invalidating.")
+            for callback in self._on_change:
+                callback(previous, version)
+        return version
+
+
+class ResultCache:
+    """LRU + TTL cache of retrieval results keyed by (category, query hash, top-k, KB version)."""
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl_s: float = RESULT_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Tuple[str, str, int, str], Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(category: str, query_string: str, top_k: int, version: str) -> Tuple[str, str, int, str]:
+        return (category, query_hash(query_string), top_k, version)
+
+    def get(self, key: Tuple[str, str, int, str]) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: Tuple[str, str, int, str], results: List[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+retrieval_result_cache = ResultCache()
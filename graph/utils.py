@@ -1,10 +1,19 @@
 # FINAL, ROBUST graph/utils.py
 
+import asyncio
 import logging
 import chromadb
-from chromadb.utils import embedding_functions
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import embed_query, query_embedding_cache
+from .rag_executor import get_rag_thread_pool, make_encoder, run_retrieval, RAG_QUERY_TIMEOUT_S
+from .registry import get_chroma_client, get_embedding_function, resolve_db_path
+from .result_cache import KnowledgeBaseVersion, ResultCache, retrieval_result_cache
+from .lexical_index import get_lexical_index, reciprocal_rank_fusion, reset_lexical_index
+from .projections import project_records
+from .vector_index import get_vector_index, reset_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +22,26 @@ DB_DIRECTORY = "chroma_db"
 COLLECTION_NAME = "tutor_knowledge_base"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 TOP_K_RESULTS = 3
+HYBRID_CANDIDATE_FACTOR = 4  # Candidates taken from each ranking per requested result before fusion
+HYBRID_MIN_CANDIDATES = 20
 
 # --- Global variables to hold the client and collection ---
 # We still want to reuse the connection if it's already established.
 _client: Optional[chromadb.Client] = None
 _collection: Optional[chromadb.Collection] = None
+_embedding_function = None
+_query_batcher: Optional[EmbeddingBatcher] = None
+_kb_version = KnowledgeBaseVersion(resolve_db_path(DB_DIRECTORY))
+
+def _on_kb_version_change(previous: str, current: str) -> None:
+    global _collection
+    # Results and the in-memory index describe the old data; the collection handle is reopened.
+    retrieval_result_cache.clear()
+    reset_vector_index()
+    reset_lexical_index()
+    _collection = None
+
+_kb_version.on_change(_on_kb_version_change)
 
 def get_chroma_collection() -> Optional[chromadb.Collection]:
     """
@@ -25,7 +49,7 @@ def get_chroma_collection() -> Optional[chromadb.Collection]:
     Uses a singleton pattern to avoid reconnecting on every call.
     This is more resilient than initializing at the top level.
     """
-    global _client, _collection
+    global _client, _collection, _embedding_function
 
     # If the connection already exists, just return it.
     if _collection is not None:
@@ -34,23 +58,21 @@ def get_chroma_collection() -> Optional[chromadb.Collection]:
     # If it doesn't exist, try to create it.
     try:
         logger.info("Attempting to initialize ChromaDB connection...")
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        db_path = os.path.join(project_root, DB_DIRECTORY)
+        db_path = resolve_db_path(DB_DIRECTORY)
         
         if not os.path.exists(db_path):
             logger.error(f"ChromaDB directory not found at: {db_path}. Please run the ingestion script.")
             return None
 
-        _client = chromadb.PersistentClient(path=db_path)
-        
-        sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=EMBEDDING_MODEL
-        )
+        # The client and the embedding model are shared process-wide through the registry.
+        _client = get_chroma_client(db_path)
+        sentence_transformer_ef = get_embedding_function(EMBEDDING_MODEL)
         
         _collection = _client.get_collection(
             name=COLLECTION_NAME,
             embedding_function=sentence_transformer_ef
         )
+        _embedding_function = sentence_transformer_ef
         logger.info(f"ChromaDB connection successful. Collection '{COLLECTION_NAME}' loaded.")
         return _collection
 
@@ -59,33 +81,151 @@ def get_chroma_collection() -> Optional[chromadb.Collection]:
         # Ensure they are reset to None on failure
         _client = None
         _collection = None
+        _embedding_function = None
         return None
 
-async def query_knowledge_base(query_string: str, category: str) -> List[Dict]:
+def warm_up_knowledge_base() -> None:
     """
-    A shared utility function to query the ChromaDB vector store.
+    Opens the collection and builds the in-memory vector index ahead of the first request.
+    Meant to be called once at application startup.
+    """
+    # Read the version stamp first, so the index built below is not treated as stale later.
+    _kb_version.current()
+    collection = get_chroma_collection()
+    if collection is None:
+        return
+    index = get_vector_index(collection)
+    # Load the sentence-transformer now rather than on the first student query.
+    embed_query("warm-up", _embedding_function, EMBEDDING_MODEL)
+    if index is not None:
+        logger.info(f"Knowledge base warm-up complete ({index.backend} index, {index.size()} documents).")
+
+def _get_query_batcher() -> EmbeddingBatcher:
+    global _query_batcher
+    if _query_batcher is None:
+        _query_batcher = EmbeddingBatcher(
+            encode_provider=lambda: make_encoder(_embedding_function, EMBEDDING_MODEL),
+            executor=get_rag_thread_pool(),
+        )
+    return _query_batcher
+
+def get_query_batcher_stats() -> Dict:
+    return _query_batcher.stats() if _query_batcher is not None else {}
+
+async def embed_query_text(query_string: str) -> Optional[List[float]]:
+    """
+    Embeds a RAG query: served from the embedding cache when possible, otherwise
+    micro-batched with the other queries arriving at the same moment.
+    Returns None if the model is unavailable or encoding exceeds RAG_QUERY_TIMEOUT_S.
+    """
+    cached = query_embedding_cache.lookup(query_string, EMBEDDING_MODEL)
+    if cached is not None:
+        return cached
+    if get_chroma_collection() is None:
+        return None
+    try:
+        vector = await asyncio.wait_for(_get_query_batcher().embed(query_string), timeout=RAG_QUERY_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.warning(f"Query embedding exceeded {RAG_QUERY_TIMEOUT_S:.1f}s; skipping retrieval.")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to embed RAG query: {e}", exc_info=True)
+        return None
+    query_embedding_cache.store(query_string, EMBEDDING_MODEL, vector)
+    return vector
+
+def _vector_candidates(collection, query_embedding: List[float], category: str, top_k: int) -> List[Tuple[str, Dict]]:
+    """(id, metadata) of the nearest documents, best first."""
+    # Search the in-memory copy when available; Chroma stays the source of truth.
+    index = get_vector_index(collection)
+    if index is not None:
+        return index.search_with_ids(query_embedding, category, top_k)
+
+    query_results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=top_k,
+        where={"category": category}
+    )
+    return list(zip(query_results.get('ids', [[]])[0], query_results.get('metadatas', [[]])[0]))
+
+def _fetch_metadatas(collection, category: str, record_ids: List[str]) -> Dict[str, Dict]:
+    index = get_vector_index(collection)
+    if index is not None:
+        found = {record_id: index.get_metadata(category, record_id) for record_id in record_ids}
+        return {record_id: metadata for record_id, metadata in found.items() if metadata is not None}
+    records = collection.get(ids=record_ids, include=["metadatas"])
+    return dict(zip(records.get("ids", []), records.get("metadatas", [])))
+
+def _search_knowledge_base(query_embedding: List[float], category: str, top_k: int, query_string: str = "") -> List[Dict]:
+    """
+    Blocking part of a knowledge-base query; runs on the RAG executor. When an ingest-time
+    lexical index exists, vector and BM25 rankings are fused with reciprocal rank fusion so
+    exact terms (objective IDs, error categories, task names) are not missed.
     """
-    # Get the collection using our new, resilient function.
     collection = get_chroma_collection()
-    
     if not collection:
         logger.error("Cannot perform RAG because ChromaDB collection is not available.")
         return []
 
     try:
-        logger.info(f"Querying KB for category '{category}' with query: '{query_string[:100]}...'")
-        
-        query_results = collection.query(
-            query_texts=[query_string],
-            n_results=TOP_K_RESULTS,
-            where={"category": category}
+        lexical_index = get_lexical_index(resolve_db_path(DB_DIRECTORY)) if query_string else None
+        if lexical_index is None:
+            retrieved_documents = [metadata for _, metadata in _vector_candidates(collection, query_embedding, category, top_k)]
+            logger.info(f"Query successful. Retrieved {len(retrieved_documents)} documents for category '{category}'.")
+            return retrieved_documents
+
+        candidates = max(top_k * HYBRID_CANDIDATE_FACTOR, HYBRID_MIN_CANDIDATES)
+        vector_hits = _vector_candidates(collection, query_embedding, category, candidates)
+        lexical_ids = lexical_index.search(query_string, category, candidates)
+        fused_ids = reciprocal_rank_fusion([[record_id for record_id, _ in vector_hits], lexical_ids])[:top_k]
+
+        metadatas = dict(vector_hits)
+        missing = [record_id for record_id in fused_ids if record_id not in metadatas]
+        if missing:
+            metadatas.update(_fetch_metadatas(collection, category, missing))
+        retrieved_documents = [metadatas[record_id] for record_id in fused_ids if record_id in metadatas]
+        logger.info(
+            f"Query successful. Retrieved {len(retrieved_documents)} documents for category '{category}' "
+            f"(hybrid: {len(vector_hits)} vector / {len(lexical_ids)} lexical candidates)."
         )
-        
-        retrieved_documents = query_results.get('metadatas', [[]])[0]
-        
-        logger.info(f"Query successful. Retrieved {len(retrieved_documents)} documents for category '{category}'.")
         return retrieved_documents
 
     except Exception as e:
         logger.error(f"An error occurred during knowledge base query for category '{category}': {e}", exc_info=True)
-        return []
\ No newline at end of file
+        return []
+
+async def query_knowledge_base(query_string: str, category: str, top_k: int = TOP_K_RESULTS) -> List[Dict]:
+    """
+    A shared utility function to query the ChromaDB vector store.
+    Each result is projected to the fields its category's generator uses (graph/projections.py).
+    Results are cached per (category, query, top_k, KB version) until the knowledge base is
+    re-ingested. On a miss the query is embedded through the shared cache and micro-batcher,
+    and the search runs on the bounded RAG executor, never on the event loop; if either
+    exceeds RAG_QUERY_TIMEOUT_S an empty result is returned instead.
+    """
+    cache_key = ResultCache.make_key(category, query_string, top_k, _kb_version.current())
+    cached = retrieval_result_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Query served from the result cache for category '{category}' ({len(cached)} documents).")
+        return cached
+
+    logger.info(f"Querying KB for category '{category}' with query: '{query_string[:100]}...'")
+    query_embedding = await embed_query_text(query_string)
+    if query_embedding is None:
+        return []
+
+    retrieved_documents = await run_retrieval(
+        _search_knowledge_base,
+        query_embedding,
+        category,
+        top_k,
+        query_string,
+        fallback=[],
+        label=f"knowledge base query for category '{category}'",
+    )
+    # Only the fields the category's generator reads are kept; the cache stores the projected rows.
+    retrieved_documents = project_records(retrieved_documents, category)
+    # Empty results may be a timeout or a transient failure; only real hits are cached.
+    if retrieved_documents:
+        retrieval_result_cache.put(cache_key, retrieved_documents)
+    return retrieved_documents
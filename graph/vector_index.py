@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+INDEX_BACKEND = os.getenv("RAG_INDEX_BACKEND", "numpy").lower()  # "numpy", "faiss", "int8", "float16" or "chroma" (no index)
+LOAD_PAGE_SIZE = 1000  # Records read from Chroma per `collection.get` page while building the index
+RESCORE_FACTOR = 10  # Quantized backends re-score this many candidates per requested result exactly
+SCORE_CHUNK_ROWS = 8192  # Rows dequantized at a time, bounding the temporary float32 buffer
+RESCORE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "vector_index")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row so a dot product equals cosine similarity (the collection's metric)."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """
+    Read-only, in-memory copy of the knowledge base, partitioned by category.
+    Chroma remains the source of truth; an index is built from it once and searched
+    without going through Chroma's per-query machinery.
+    """
+    backend = "base"
+
+    def __init__(self):
+        self._metadatas: Dict[str, List[Dict]] = {}
+        self._ids: Dict[str, List[str]] = {}
+        self._rows_by_id: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._metadatas)
+
+    def size(self, category: Optional[str] = None) -> int:
+        if category is not None:
+            return len(self._metadatas.get(category, []))
+        return sum(len(m) for m in self._metadatas.values())
+
+    def add_partition(self, category: str, embeddings: np.ndarray, metadatas: List[Dict], ids: Optional[List[str]] = None) -> None:
+        raise NotImplementedError
+
+    def _set_records(self, category: str, metadatas: List[Dict], ids: Optional[List[str]]) -> None:
+        self._metadatas[category] = list(metadatas)
+        self._ids[category] = list(ids) if ids is not None else [str(i) for i in range(len(metadatas))]
+        self._rows_by_id[category] = {record_id: row for row, record_id in enumerate(self._ids[category])}
+
+    def memory_bytes(self) -> int:
+        """Resident bytes used by the vectors (metadata excluded)."""
+        return 0
+
+    def get_metadata(self, category: str, record_id: str) -> Optional[Dict]:
+        row = self._rows_by_id.get(category, {}).get(record_id)
+        return self._metadatas[category][row] if row is not None else None
+
+    def _top_k(self, category: str, query: np.ndarray, top_k: int):
+        """Returns (row indices, scores) of the best matches, best first."""
+        raise NotImplementedError
+
+    def search_with_ids(self, query_embedding: Sequence[float], category: str, top_k: int) -> List[Tuple[str, Dict]]:
+        """Returns (id, metadata) of the `top_k` nearest documents within `category`, best first."""
+        metadatas = self._metadatas.get(category)
+        if not metadatas or top_k <= 0:
+            return []
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        indices, _ = self._top_k(category, query, min(top_k, len(metadatas)))
+        ids = self._ids[category]
+        return [(ids[i], metadatas[i]) for i in indices]
+
+    def search(self, query_embedding: Sequence[float], category: str, top_k: int) -> List[Dict]:
+        """Returns the metadatas of the `top_k` nearest documents within `category`."""
+        return [metadata for _, metadata in self.search_with_ids(query_embedding, category, top_k)]
+
+
+class NumpyVectorIndex(VectorIndex):
+    """Exact search: one contiguous float32 matrix per category, a matmul and an argpartition."""
+    backend = "numpy"
+
+    def __init__(self):
+        super().__init__()
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    def add_partition(self, category: str, embeddings: np.ndarray, metadatas: List[Dict], ids: Optional[List[str]] = None) -> None:
+        self._matrices[category] = normalize_rows(embeddings)
+        self._set_records(category, metadatas, ids)
+
+    def memory_bytes(self) -> int:
+        return sum(m.nbytes for m in self._matrices.values())
+
+    def _top_k(self, category: str, query: np.ndarray, top_k: int):
+        scores = self._matrices[category] @ query
+        return _top_k_from_scores(scores, top_k)
+
+
+def _top_k_from_scores(scores: np.ndarray, top_k: int):
+    if top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates])]
+    return order.tolist(), scores[order]
+
+
+class QuantizedVectorIndex(VectorIndex):
+    """
+    Memory-lean search: vectors are kept in RAM as float16 or as int8 with a per-row scale
+    (4x smaller than float32). The approximate scores select RESCORE_FACTOR * top_k
+    candidates, which are then re-scored exactly against the float32 vectors stored in a
+    memory-mapped .npy file, so only the pages of those few rows are read.
+    """
+    def __init__(self, dtype: str = "int8", rescore_directory: str = RESCORE_DIRECTORY):
+        super().__init__()
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported quantization dtype: {dtype}")
+        self.backend = dtype
+        self.rescore_directory = rescore_directory
+        self._codes: Dict[str, np.ndarray] = {}
+        self._scales: Dict[str, np.ndarray] = {}
+        self._exact: Dict[str, np.ndarray] = {}
+
+    def add_partition(self, category: str, embeddings: np.ndarray, metadatas: List[Dict], ids: Optional[List[str]] = None) -> None:
+        matrix = normalize_rows(embeddings)
+        if self.backend == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._codes[category] = np.round(matrix / scales[:, None]).astype(np.int8)
+            self._scales[category] = scales.astype(np.float32)
+        else:
+            self._codes[category] = matrix.astype(np.float16)
+
+        # Exact vectors live on disk; the OS pages in only the rows that get re-scored.
+        os.makedirs(self.rescore_directory, exist_ok=True)
+        path = os.path.join(self.rescore_directory, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', category) or '_'}.npy")
+        tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"  # Several workers may build at once
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, path)
+        self._exact[category] = np.load(path, mmap_mode="r")
+        self._set_records(category, metadatas, ids)
+
+    def memory_bytes(self) -> int:
+        return sum(c.nbytes for c in self._codes.values()) + sum(s.nbytes for s in self._scales.values())
+
+    def _approximate_scores(self, category: str, query: np.ndarray) -> np.ndarray:
+        codes = self._codes[category]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK_ROWS):
+            chunk = codes[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+            scores[start:start + len(chunk)] = chunk @ query
+        if self.backend == "int8":
+            scores *= self._scales[category]
+        return scores
+
+    def _top_k(self, category: str, query: np.ndarray, top_k: int):
+        approximate = self._approximate_scores(category, query)
+        candidates, _ = _top_k_from_scores(approximate, min(len(approximate), top_k * RESCORE_FACTOR))
+        candidates = np.sort(np.asarray(candidates))  # Sequential reads from the memory map
+        exact = np.asarray(self._exact[category][candidates], dtype=np.float32) @ query
+        order, scores = _top_k_from_scores(exact, top_k)
+        return candidates[order].tolist(), scores
+
+
+class FaissVectorIndex(VectorIndex):
+    """Exact inner-product search with FAISS (faiss-cpu), one flat index per category."""
+    backend = "faiss"
+
+    def __init__(self):
+        super().__init__()
+        import faiss  # Optional dependency; only needed for this backend
+        self._faiss = faiss
+        self._indexes: Dict[str, object] = {}
+
+    def memory_bytes(self) -> int:
+        return sum(index.ntotal * index.d * 4 for index in self._indexes.values())
+
+    def add_partition(self, category: str, embeddings: np.ndarray, metadatas: List[Dict], ids: Optional[List[str]] = None) -> None:
+        matrix = normalize_rows(embeddings)
+        index = self._faiss.IndexFlatIP(matrix.shape[1])
+        index.add(matrix)
+        self._indexes[category] = index
+        self._set_records(category, metadatas, ids)
+
+    def _top_k(self, category: str, query: np.ndarray, top_k: int):
+        scores, indices = self._indexes[category].search(query.reshape(1, -1), top_k)
+        valid = indices[0] >= 0
+        return indices[0][valid].tolist(), scores[0][valid]
+
+
+def create_index(backend: str = INDEX_BACKEND) -> VectorIndex:
+    if backend in ("int8", "float16"):
+        return QuantizedVectorIndex(backend)
+    if backend == "faiss":
+        try:
+            return FaissVectorIndex()
+        except ImportError:
+            logger.warning("VectorIndex: faiss is not installed; falling back to the NumPy backend.")
+    return NumpyVectorIndex()
+
+
+def build_index_from_collection(collection, backend: str = INDEX_BACKEND) -> VectorIndex:
+    """Reads every record (embedding + metadata) from a Chroma collection and partitions it by category."""
+    start_time = time.time()
+    embeddings_by_category: Dict[str, List] = {}
+    metadatas_by_category: Dict[str, List[Dict]] = {}
+    ids_by_category: Dict[str, List[str]] = {}
+
+    offset = 0
+    while True:
+        page = collection.get(include=["embeddings", "metadatas"], limit=LOAD_PAGE_SIZE, offset=offset)
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        for record_id, embedding, metadata in zip(ids, page["embeddings"], page["metadatas"]):
+            category = (metadata or {}).get("category", "")
+            embeddings_by_category.setdefault(category, []).append(embedding)
+            metadatas_by_category.setdefault(category, []).append(metadata)
+            ids_by_category.setdefault(category, []).append(record_id)
+        offset += len(ids)
+
+    index = create_index(backend)
+    for category, embeddings in embeddings_by_category.items():
+        index.add_partition(
+            category, np.asarray(embeddings, dtype=np.float32), metadatas_by_category[category], ids_by_category[category]
+        )
+
+    logger.info(
+        f"VectorIndex: Built {index.backend} index with {index.size()} documents across "
+        f"{len(index.categories)} categories in {time.time() - start_time:.2f}s."
+    )
+    return index
+
+
+# --- Process-wide index, built lazily from the shared Chroma collection ---
+_index: Optional[VectorIndex] = None
+_index_failed = False  # Set after a failed build so queries don't retry it on every call
+_index_lock = threading.Lock()
+
+
+def get_vector_index(collection=None) -> Optional[VectorIndex]:
+    """
+    Returns the shared index, building it from `collection` on first use.
+    Returns None when the index is disabled (RAG_INDEX_BACKEND=chroma) or cannot be built,
+    in which case callers query Chroma directly.
+    """
+    global _index, _index_failed
+    if _index is not None or _index_failed or INDEX_BACKEND == "chroma":
+        return _index
+    with _index_lock:
+        if _index is None and not _index_failed and collection is not None:
+            try:
+                _index = build_index_from_collection(collection)
+            except Exception as e:
+                logger.error(f"VectorIndex: Failed to build the in-memory index, using Chroma queries: {e}", exc_info=True)
+                _index_failed = True
+    return _index
+
+
+def reset_vector_index() -> None:
+    """Drops the shared index so the next query rebuilds it (e.g. after re-ingestion)."""
+    global _index, _index_failed
+    with _index_lock:
+        _index = None
+        _index_failed = False
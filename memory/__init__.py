@@ -1,4 +1,8 @@
 from .mem0_memory import StudentProfileMemory, Mem0Checkpointer
+from .retrieval import get_relevant_interactions, format_interactions_for_prompt
+from .student_summary import student_summary_manager
+from .student_context import StudentContext, get_student_context
+from .tiering import archive_cold_interactions, query_archive
 import logging
 
 # Global instance of the Mem0Memory client.
@@ -28,4 +32,16 @@ def initialize_memory():
     logger.info(f"--- [initialize_memory] memory_stub after init: {type(memory_stub)} ---")
     logger.info("--- [initialize_memory] END ---")
 
-__all__ = ["memory_stub", "StudentProfileMemory", "Mem0Checkpointer", "initialize_memory"]
\ No newline at end of file
+__all__ = [
+    "memory_stub",
+    "StudentProfileMemory",
+    "Mem0Checkpointer",
+    "initialize_memory",
+    "get_relevant_interactions",
+    "format_interactions_for_prompt",
+    "StudentContext",
+    "get_student_context",
+    "student_summary_manager",
+    "archive_cold_interactions",
+    "query_archive",
+]
\ No newline at end of file
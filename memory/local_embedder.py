@@ -0,0 +1,76 @@
+import logging
+import threading
+from typing import List, Optional
+
+from embedding_models import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+LOCAL_EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Same model the RAG knowledge base is embedded with
+LOCAL_EMBEDDING_DIMS = 384
+EMBED_MAX_BATCH = 64  # Upper bound on texts encoded in one forward pass
+
+
+class _PendingText:
+    __slots__ = ("text", "vector")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.vector: Optional[List[float]] = None
+
+
+class LocalSentenceTransformerEmbedding:
+    """
+    Mem0-compatible embedder (exposes `embed(text, memory_action=None)`) backed by the
+    locally loaded sentence-transformer.
+
+    Mem0 embeds one text per call, often from several threads at once. Concurrent calls
+    are coalesced: whichever caller holds the encode lock encodes every text queued so far
+    (up to EMBED_MAX_BATCH) in one forward pass, and the others pick up their vectors.
+    """
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL):
+        self.model_name = model_name
+        # Same instance the RAG path uses when the model names match.
+        self.model = get_embedding_model(model_name)
+        self._queue: List[_PendingText] = []
+        self._queue_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+
+    def embed(self, text: str, memory_action: Optional[str] = None) -> List[float]:
+        pending = _PendingText(text)
+        with self._queue_lock:
+            self._queue.append(pending)
+
+        try:
+            while pending.vector is None:
+                with self._encode_lock:
+                    if pending.vector is not None:
+                        break
+                    with self._queue_lock:
+                        batch = self._queue[:EMBED_MAX_BATCH]
+                        del self._queue[:EMBED_MAX_BATCH]
+                    if batch:
+                        self._encode_batch(batch)
+        except Exception:
+            with self._queue_lock:
+                if pending in self._queue:
+                    self._queue.remove(pending)
+            raise
+        return pending.vector
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Encodes many texts directly, e.g. for migrations."""
+        vectors = self.model.encode(texts, batch_size=EMBED_MAX_BATCH, convert_to_numpy=True)
+        return [vector.tolist() for vector in vectors]
+
+    def _encode_batch(self, batch: List[_PendingText]) -> None:
+        try:
+            vectors = self.model.encode([p.text for p in batch], batch_size=EMBED_MAX_BATCH, convert_to_numpy=True)
+        except Exception:
+            # Hand the texts back so their callers can retry (and surface the error).
+            with self._queue_lock:
+                self._queue[:0] = batch
+            raise
+        for pending, vector in zip(batch, vectors):
+            pending.vector = vector.tolist()
@@ -1,10 +1,13 @@
 import os
 import threading
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Callable
 from mem0 import Memory
 from dotenv import load_dotenv
 import logging
 
+from .local_embedder import LocalSentenceTransformerEmbedding, LOCAL_EMBEDDING_MODEL, LOCAL_EMBEDDING_DIMS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,6 +15,88 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
+# --- Bulk delete configuration ---
+DELETE_MAX_WORKERS = 8  # Concurrent delete calls per user
+DELETE_BATCH_SIZE = 100  # Deletes submitted per batch (progress is reported per batch)
+
+# --- Embedder configuration ---
+# MEM0_EMBEDDER=local runs Mem0's embeddings on the same sentence-transformer we use for
+# RAG instead of a network call per memory. Each embedder writes to its own collection
+# because the vector dimensions differ (and its own local Qdrant path, since a path can
+# only be opened by one client per process); see scripts/migrate_mem0_embeddings.py to
+# move existing memories across.
+#
+# The original config put the embedder under an `embedding` key, which Mem0 ignores, so
+# memories written before this change sit in Mem0's default store ('mem0' collection at
+# VECTOR_STORE_PATH) with Mem0's default embedder's vectors, not Gemini's. The Gemini
+# embedder therefore gets a new collection rather than reusing that one (the dimensions
+# differ); `migrate_mem0_embeddings.py --from legacy` copies the old memories over.
+DEFAULT_EMBEDDER = "gemini"
+VECTOR_STORE_PATH = os.getenv("MEM0_VECTOR_STORE_PATH", "/tmp/qdrant")
+LEGACY_STORE = {"collection_name": "mem0", "path": VECTOR_STORE_PATH}
+EMBEDDER_SETTINGS = {
+    "gemini": {"collection_name": "mem0_gemini_004", "dims": 768, "path": f"{VECTOR_STORE_PATH}_gemini_004"},
+    "local": {"collection_name": "mem0_local_minilm", "dims": LOCAL_EMBEDDING_DIMS, "path": f"{VECTOR_STORE_PATH}_local_minilm"},
+}
+
+def build_mem0_config(embedder_provider: str = DEFAULT_EMBEDDER) -> Dict[str, Any]:
+    """Builds the Mem0 config for the given embedder ('gemini' or 'local')."""
+    if embedder_provider not in EMBEDDER_SETTINGS:
+        raise ValueError(f"Unknown MEM0_EMBEDDER '{embedder_provider}'. Expected one of: {list(EMBEDDER_SETTINGS)}")
+
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    if not google_api_key:
+        logger.error("GOOGLE_API_KEY not found in environment variables.")
+        raise ValueError("GOOGLE_API_KEY is required for Google AI provider.")
+
+    settings = EMBEDDER_SETTINGS[embedder_provider]
+    if embedder_provider == "local":
+        embedder = {
+            "provider": "huggingface",
+            "config": {
+                "model": os.getenv("MEM0_LOCAL_EMBEDDING_MODEL", LOCAL_EMBEDDING_MODEL),
+                "embedding_dims": settings["dims"],
+            }
+        }
+    else:
+        embedder = {
+            "provider": "gemini",
+            "config": {
+                "model": "text-embedding-004",
+                "api_key": google_api_key,
+                "embedding_dims": settings["dims"],
+            }
+        }
+
+    return {
+        "llm": {
+            "provider": "gemini",
+            "config": {
+                "model": "gemini-1.5-flash",
+                "api_key": google_api_key,
+                "temperature": 0.7,
+            }
+        },
+        "embedder": embedder,
+        "vector_store": {
+            "provider": "qdrant",
+            "config": {
+                "collection_name": settings["collection_name"],
+                "embedding_model_dims": settings["dims"],
+                "path": settings["path"],
+            }
+        },
+    }
+
+def create_mem0_instance(config: Dict[str, Any], embedder_provider: str = DEFAULT_EMBEDDER) -> Memory:
+    """Creates a Mem0 `Memory`, swapping in the shared local embedder when requested."""
+    instance = Memory.from_config(config)
+    if embedder_provider == "local":
+        # Mem0's huggingface embedder loads a private copy of the model and encodes one
+        # text per call; replace it with the process-wide model and a batching wrapper.
+        instance.embedding_model = LocalSentenceTransformerEmbedding(config["embedder"]["config"]["model"])
+    return instance
+
 # Singleton class for Mem0 client to avoid file lock issues on Windows
 class Mem0Client:
     _instance: Optional['Mem0Client'] = None
@@ -37,46 +122,30 @@ class Mem0Client:
             self.is_initialized = True
 
     def _initialize(self):
-        """Initializes the Mem0 instance using Google AI."""
+        """Initializes the Mem0 instance using Google AI, with either the Gemini or the local embedder."""
         logger.info("--- [Mem0Client._initialize] START ---")
-        
-        google_api_key = os.getenv("GOOGLE_API_KEY")
-        if not google_api_key:
-            logger.error("GOOGLE_API_KEY not found in environment variables.")
-            raise ValueError("GOOGLE_API_KEY is required for Google AI provider.")
-
-        config = {
-            "llm": {
-                "provider": "gemini",
-                "config": {
-                    "model": "gemini-1.5-flash",
-                    "api_key": google_api_key,
-                    "temperature": 0.7,
-                }
-            },
-            "embedding": {
-                "provider": "gemini",
-                "config": {
-                    "model": "text-embedding-004",
-                    "api_key": google_api_key,
-                }
-            }
-        }
-        
+
+        self.embedder_provider = os.getenv("MEM0_EMBEDDER", DEFAULT_EMBEDDER).lower()
+        config = build_mem0_config(self.embedder_provider)
+
         try:
-            self.mem0_instance = Memory.from_config(config)
-            logger.info("--- [Mem0Client._initialize] Initialized mem0_instance with Google AI config. ---")
+            self.mem0_instance = create_mem0_instance(config, self.embedder_provider)
+            logger.info(f"--- [Mem0Client._initialize] Initialized mem0_instance with Google AI config and '{self.embedder_provider}' embedder. ---")
         except Exception as e:
             logger.error(f"Failed to initialize Mem0 with Google AI config: {e}", exc_info=True)
             raise
         
         logger.info("--- [Mem0Client._initialize] END ---")
 
-    def add(self, messages: List[Dict[str, str]], user_id: str, metadata: Optional[Dict[str, Any]] = None) -> Any:
+    def add(self, messages: List[Dict[str, str]], user_id: str, metadata: Optional[Dict[str, Any]] = None, infer: bool = True) -> Any:
+        """
+        Adds memories for a user. With `infer=False` the messages are stored verbatim,
+        skipping Mem0's LLM fact extraction (use it for structured records).
+        """
         logger.debug(f"Mem0Client: Calling add for user_id: {user_id} with messages: {messages} and metadata: {metadata}")
         try:
             # The `Memory` class expects the `data` argument.
-            return self.mem0_instance.add(messages=messages, user_id=user_id, metadata=metadata)
+            return self.mem0_instance.add(messages=messages, user_id=user_id, metadata=metadata, infer=infer)
         except Exception as e:
             logger.error(f"Mem0Client: Error in add method: {e}", exc_info=True)
             raise
@@ -116,21 +185,84 @@ class Mem0Client:
             logger.error(f"Mem0Client: Error in delete method for memory_id {memory_id}: {e}", exc_info=True)
             raise
 
-    def delete_all(self, user_id: str) -> None:
-        """Deletes all memories for a specific user."""
+    def delete_many(
+        self,
+        memory_ids: List[str],
+        max_workers: int = DELETE_MAX_WORKERS,
+        batch_size: int = DELETE_BATCH_SIZE,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Deletes the given memories in batches of `batch_size`, each batch fanned out over
+        at most `max_workers` threads. Returns the number deleted and the failed IDs.
+        """
+        total = len(memory_ids)
+        report = {"deleted": 0, "failed": []}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="mem0-delete") as executor:
+            for start in range(0, total, batch_size):
+                batch = memory_ids[start:start + batch_size]
+                futures = {executor.submit(self.delete, memory_id): memory_id for memory_id in batch}
+                for future in as_completed(futures):
+                    if future.exception() is not None:
+                        report["failed"].append(futures[future])
+                    else:
+                        report["deleted"] += 1
+                if on_progress:
+                    on_progress(report["deleted"] + len(report["failed"]), total)
+        return report
+
+    def delete_all(
+        self,
+        user_id: str,
+        max_workers: int = DELETE_MAX_WORKERS,
+        batch_size: int = DELETE_BATCH_SIZE,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        use_backend: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Deletes all memories for a specific user.
+
+        By default the memories are listed once and deleted through `delete_many`.
+        With `use_backend=True`
+        the whole user is dropped with a single `Memory.delete_all(user_id=...)` call
+        instead, when the installed Mem0 version supports it.
+
+        `on_progress(done, total)` is called after every batch (from the calling thread).
+        Returns a report with the total, deleted and failed memory IDs.
+        """
         logger.info(f"Mem0Client: Deleting all memories for user_id: {user_id}")
         try:
             memories_response = self.get_all(user_id=user_id)
             memories_to_delete = memories_response.get('results', [])
-            
-            if not memories_to_delete:
+            if isinstance(memories_to_delete, dict):
+                memories_to_delete = memories_to_delete.get('results', [])
+
+            memory_ids = [mem.get('id') if isinstance(mem, dict) else getattr(mem, 'id', None) for mem in memories_to_delete]
+            memory_ids = [memory_id for memory_id in memory_ids if memory_id]
+            total = len(memory_ids)
+            report = {"user_id": user_id, "total": total, "deleted": 0, "failed": []}
+
+            if not memory_ids:
                 logger.info(f"Mem0Client: No memories found to delete for user_id: {user_id}")
-                return
+                if on_progress:
+                    on_progress(0, 0)
+                return report
 
-            for mem in memories_to_delete:
-                self.delete(memory_id=mem.id)
-            
-            logger.info(f"Mem0Client: Successfully deleted all memories for user_id: {user_id}")
+            if use_backend and hasattr(self.mem0_instance, 'delete_all'):
+                self.mem0_instance.delete_all(user_id=user_id)
+                report["deleted"] = total
+                if on_progress:
+                    on_progress(total, total)
+                logger.info(f"Mem0Client: Backend deleted {total} memories for user_id: {user_id}")
+                return report
+
+            report.update(self.delete_many(memory_ids, max_workers=max_workers, batch_size=batch_size, on_progress=on_progress))
+
+            if report["failed"]:
+                logger.warning(f"Mem0Client: Failed to delete {len(report['failed'])} of {total} memories for user_id: {user_id}")
+            else:
+                logger.info(f"Mem0Client: Successfully deleted all {total} memories for user_id: {user_id}")
+            return report
         except Exception as e:
             logger.error(f"Mem0Client: Error in delete_all method for user_id {user_id}: {e}", exc_info=True)
             raise
@@ -9,6 +9,8 @@ from dotenv import load_dotenv
 from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.base import Checkpoint as BaseCheckpointer
 from .mem0_client import shared_mem0_client
+from .retrieval import created_memory_ids
+from .student_context import StudentContext
 
 logger = logging.getLogger(__name__)
 
@@ -61,18 +63,44 @@ class StudentProfileMemory:
             logger.error(f"StudentProfileMemory: Error updating profile for {user_id}: {e}", exc_info=True)
             raise
 
-    def get_student_data(self, user_id: str) -> Dict[str, Any]:
-        """Get all student data including profile and interactions."""
+    def add_profile_record(self, user_id: str, profile_data: Dict[str, Any]) -> List[str]:
+        """
+        Stores profile data as a raw record, skipping Mem0's LLM inference.
+        Used for bulk onboarding where the profile is already structured.
+        Returns the IDs of the memories Mem0 created (empty if nothing was stored).
+        """
+        try:
+            # Not the 'system' role: Mem0 drops system messages when inference is off.
+            response = self.mem0_client.add(
+                messages=[{"role": "user", "content": json.dumps(profile_data)}],
+                user_id=user_id,
+                metadata={'type': 'profile', self.user_id_field: user_id},
+                infer=False,
+            )
+            return created_memory_ids(response)
+        except Exception as e:
+            logger.error(f"StudentProfileMemory: Error adding raw profile record for {user_id}: {e}", exc_info=True)
+            raise
+
+    def get_student_data(self, user_id: str, student_context: Optional[StudentContext] = None) -> Dict[str, Any]:
+        """
+        Get all student data including profile and interactions.
+        Pass the run's `student_context` to reuse memories it has already fetched.
+        """
         logger.info(f"StudentProfileMemory: Getting student data for user_id: {user_id}")
         try:
-            response = self.mem0_client.get_all(user_id=user_id)
-            all_memories = response.get('results', [])
+            if student_context is not None and student_context.user_id == user_id:
+                all_memories = student_context.memories
+            else:
+                response = self.mem0_client.get_all(user_id=user_id)
+                all_memories = response.get('results', [])
             
             profile_data = {}
             interactions = []
             
             for mem in all_memories:
-                content_str = mem.get('text')
+                # Raw records keep their JSON under 'memory'; older entries used 'text'.
+                content_str = mem.get('memory') or mem.get('text')
                 if not content_str:
                     continue
 
@@ -95,12 +123,16 @@ class StudentProfileMemory:
             logger.error(f"StudentProfileMemory: Error getting student data for {user_id}: {e}", exc_info=True)
             return {'profile': {}, 'interactions': [], 'total_memories': 0}
 
-    def clear_user_memory(self, user_id: str) -> None:
-        """Clears all memory for a specific user in mem0."""
+    def clear_user_memory(self, user_id: str, **delete_options: Any) -> Dict[str, Any]:
+        """
+        Clears all memory for a specific user in mem0.
+        `delete_options` are forwarded to `Mem0Client.delete_all` (concurrency, progress callback...).
+        """
         logger.info(f"StudentProfileMemory: Attempting to clear all data for user_id: {user_id}")
         try:
-            self.mem0_client.delete_all(user_id=user_id)
+            report = self.mem0_client.delete_all(user_id=user_id, **delete_options)
             logger.info(f"StudentProfileMemory: Cleared all data for user_id: {user_id}")
+            return report
         except Exception as e:
             logger.error(f"StudentProfileMemory: Error clearing data for {user_id}: {e}")
             raise
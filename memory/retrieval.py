@@ -0,0 +1,151 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from .mem0_client import shared_mem0_client
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+RELEVANT_TOP_K = 5  # Interactions returned by semantic search against the current context
+RECENT_N = 3  # Most recent interactions that are always considered
+MAX_HISTORY_TOKENS = 1200  # Hard budget for the interaction block injected into a prompt
+CHARS_PER_TOKEN = 4  # Rough heuristic, good enough for budgeting JSON payloads
+INTERACTION_TYPES = ("interaction", "structured_interaction")
+
+
+def unwrap_memories(response: Any) -> List[Dict[str, Any]]:
+    """
+    Normalizes the different shapes returned by Mem0 (plain list, {'results': [...]},
+    nested {'results': {'results': [...]}}) into a flat list of memory dicts.
+    """
+    memories = response
+    while isinstance(memories, dict) and 'results' in memories:
+        memories = memories['results']
+    if isinstance(memories, dict) and 'memories' in memories:
+        memories = memories['memories']
+    if not isinstance(memories, list):
+        return []
+    return [mem for mem in memories if isinstance(mem, dict)]
+
+
+def created_memory_ids(response: Any) -> List[str]:
+    """IDs of the memories an `add` call actually stored (Mem0 reports an 'ADD'/'UPDATE' event for each)."""
+    return [
+        mem['id'] for mem in unwrap_memories(response)
+        if mem.get('id') and mem.get('event', 'ADD') in ('ADD', 'UPDATE')
+    ]
+
+
+def memory_to_interaction(mem: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Converts a raw Mem0 memory into an interaction dict, or None if it is not an interaction."""
+    metadata = mem.get('metadata') or {}
+    if metadata.get('type') not in INTERACTION_TYPES:
+        return None
+
+    content = mem.get('memory') or mem.get('text') or mem.get('data')
+    if isinstance(content, str):
+        try:
+            parsed = json.loads(content)
+            interaction = parsed if isinstance(parsed, dict) else {"content": content}
+        except (json.JSONDecodeError, TypeError):
+            interaction = {"content": content}
+    elif isinstance(content, dict):
+        interaction = dict(content)
+    else:
+        return None
+
+    if 'timestamp' not in interaction:
+        interaction['timestamp'] = mem.get('created_at') or mem.get('updated_at') or ""
+    return interaction
+
+
+def estimate_tokens(payload: Any) -> int:
+    """Approximates the token cost of a payload once serialized into a prompt."""
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"), default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _interaction_key(interaction: Dict[str, Any]) -> str:
+    return json.dumps(interaction, sort_keys=True, default=str)
+
+
+def _recent_interactions(user_id: str, history: Optional[List[Dict[str, Any]]], recent_n: int) -> List[Dict[str, Any]]:
+    if history is None:
+        try:
+            memories = unwrap_memories(shared_mem0_client.get_all(user_id=user_id))
+        except Exception as e:
+            logger.warning(f"MemoryRetrieval: Could not load recent interactions for {user_id}: {e}")
+            return []
+        history = [i for i in (memory_to_interaction(m) for m in memories) if i]
+
+    valid = [i for i in history if isinstance(i, dict)]
+    valid.sort(key=lambda i: str(i.get('timestamp', '')), reverse=True)
+    return valid[:recent_n]
+
+
+def _relevant_interactions(user_id: str, query: str, top_k: int) -> List[Dict[str, Any]]:
+    if not query or not query.strip() or top_k <= 0:
+        return []
+    try:
+        # Over-fetch because profiles, summaries and checkpoints share the same user namespace.
+        response = shared_mem0_client.search(query=query, user_id=user_id, limit=top_k * 2)
+    except Exception as e:
+        logger.warning(f"MemoryRetrieval: Semantic search failed for {user_id}, falling back to recency only: {e}")
+        return []
+
+    scored = []
+    for mem in unwrap_memories(response):
+        interaction = memory_to_interaction(mem)
+        if interaction:
+            scored.append((mem.get('score') or 0.0, interaction))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [interaction for _, interaction in scored[:top_k]]
+
+
+def get_relevant_interactions(
+    user_id: str,
+    query: str,
+    top_k: int = RELEVANT_TOP_K,
+    recent_n: int = RECENT_N,
+    max_tokens: int = MAX_HISTORY_TOKENS,
+    history: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns the interactions worth showing an LLM for the current turn: the `recent_n`
+    most recent ones plus the `top_k` most relevant to `query`, deduplicated and trimmed
+    to `max_tokens`. Recent interactions take priority over relevant ones when the budget
+    is tight. The result is ordered oldest -> newest.
+
+    If `history` is given (e.g. `student_memory_context['interaction_history']`), it is
+    used for the recency part instead of re-reading every memory from Mem0.
+    """
+    if not user_id:
+        return []
+
+    candidates = _recent_interactions(user_id, history, recent_n) + _relevant_interactions(user_id, query, top_k)
+
+    selected: List[Dict[str, Any]] = []
+    seen = set()
+    used_tokens = 0
+    for interaction in candidates:
+        key = _interaction_key(interaction)
+        if key in seen:
+            continue
+        cost = estimate_tokens(interaction)
+        if used_tokens + cost > max_tokens:
+            continue
+        seen.add(key)
+        selected.append(interaction)
+        used_tokens += cost
+
+    selected.sort(key=lambda i: str(i.get('timestamp', '')))
+    logger.info(f"MemoryRetrieval: Selected {len(selected)} interactions (~{used_tokens} tokens) for user {user_id}.")
+    return selected
+
+
+def format_interactions_for_prompt(interactions: List[Dict[str, Any]]) -> str:
+    """Compact serialization for prompts; whitespace is billed as input tokens."""
+    if not interactions:
+        return "[]"
+    return json.dumps(interactions, separators=(",", ":"), default=str)
@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from .mem0_client import shared_mem0_client
+from .retrieval import unwrap_memories, memory_to_interaction
+from .student_summary import student_summary_manager
+from .tiering import select_hot
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+CONTEXT_CONFIG_KEY = "student_context"  # Key under config["configurable"] holding the run's context
+
+
+class StudentContext:
+    """
+    Request-scoped view of one student's memory, created once per graph invocation and
+    passed to nodes through `config["configurable"]["student_context"]`.
+
+    The profile, interaction history and summary are loaded lazily from a single Mem0
+    `get_all` call on first access and memoized for the rest of the run, so nodes that
+    all need student data no longer hit the memory backend once each.
+    """
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._memories: Optional[List[Dict[str, Any]]] = None
+        self._profile: Optional[Dict[str, Any]] = None
+        self._interaction_history: Optional[List[Dict[str, Any]]] = None
+        self._summary: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def memories(self) -> List[Dict[str, Any]]:
+        """Every raw Mem0 memory of the user, fetched once per run."""
+        with self._lock:
+            if self._memories is None:
+                try:
+                    self._memories = unwrap_memories(shared_mem0_client.get_all(user_id=self.user_id))
+                except Exception as e:
+                    logger.error(f"StudentContext: Failed to load memories for {self.user_id}: {e}", exc_info=True)
+                    self._memories = []
+                logger.info(f"StudentContext: Loaded {len(self._memories)} memories for {self.user_id}.")
+            return self._memories
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        if self._profile is None:
+            profile: Dict[str, Any] = {}
+            for mem in self.memories:
+                if (mem.get('metadata') or {}).get('type') != 'profile':
+                    continue
+                content = mem.get('memory') or mem.get('text')
+                try:
+                    parsed = json.loads(content) if isinstance(content, str) else content
+                except (json.JSONDecodeError, TypeError):
+                    continue
+                if isinstance(parsed, dict):
+                    profile.update(parsed)
+            self._profile = profile
+        return self._profile
+
+    @property
+    def interaction_history(self) -> List[Dict[str, Any]]:
+        """The hot window of interactions, newest first."""
+        if self._interaction_history is None:
+            interactions = [i for i in (memory_to_interaction(m) for m in self.memories) if i]
+            self._interaction_history = select_hot(interactions)
+        return self._interaction_history
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        if self._summary is None:
+            self._summary = student_summary_manager.get_summary(self.user_id, memories=self.memories)
+        return self._summary
+
+    def memory_context(self) -> Dict[str, Any]:
+        """
+        The profile, interaction history and summary in the `student_memory_context` shape.
+        Blocks on Mem0 the first time; async nodes should call it through asyncio.to_thread.
+        """
+        return {
+            "profile": self.profile,
+            "interaction_history": self.interaction_history,
+            "summary": self.summary,
+        }
+
+    def invalidate(self) -> None:
+        """Drops the memoized data, e.g. after the run wrote new memories for the user."""
+        with self._lock:
+            self._memories = None
+            self._profile = None
+            self._interaction_history = None
+            self._summary = None
+
+
+def get_student_context(config: Optional[Dict[str, Any]], user_id: str) -> StudentContext:
+    """
+    Returns the run's StudentContext from the graph config, or a fresh (unshared) one when
+    the graph was invoked without it or for a different user.
+    """
+    context = ((config or {}).get("configurable") or {}).get(CONTEXT_CONFIG_KEY)
+    if isinstance(context, StudentContext) and context.user_id == user_id:
+        return context
+    return StudentContext(user_id)
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai.types import GenerationConfig
+
+from .mem0_client import shared_mem0_client
+from .retrieval import created_memory_ids, unwrap_memories
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SUMMARY_UPDATE_EVERY = 5  # Interactions buffered before the summary is refreshed
+SUMMARY_MAX_PENDING = 4 * SUMMARY_UPDATE_EVERY  # Cap on buffered interactions if updates keep failing
+SUMMARY_MAX_ITEMS = 5  # Max entries kept in each list field of the summary
+SUMMARY_MODEL = "gemini-2.0-flash"
+SUMMARY_MEMORY_TYPE = "student_summary"
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1000"))  # Users whose summary is kept in-process
+
+
+def empty_summary() -> Dict[str, Any]:
+    return {
+        "strengths": [],
+        "recurring_errors": [],
+        "objectives_covered": [],
+        "affect_trend": "",
+        "interactions_summarized": 0,
+        "updated_at": "",
+    }
+
+
+class StudentSummaryManager:
+    """
+    Maintains a compact rolling summary per user (strengths, recurring errors,
+    objectives covered, affect trend) so downstream nodes can be given a few hundred
+    tokens instead of the raw interaction history.
+
+    Interactions are buffered in-process and folded into the summary in a background
+    task every `update_every` interactions, or when the session ends, so the extra
+    LLM call is amortized over several turns.
+    """
+    def __init__(self, update_every: int = SUMMARY_UPDATE_EVERY):
+        self.update_every = update_every
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        # LRU of loaded summaries, with the Mem0 IDs of each user's stored summary memories.
+        self._summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stored_ids: Dict[str, List[str]] = {}
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}  # user -> (lock, updates using it)
+        self._tasks: set = set()
+
+    def record_interaction(self, user_id: str, interaction: Dict[str, Any]) -> None:
+        """Buffers an interaction and schedules a summary update once the batch is full."""
+        if not user_id or not interaction:
+            return
+        pending = self._pending.setdefault(user_id, [])
+        pending.append(interaction)
+        if len(pending) > SUMMARY_MAX_PENDING:
+            del pending[:len(pending) - SUMMARY_MAX_PENDING]
+        if len(pending) >= self.update_every:
+            self._schedule_update(user_id)
+
+    def flush(self, user_id: str) -> None:
+        """Schedules an update for whatever is buffered, e.g. at session end."""
+        if self._pending.get(user_id):
+            self._schedule_update(user_id)
+
+    def _schedule_update(self, user_id: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(f"StudentSummary: No running event loop, keeping {user_id}'s interactions buffered.")
+            return
+        task = loop.create_task(self.update_summary(user_id))
+        # Hold a reference so the task is not garbage collected mid-flight.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def update_summary(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Folds the buffered interactions into the stored summary and persists it."""
+        # One lock per user with updates in flight, counted so it is dropped with the last one.
+        lock, users = self._locks.get(user_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[user_id] = (lock, users + 1)
+        try:
+            async with lock:
+                return await self._fold_pending(user_id)
+        finally:
+            lock, users = self._locks[user_id]
+            if users > 1:
+                self._locks[user_id] = (lock, users - 1)
+            else:
+                del self._locks[user_id]
+
+    async def _fold_pending(self, user_id: str) -> Optional[Dict[str, Any]]:
+        batch = self._pending.pop(user_id, [])
+        if not batch:
+            return self._summaries.get(user_id)
+
+        current = await asyncio.to_thread(self.get_summary, user_id)
+        try:
+            updated = await self._merge_with_llm(current, batch)
+        except Exception as e:
+            logger.error(f"StudentSummary: Failed to update summary for {user_id}: {e}", exc_info=True)
+            # Put the batch back in front so it is retried with the next one.
+            self._pending[user_id] = (batch + self._pending.get(user_id, []))[-SUMMARY_MAX_PENDING:]
+            return current
+
+        updated["interactions_summarized"] = current.get("interactions_summarized", 0) + len(batch)
+        updated["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self._cache(user_id, updated)
+
+        try:
+            await asyncio.to_thread(self._persist, user_id, updated)
+        except Exception as e:
+            logger.error(f"StudentSummary: Failed to persist summary for {user_id}: {e}", exc_info=True)
+
+        logger.info(f"StudentSummary: Updated summary for {user_id} with {len(batch)} interactions.")
+        return updated
+
+    def get_summary(self, user_id: str, memories: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Returns the cached summary, loading the latest persisted one on first access.
+        `memories` (the user's already-fetched Mem0 memories) avoids a second `get_all`.
+        """
+        if user_id in self._summaries:
+            self._summaries.move_to_end(user_id)
+            return self._summaries[user_id]
+
+        summary = empty_summary()
+        stored_ids: List[str] = []
+        try:
+            if memories is None:
+                memories = unwrap_memories(shared_mem0_client.get_all(user_id=user_id))
+            stored = [m for m in memories if (m.get('metadata') or {}).get('type') == SUMMARY_MEMORY_TYPE]
+            stored_ids = [m['id'] for m in stored if m.get('id')]
+            if stored:
+                latest = max(stored, key=lambda m: (m.get('metadata') or {}).get('updated_at', ''))
+                content = latest.get('memory') or latest.get('text') or "{}"
+                parsed = json.loads(content) if isinstance(content, str) else content
+                if isinstance(parsed, dict):
+                    summary.update(parsed)
+        except Exception as e:
+            logger.warning(f"StudentSummary: Could not load stored summary for {user_id}: {e}")
+
+        self._cache(user_id, summary, stored_ids)
+        return summary
+
+    def _cache(self, user_id: str, summary: Dict[str, Any], stored_ids: Optional[List[str]] = None) -> None:
+        self._summaries[user_id] = summary
+        self._summaries.move_to_end(user_id)
+        if stored_ids is not None:
+            self._stored_ids[user_id] = stored_ids
+        while len(self._summaries) > SUMMARY_CACHE_SIZE:
+            evicted, _ = self._summaries.popitem(last=False)
+            self._stored_ids.pop(evicted, None)
+
+    def _persist(self, user_id: str, summary: Dict[str, Any]) -> None:
+        """Stores the summary as one Mem0 memory, replacing the previously stored one."""
+        # Stored verbatim (no inference) so it can be read back as JSON; not the 'system'
+        # role, since Mem0 drops system messages when inference is off.
+        response = shared_mem0_client.add(
+            messages=[{"role": "user", "content": json.dumps(summary)}],
+            user_id=user_id,
+            metadata={'type': SUMMARY_MEMORY_TYPE, 'user_id': user_id, 'updated_at': summary["updated_at"]},
+            infer=False,
+        )
+        new_ids = created_memory_ids(response)
+        if not new_ids:
+            raise RuntimeError("Mem0 created no memory for the summary.")
+
+        # IDs are unknown if the user was evicted since loading; the next load finds every
+        # stored copy again, so the stale ones are removed on the following update.
+        for memory_id in self._stored_ids.get(user_id, []):
+            try:
+                shared_mem0_client.delete(memory_id)
+            except Exception as e:
+                logger.warning(f"StudentSummary: Could not delete previous summary {memory_id} for {user_id}: {e}")
+        if user_id in self._summaries:
+            self._stored_ids[user_id] = new_ids
+
+    async def _merge_with_llm(self, current: Dict[str, Any], batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable is not set.")
+
+        current_fields = {k: v for k, v in current.items() if k not in ("interactions_summarized", "updated_at")}
+        prompt = f"""
+You maintain a compact running summary of a TOEFL student's learning.
+
+**Current summary:**
+{json.dumps(current_fields, separators=(',', ':'))}
+
+**New interactions since the last update (oldest first):**
+{json.dumps(batch, separators=(',', ':'), default=str)}
+
+Update the summary with the new interactions. Keep at most {SUMMARY_MAX_ITEMS} short entries per list,
+merging duplicates and dropping items that are no longer relevant.
+Return a SINGLE JSON object with exactly these keys:
+{{"strengths": [string], "recurring_errors": [string], "objectives_covered": [string], "affect_trend": string}}
+"""
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(
+            SUMMARY_MODEL,
+            generation_config=GenerationConfig(response_mime_type="application/json"),
+        )
+        response = await model.generate_content_async(prompt)
+        response_json = json.loads(response.text)
+
+        updated = empty_summary()
+        for key in ("strengths", "recurring_errors", "objectives_covered"):
+            values = response_json.get(key, [])
+            updated[key] = [str(v) for v in values][:SUMMARY_MAX_ITEMS] if isinstance(values, list) else []
+        updated["affect_trend"] = str(response_json.get("affect_trend", ""))
+        return updated
+
+
+# Shared instance so every node sees the same buffers and cache.
+student_summary_manager = StudentSummaryManager()
@@ -0,0 +1,182 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .mem0_client import shared_mem0_client
+from .retrieval import unwrap_memories, memory_to_interaction, INTERACTION_TYPES
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+HOT_MAX_INTERACTIONS = 50  # Interactions kept in Mem0 (the hot tier) per user
+HOT_MAX_AGE_DAYS = 30  # Interactions older than this are archived even if under the count
+TIERING_EVERY = 20  # Saved interactions between background tiering runs for a user
+TIERING_TRACKED_USERS = 10_000  # Users whose save count is kept; the least recently active are forgotten
+ARCHIVE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "memory_archive")
+ARCHIVE_UNDATED = datetime.min.replace(tzinfo=timezone.utc)  # Undated archived records sort first
+
+_archive_locks: Dict[str, threading.Lock] = {}
+_archive_locks_guard = threading.Lock()
+_saves_since_tiering: "OrderedDict[str, int]" = OrderedDict()
+_tiering_tasks: set = set()
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    # Structured interactions are stamped with naive local time; treat them as UTC.
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _interaction_time(interaction: Dict[str, Any], undated: datetime) -> datetime:
+    return _parse_timestamp(interaction.get('timestamp')) or undated
+
+
+def select_hot(
+    interactions: List[Dict[str, Any]],
+    max_interactions: int = HOT_MAX_INTERACTIONS,
+    max_age_days: int = HOT_MAX_AGE_DAYS,
+) -> List[Dict[str, Any]]:
+    """Returns the hot window of `interactions`: the newest `max_interactions` within `max_age_days`, newest first."""
+    # Undated interactions count as current: their age is unknown, and archiving them by
+    # mistake would drop them from every prompt.
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=max_age_days)
+    newest_first = sorted(interactions, key=lambda i: _interaction_time(i, now), reverse=True)
+    return [i for i in newest_first[:max_interactions] if _interaction_time(i, now) >= cutoff]
+
+
+def archive_path(user_id: str) -> str:
+    safe_user_id = re.sub(r'[^A-Za-z0-9_.-]', '_', user_id)
+    return os.path.join(ARCHIVE_DIRECTORY, f"{safe_user_id}.jsonl.gz")
+
+
+def _archive_lock(user_id: str) -> threading.Lock:
+    with _archive_locks_guard:
+        return _archive_locks.setdefault(user_id, threading.Lock())
+
+
+def archive_cold_interactions(
+    user_id: str,
+    max_interactions: int = HOT_MAX_INTERACTIONS,
+    max_age_days: int = HOT_MAX_AGE_DAYS,
+) -> Dict[str, Any]:
+    """
+    Moves the user's interactions that fall outside the hot window from Mem0 into the
+    compressed cold archive. Records are appended to the archive before they are
+    deleted from Mem0, so a failure part-way never loses data (at worst an interaction
+    is present in both tiers until the next run).
+    """
+    with _archive_lock(user_id):
+        memories = unwrap_memories(shared_mem0_client.get_all(user_id=user_id))
+        interaction_memories = []
+        for mem in memories:
+            if (mem.get('metadata') or {}).get('type') not in INTERACTION_TYPES or not mem.get('id'):
+                continue
+            interaction = memory_to_interaction(mem)
+            if interaction:
+                interaction_memories.append((mem, interaction))
+
+        hot_ids = {
+            id(interaction)
+            for interaction in select_hot([i for _, i in interaction_memories], max_interactions, max_age_days)
+        }
+        cold = [(mem, interaction) for mem, interaction in interaction_memories if id(interaction) not in hot_ids]
+        report = {"user_id": user_id, "hot": len(interaction_memories) - len(cold), "archived": 0, "failed": []}
+        if not cold:
+            return report
+
+        os.makedirs(ARCHIVE_DIRECTORY, exist_ok=True)
+        archived_at = datetime.now(timezone.utc).isoformat()
+        # Appending creates a new gzip member; multi-member files read back transparently.
+        with gzip.open(archive_path(user_id), 'at', encoding='utf-8') as archive:
+            for mem, interaction in cold:
+                record = {
+                    "memory_id": mem['id'],
+                    "archived_at": archived_at,
+                    "metadata": mem.get('metadata') or {},
+                    "interaction": interaction,
+                }
+                archive.write(json.dumps(record, default=str) + "\n")
+
+        delete_report = shared_mem0_client.delete_many([mem['id'] for mem, _ in cold])
+        report["archived"] = delete_report["deleted"]
+        report["failed"] = delete_report["failed"]
+        logger.info(f"Tiering: Archived {report['archived']} cold interactions for {user_id}; {report['hot']} remain hot.")
+        return report
+
+
+def query_archive(
+    user_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Reads archived interactions for a user (oldest first), optionally bounded by time.
+    Intended for explicit long-range queries; the hot path never touches the archive.
+    """
+    path = archive_path(user_id)
+    if not os.path.exists(path):
+        return []
+
+    since = since.replace(tzinfo=since.tzinfo or timezone.utc) if since else None
+    until = until.replace(tzinfo=until.tzinfo or timezone.utc) if until else None
+    results: List[Dict[str, Any]] = []
+    seen_ids = set()
+    with _archive_lock(user_id), gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Tiering: Skipping corrupt archive line for {user_id}")
+                continue
+            # A retried run may have archived the same memory twice.
+            if record.get("memory_id") in seen_ids:
+                continue
+            seen_ids.add(record.get("memory_id"))
+            interaction = record.get("interaction") or {}
+            timestamp = _interaction_time(interaction, ARCHIVE_UNDATED)
+            if (since and timestamp < since) or (until and timestamp > until):
+                continue
+            results.append(interaction)
+
+    results.sort(key=lambda i: _interaction_time(i, ARCHIVE_UNDATED))
+    return results[-limit:] if limit else results
+
+
+def schedule_tiering(user_id: str) -> None:
+    """Counts a saved interaction and runs the archive job in the background every TIERING_EVERY saves."""
+    if not user_id:
+        return
+    _saves_since_tiering[user_id] = _saves_since_tiering.pop(user_id, 0) + 1
+    while len(_saves_since_tiering) > TIERING_TRACKED_USERS:
+        _saves_since_tiering.popitem(last=False)
+    if _saves_since_tiering[user_id] < TIERING_EVERY:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    del _saves_since_tiering[user_id]
+
+    async def run() -> None:
+        try:
+            await asyncio.to_thread(archive_cold_interactions, user_id)
+        except Exception as e:
+            logger.error(f"Tiering: Background archive job failed for {user_id}: {e}", exc_info=True)
+
+    task = loop.create_task(run())
+    _tiering_tasks.add(task)
+    task.add_done_callback(_tiering_tasks.discard)
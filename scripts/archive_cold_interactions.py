@@ -0,0 +1,35 @@
+# scripts/archive_cold_interactions.py
+
+import argparse
+import logging
+import os
+import sys
+
+# Make the project packages importable when run as `python scripts/archive_cold_interactions.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.tiering import archive_cold_interactions, HOT_MAX_INTERACTIONS, HOT_MAX_AGE_DAYS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move interactions outside the hot window from Mem0 to the cold archive.")
+    parser.add_argument("user_ids", nargs="+", help="User IDs to tier.")
+    parser.add_argument("--max-interactions", type=int, default=HOT_MAX_INTERACTIONS, help="Interactions kept hot per user.")
+    parser.add_argument("--max-age-days", type=int, default=HOT_MAX_AGE_DAYS, help="Interactions older than this are archived.")
+    args = parser.parse_args()
+
+    failures = 0
+    for user_id in args.user_ids:
+        try:
+            report = archive_cold_interactions(user_id, args.max_interactions, args.max_age_days)
+            logging.info(f"[{user_id}] Archived {report['archived']} interactions, {report['hot']} kept hot.")
+            if report["failed"]:
+                logging.warning(f"[{user_id}] {len(report['failed'])} archived interactions could not be removed from Mem0.")
+                failures += 1
+        except Exception as e:
+            logging.error(f"[{user_id}] Archiving failed: {e}", exc_info=True)
+            failures += 1
+
+    sys.exit(1 if failures else 0)
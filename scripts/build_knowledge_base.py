@@ -0,0 +1,273 @@
+# scripts/build_knowledge_base.py
+
+import argparse
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+# Make the project packages importable when run as `python scripts/build_knowledge_base.py`
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from graph.lexical_index import write_lexical_index
+from graph.registry import get_chroma_client, get_embedding_function, get_embedding_model
+from scripts.ingest import (
+    BATCH_SIZE,
+    COLLECTION_NAME,
+    DB_DIRECTORY,
+    EMBEDDING_MODEL,
+    assign_record_ids,
+    classify_record,
+    load_previous_ingest,
+    metadata_hash,
+    save_manifest,
+    write_kb_version,
+)
+from scripts.unify_knowledge_base import SOURCE_FILES, standardize_records
+
+# --- Configuration ---
+CSV_CHUNK_ROWS = 2000  # Rows read from a source CSV at a time
+ENCODE_BATCH_SIZE = 64  # Sentences per forward pass inside one embedding batch
+QUEUE_DEPTH = 4  # Items buffered between two stages; with BATCH_SIZE this bounds peak memory
+EMBED_WORKERS = int(os.getenv("KB_EMBED_WORKERS", "1"))  # >1 shards embedding batches across worker processes
+DEFAULT_JSONL_PATH = os.path.join(project_root, 'data', 'unified', 'unified_knowledge_base.jsonl')
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+Batch = List[Tuple[str, Dict, str]]  # (record ID, standardized record, metadata hash)
+
+_END = object()
+
+
+class _StageFailure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def buffered(items: Iterable, name: str, maxsize: int = QUEUE_DEPTH) -> Iterator:
+    """
+    Runs the generator `items` in its own thread, handing its output over through a bounded
+    queue. Stages overlap (CSV parsing, embedding and writing run concurrently) while a slow
+    downstream stage blocks the upstream one instead of letting items pile up in memory.
+    """
+    handoff: "queue.Queue" = queue.Queue(maxsize=maxsize)
+
+    def produce():
+        try:
+            for item in items:
+                handoff.put(item)
+            handoff.put(_END)
+        except BaseException as e:
+            handoff.put(_StageFailure(e))
+
+    threading.Thread(target=produce, name=f"kb-{name}", daemon=True).start()
+    while True:
+        item = handoff.get()
+        if item is _END:
+            return
+        if isinstance(item, _StageFailure):
+            raise RuntimeError(f"Pipeline stage '{name}' failed") from item.error
+        yield item
+
+
+def read_records(source_dir: str, jsonl_path: Optional[str] = None) -> Iterator[Dict]:
+    """Stage 1: streams every source CSV in chunks and yields standardized records."""
+    jsonl_file = None
+    if jsonl_path:
+        os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
+        jsonl_file = open(jsonl_path + ".tmp", 'w', encoding='utf-8')
+    try:
+        for filename, category in SOURCE_FILES.items():
+            file_path = os.path.join(source_dir, filename)
+            if not os.path.exists(file_path):
+                logging.warning(f"File not found, skipping: {file_path}")
+                continue
+            logging.info(f"Streaming '{filename}' for category '{category}'...")
+            for chunk in pd.read_csv(file_path, chunksize=CSV_CHUNK_ROWS):
+                for record in standardize_records(chunk, category):
+                    if jsonl_file:
+                        jsonl_file.write(json.dumps(record) + '\n')
+                    yield record
+    finally:
+        if jsonl_file:
+            jsonl_file.close()
+    if jsonl_path:
+        # Only a complete run replaces the artifact.
+        os.replace(jsonl_path + ".tmp", jsonl_path)
+        logging.info(f"Unified knowledge base written to: {jsonl_path}")
+
+
+def plan_batches(
+    records: Iterable[Dict], previous: Dict[str, str], reembed_all: bool, seen: Set[str]
+) -> Iterator[Tuple[str, Batch]]:
+    """
+    Stage 2: assigns content-hash IDs and diffs each record against the previous ingest,
+    yielding ("embed", batch) and ("update", batch) work. Unchanged records stop here.
+    Every ID is added to `seen` so the removed ones can be deleted once the stream ends.
+    """
+    pending: Dict[str, Batch] = {"embed": [], "update": []}
+    for record_id, record in assign_record_ids(records):
+        seen.add(record_id)
+        record_hash = metadata_hash(record.get('metadata', {}))
+        action = classify_record(record_id, record_hash, previous, reembed_all)
+        if action is None:
+            continue
+        pending[action].append((record_id, record, record_hash))
+        if len(pending[action]) >= BATCH_SIZE:
+            yield action, pending[action]
+            pending[action] = []
+    for action, batch in pending.items():
+        if batch:
+            yield action, batch
+
+
+def _init_embed_worker(threads: int) -> None:
+    # Split the cores between the workers so their forward passes don't oversubscribe the CPU.
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _encode_batch(documents: List[str]) -> List[List[float]]:
+    # Runs inside a worker process; each process loads the model once through its own registry.
+    model = get_embedding_model(EMBEDDING_MODEL)
+    return model.encode(documents, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True).tolist()
+
+
+def embed_batches(work: Iterable[Tuple[str, Batch]], workers: int = 1) -> Iterator[Tuple[str, Batch, Optional[List]]]:
+    """
+    Stage 3: embeds the documents of each "embed" batch; metadata-only updates pass straight
+    through. With `workers` > 1 the batches are sharded across that many processes, each with
+    its own model, and results are yielded in input order with at most two batches in flight
+    per worker.
+    """
+    if workers <= 1:
+        for action, batch in work:
+            if action != "embed":
+                yield action, batch, None
+                continue
+            documents = [record.get('document_for_embedding', '') for _, record, _ in batch]
+            yield action, batch, _encode_batch(documents)
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    logging.info(f"Embedding with {workers} worker processes ({threads} threads each)...")
+    in_flight: "collections.deque[Tuple[str, Batch, Optional[Future]]]" = collections.deque()
+    # Spawned, not forked: this runs in a pipeline thread while the read and plan threads are
+    # still running, and forking a multi-threaded process can deadlock the child.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_embed_worker,
+        initargs=(threads,),
+    ) as pool:
+        for action, batch in work:
+            future = None
+            if action == "embed":
+                future = pool.submit(_encode_batch, [record.get('document_for_embedding', '') for _, record, _ in batch])
+            in_flight.append((action, batch, future))
+            while len(in_flight) > 2 * workers:
+                action, batch, future = in_flight.popleft()
+                yield action, batch, future.result() if future else None
+        while in_flight:
+            action, batch, future = in_flight.popleft()
+            yield action, batch, future.result() if future else None
+
+
+def build_knowledge_base(jsonl_path: Optional[str] = None, workers: int = EMBED_WORKERS) -> None:
+    """
+    Source CSVs -> standardized records -> diff -> embeddings -> Chroma, as one streaming
+    pipeline. Records are only ever held a few batches at a time, so peak memory does not
+    grow with the corpus (only record IDs are kept for the diff). The unified JSONL file is
+    written only when `jsonl_path` is given. Embedding runs in `workers` processes; the
+    vectors they return are written by this process alone.
+    """
+    start_time = time.time()
+    source_dir = os.path.join(project_root, 'data', 'source_cta')
+    db_path = os.path.join(project_root, DB_DIRECTORY)
+
+    collection = get_chroma_client(db_path).get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=get_embedding_function(EMBEDDING_MODEL),
+        metadata={"hnsw:space": "cosine"}
+    )
+    previous, reembed_all = load_previous_ingest(collection, db_path)
+    seen: Set[str] = set()
+    ingested = dict(previous)
+    embedded = updated = 0
+
+    # Stage 4 (this thread): the single writer.
+    records = buffered(read_records(source_dir, jsonl_path), "read", maxsize=BATCH_SIZE)
+    work = buffered(plan_batches(records, previous, reembed_all, seen), "plan")
+    for action, batch, embeddings in buffered(embed_batches(work, workers), "embed"):
+        ids = [record_id for record_id, _, _ in batch]
+        metadatas = [record.get('metadata', {}) for _, record, _ in batch]
+        try:
+            if action == "embed":
+                collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=[record.get('document_for_embedding', '') for _, record, _ in batch],
+                    metadatas=metadatas,
+                )
+                embedded += len(ids)
+            else:
+                collection.update(ids=ids, metadatas=metadatas)
+                updated += len(ids)
+            ingested.update({record_id: record_hash for record_id, _, record_hash in batch})
+        except Exception as e:
+            # The batch stays out of the manifest, so the next run picks it up again.
+            logging.error(f"Failed to write a batch of {len(ids)} records ({action}). Error: {e}", exc_info=True)
+            continue
+        elapsed = time.time() - start_time
+        logging.info(f"Written: {embedded} embedded ({embedded / elapsed:.1f} records/s), {updated} metadata-only ({elapsed:.1f}s).")
+
+    to_delete = [record_id for record_id in previous if record_id not in seen]
+    for i in range(0, len(to_delete), BATCH_SIZE):
+        batch_ids = to_delete[i:i + BATCH_SIZE]
+        try:
+            collection.delete(ids=batch_ids)
+            for record_id in batch_ids:
+                ingested.pop(record_id, None)
+        except Exception as e:
+            logging.error(f"Failed to delete {len(batch_ids)} removed records. Error: {e}", exc_info=True)
+
+    save_manifest(db_path, ingested)
+    duration = time.time() - start_time
+    logging.info(
+        f"--- Pipeline complete in {duration:.2f}s: {len(seen)} records streamed, {embedded} embedded "
+        f"({embedded / duration:.1f} records/s with {workers} embedding worker(s)), {updated} metadata-only, "
+        f"{len(to_delete)} removed. ---"
+    )
+    if not (embedded or updated or to_delete):
+        logging.info("Knowledge base unchanged; keeping the current version stamp and lexical index.")
+        return
+    write_lexical_index(collection, db_path)
+    write_kb_version(db_path, collection.count())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the source CSVs straight into the knowledge base.")
+    parser.add_argument(
+        "--jsonl", nargs="?", const=DEFAULT_JSONL_PATH, default=None,
+        help=f"Also write the unified JSONL artifact (default path: {DEFAULT_JSONL_PATH})."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=EMBED_WORKERS,
+        help="Embedding worker processes, each loading its own model (default: KB_EMBED_WORKERS or 1)."
+    )
+    args = parser.parse_args()
+    build_knowledge_base(jsonl_path=args.jsonl, workers=args.workers)
@@ -0,0 +1,57 @@
+# scripts/clear_user_memory.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Make the project packages importable when run as `python scripts/clear_user_memory.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.mem0_client import shared_mem0_client, DELETE_MAX_WORKERS, DELETE_BATCH_SIZE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def clear_users(user_ids, max_workers: int, batch_size: int, use_backend: bool) -> int:
+    """
+    Deletes every Mem0 memory of the given users, logging progress per batch.
+    Returns the number of users whose deletion did not fully succeed.
+    """
+    failures = 0
+    for user_id in user_ids:
+        start_time = time.time()
+
+        def on_progress(done: int, total: int, user_id=user_id) -> None:
+            logging.info(f"[{user_id}] Deleted {done}/{total} memories...")
+
+        try:
+            report = shared_mem0_client.delete_all(
+                user_id=user_id,
+                max_workers=max_workers,
+                batch_size=batch_size,
+                on_progress=on_progress,
+                use_backend=use_backend,
+            )
+        except Exception as e:
+            logging.error(f"[{user_id}] Bulk delete failed: {e}", exc_info=True)
+            failures += 1
+            continue
+
+        duration = time.time() - start_time
+        logging.info(f"[{user_id}] Deleted {report['deleted']} of {report['total']} memories in {duration:.2f} seconds.")
+        if report["failed"]:
+            logging.warning(f"[{user_id}] {len(report['failed'])} memories could not be deleted: {report['failed']}")
+            failures += 1
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete all Mem0 memories for one or more users.")
+    parser.add_argument("user_ids", nargs="+", help="User IDs whose memories should be deleted.")
+    parser.add_argument("--workers", type=int, default=DELETE_MAX_WORKERS, help="Concurrent delete calls per user.")
+    parser.add_argument("--batch-size", type=int, default=DELETE_BATCH_SIZE, help="Deletes per progress batch.")
+    parser.add_argument("--backend", action="store_true", help="Use Mem0's single delete_all call instead of parallel deletes.")
+    args = parser.parse_args()
+
+    sys.exit(1 if clear_users(args.user_ids, args.workers, args.batch_size, args.backend) else 0)
@@ -2,16 +2,29 @@
 
 import chromadb
 from chromadb.utils import embedding_functions
+import hashlib
 import json
 import os
 import logging
 import time
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Make the project packages importable when run as `python scripts/ingest.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph.lexical_index import write_lexical_index
 
 # --- Configuration ---
 DB_DIRECTORY = "chroma_db"  # Directory to store the persistent database
 COLLECTION_NAME = "tutor_knowledge_base" # A more descriptive name
 EMBEDDING_MODEL = "all-MiniLM-L6-v2" # This MUST match the model you'll use in the RAG node
 BATCH_SIZE = 500  # Process 500 documents at a time to manage memory and network traffic
+KB_VERSION_FILE = "kb_version.json"  # Version stamp the service uses to invalidate cached RAG results
+MANIFEST_FILE = "ingest_manifest.json"  # IDs (and metadata hashes) this script has written to the collection
+LEGACY_ID_PREFIX = "record_"  # Positional IDs used before content-hash IDs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -59,47 +72,199 @@ def ingest_data_to_chroma():
         logging.error(f"Failed to read or parse JSONL file. Error: {e}", exc_info=True)
         return
 
-    # --- 5. Process and Ingest in Batches ---
-    total_records = len(all_records)
+    # --- 5. Diff Against the Previous Ingest ---
+    records_by_id = dict(assign_record_ids(all_records))
+    current = {record_id: metadata_hash(rec.get('metadata', {})) for record_id, rec in records_by_id.items()}
+    previous, reembed_all = load_previous_ingest(collection, db_path)
+    to_embed, to_update, to_delete = plan_ingest(current, previous, reembed_all=reembed_all)
+    logging.info(
+        f"Ingest plan: {len(to_embed)} new or changed, {len(to_update)} metadata-only, "
+        f"{len(to_delete)} removed, {len(current) - len(to_embed) - len(to_update)} unchanged."
+    )
+
+    # The manifest ends up listing exactly what the collection holds, so a failed batch is retried next run.
+    ingested = dict(previous)
+
+    # --- 6. Apply the Diff in Batches ---
+    for i in range(0, len(to_delete), BATCH_SIZE):
+        batch_ids = to_delete[i:i + BATCH_SIZE]
+        try:
+            collection.delete(ids=batch_ids)
+            for record_id in batch_ids:
+                ingested.pop(record_id, None)
+        except Exception as e:
+            logging.error(f"Failed to delete {len(batch_ids)} removed records. Error: {e}", exc_info=True)
+
+    for i in range(0, len(to_update), BATCH_SIZE):
+        batch_ids = to_update[i:i + BATCH_SIZE]
+        try:
+            # Same document, so the stored embedding is still valid; only the metadata is rewritten.
+            collection.update(ids=batch_ids, metadatas=[records_by_id[record_id].get('metadata', {}) for record_id in batch_ids])
+            ingested.update({record_id: current[record_id] for record_id in batch_ids})
+        except Exception as e:
+            logging.error(f"Failed to update metadata of {len(batch_ids)} records. Error: {e}", exc_info=True)
+
+    total_records = len(to_embed)
     for i in range(0, total_records, BATCH_SIZE):
         batch_start_time = time.time()
-        # Get the slice of records for the current batch
-        batch_records = all_records[i:i + BATCH_SIZE]
-        
+        batch_ids = to_embed[i:i + BATCH_SIZE]
+
         start_index = i
-        end_index = i + len(batch_records)
-        
+        end_index = i + len(batch_ids)
+
         logging.info(f"Processing batch {start_index+1}-{end_index} of {total_records}...")
 
         # Prepare data for this specific batch
-        documents_to_embed = [rec.get('document_for_embedding', '') for rec in batch_records]
-        metadatas_to_store = [rec.get('metadata', {}) for rec in batch_records]
-        # Create unique IDs for each record
-        ids_for_records = [f"record_{start_index + j}" for j in range(len(batch_records))]
+        documents_to_embed = [records_by_id[record_id].get('document_for_embedding', '') for record_id in batch_ids]
+        metadatas_to_store = [records_by_id[record_id].get('metadata', {}) for record_id in batch_ids]
 
         try:
-            # The .add method will automatically use the collection's embedding function
-            # to convert the 'documents' into vectors. This is the slow part.
-            collection.add(
+            # The .upsert method will automatically use the collection's embedding function
+            # to convert the 'documents' into vectors. This is the slow part, so only new and
+            # changed rows reach it.
+            collection.upsert(
                 documents=documents_to_embed,
                 metadatas=metadatas_to_store,
-                ids=ids_for_records
+                ids=batch_ids
             )
-            
+            ingested.update({record_id: current[record_id] for record_id in batch_ids})
+
             batch_end_time = time.time()
             duration = batch_end_time - batch_start_time
             logging.info(f"Successfully ingested batch {start_index+1}-{end_index}. Time taken: {duration:.2f} seconds.")
 
         except Exception as e:
             logging.error(f"Failed to ingest batch {start_index+1}-{end_index}. Error: {e}", exc_info=True)
-            # You might want to add logic here to retry the batch or save failed batches to a file.
-            # For now, we'll just log the error and continue to the next batch.
+            # The batch stays out of the manifest, so the next run picks it up again.
             continue
-            
+
+    save_manifest(db_path, ingested)
     logging.info("--- Ingestion process complete. ---")
     # You can verify the number of items in the collection
     count = collection.count()
     logging.info(f"Total items in collection '{COLLECTION_NAME}': {count}")
+    if not (to_embed or to_update or to_delete):
+        logging.info("Knowledge base unchanged; keeping the current version stamp and lexical index.")
+        return
+    # BM25 index for hybrid retrieval, built from everything now in the collection.
+    write_lexical_index(collection, db_path)
+    write_kb_version(db_path, count)
+
+
+def record_id_for(record: Dict) -> str:
+    """
+    Content-hash ID: the category plus the embedded document, which is built from the
+    category's key fields. Editing any key field yields a new ID (the old one is deleted);
+    editing other columns keeps the ID and only rewrites the metadata.
+    """
+    category = record.get('metadata', {}).get('category', 'unknown')
+    digest = hashlib.sha1(f"{category}\x1f{record.get('document_for_embedding', '')}".encode('utf-8')).hexdigest()
+    return f"{category}_{digest[:24]}"
+
+
+def assign_record_ids(records: Iterable[Dict]) -> Iterator[Tuple[str, Dict]]:
+    """Pairs each record with its content-hash ID; identical rows get an occurrence suffix."""
+    seen: Dict[str, int] = {}
+    for record in records:
+        record_id = record_id_for(record)
+        occurrence = seen.get(record_id, 0)
+        seen[record_id] = occurrence + 1
+        yield (f"{record_id}_{occurrence}" if occurrence else record_id, record)
+
+
+def metadata_hash(metadata: Dict) -> str:
+    return hashlib.sha1(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def classify_record(record_id: str, record_hash: str, previous: Dict[str, str], reembed_all: bool = False) -> Optional[str]:
+    """"embed" for new or re-embedded records, "update" when only the metadata changed, None if unchanged."""
+    if reembed_all or record_id not in previous:
+        return "embed"
+    if previous[record_id] != record_hash:
+        return "update"
+    return None
+
+
+def plan_ingest(current: Dict[str, str], previous: Dict[str, str], reembed_all: bool = False) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Diffs the records about to be ingested against the manifest of the previous run.
+    Returns (IDs to embed and upsert, IDs whose metadata alone changed, IDs to delete).
+    Only IDs recorded in the manifest are ever deleted, so records other scripts write to
+    the same collection (e.g. pedagogy profiles) are left alone.
+    """
+    to_embed, to_update = [], []
+    for record_id, record_hash in current.items():
+        action = classify_record(record_id, record_hash, previous, reembed_all)
+        if action == "embed":
+            to_embed.append(record_id)
+        elif action == "update":
+            to_update.append(record_id)
+    to_delete = [record_id for record_id in previous if record_id not in current]
+    return to_embed, to_update, to_delete
+
+
+def legacy_record_ids(collection) -> List[str]:
+    return [record_id for record_id in collection.get(include=[])["ids"] if record_id.startswith(LEGACY_ID_PREFIX)]
+
+
+def load_previous_ingest(collection, db_path: str) -> Tuple[Dict[str, str], bool]:
+    """
+    Returns the IDs (and metadata hashes) of the previous ingest and whether every record
+    must be re-embedded because the embedding model changed since.
+    """
+    manifest = load_manifest(db_path)
+    previous = manifest["records"]
+    if not previous:
+        # First incremental run: positional IDs from older ingests would duplicate every row.
+        previous = {record_id: "" for record_id in legacy_record_ids(collection)}
+    return previous, manifest.get("embedding_model") != EMBEDDING_MODEL
+
+
+def load_manifest(db_path: str) -> Dict:
+    manifest_path = os.path.join(db_path, MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get("collection") == COLLECTION_NAME:
+            return manifest
+        logging.warning(f"Manifest at {manifest_path} belongs to another collection; ignoring it.")
+    except FileNotFoundError:
+        logging.info("No ingest manifest found; treating every record as new.")
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read ingest manifest at {manifest_path}: {e}. Treating every record as new.")
+    return {"collection": COLLECTION_NAME, "embedding_model": EMBEDDING_MODEL, "records": {}}
+
+
+def save_manifest(db_path: str, records: Dict[str, str]) -> None:
+    manifest = {
+        "collection": COLLECTION_NAME,
+        "embedding_model": EMBEDDING_MODEL,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "records": records,
+    }
+    manifest_path = os.path.join(db_path, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def write_kb_version(db_path: str, record_count: int) -> None:
+    """
+    Stamps the database with a new version. Running services notice the change and drop
+    cached retrieval results and their in-memory index.
+    """
+    stamp = {
+        "version": uuid.uuid4().hex,
+        "ingested_at": datetime.now(timezone.utc).isoformat(),
+        "record_count": record_count,
+    }
+    version_path = os.path.join(db_path, KB_VERSION_FILE)
+    tmp_path = version_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, version_path)
+    logging.info(f"Knowledge base version stamped: {stamp['version']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+# scripts/ingest_pedagogy_profiles.py
+
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Make the project packages importable when run as `python scripts/ingest_pedagogy_profiles.py`
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from graph.lexical_index import write_lexical_index
+from graph.rag_queries import PEDAGOGY_PROFILE_COLUMNS
+from graph.registry import get_chroma_client, get_embedding_function
+from scripts.ingest import assign_record_ids, write_kb_version
+
+# --- Configuration ---
+DB_DIRECTORY = "chroma_db"
+COLLECTION_NAME = "tutor_knowledge_base"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Local model; must match the one the service queries with
+CATEGORY = "pedagogy_profile"  # Category the pedagogy generator node queries
+BATCH_SIZE = 500
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def ingest_pedagogy_profiles():
+    """
+    Embeds every row of data/pedagogy_data.csv with the local sentence-transformer and
+    upserts it into the shared knowledge base under the 'pedagogy_profile' category.
+    This replaces the store the pedagogy node used to build on its first request.
+    """
+    csv_path = os.path.join(project_root, 'data', 'pedagogy_data.csv')
+    db_path = os.path.join(project_root, DB_DIRECTORY)
+    if not os.path.exists(csv_path):
+        logging.error(f"Pedagogy data not found at: {csv_path}")
+        return
+
+    df = pd.read_csv(csv_path)
+    df.rename(columns={
+        "Answer One": "Goal",
+        "Answer Two": "Feeling",
+        "Answer Three": "Confidence"
+    }, inplace=True)
+    logging.info(f"Loaded {len(df)} pedagogy profiles from {csv_path}")
+
+    # Same text the node builds its query from; vectorized over columns rather than row by row.
+    documents = df[PEDAGOGY_PROFILE_COLUMNS].astype(str).agg(" ".join, axis=1).tolist()
+    metadatas = df.fillna("").astype(str).to_dict(orient="records")
+    for metadata in metadatas:
+        metadata['category'] = CATEGORY
+    # Content-hash IDs, as in scripts/ingest.py: reordering the CSV keeps each profile's ID.
+    records = ({"metadata": metadata, "document_for_embedding": document} for metadata, document in zip(metadatas, documents))
+    ids = [record_id for record_id, _ in assign_record_ids(records)]
+
+    collection = get_chroma_client(db_path).get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=get_embedding_function(EMBEDDING_MODEL),
+        metadata={"hnsw:space": "cosine"}
+    )
+
+    for start in range(0, len(documents), BATCH_SIZE):
+        batch_start_time = time.time()
+        end = start + BATCH_SIZE
+        collection.upsert(documents=documents[start:end], metadatas=metadatas[start:end], ids=ids[start:end])
+        logging.info(f"Ingested profiles {start + 1}-{min(end, len(documents))} in {time.time() - batch_start_time:.2f} seconds.")
+
+    # Drop profiles that were edited or removed since the previous ingest.
+    stale = collection.get(where={"category": CATEGORY}, include=[])["ids"]
+    stale_ids = sorted(set(stale) - set(ids))
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+        logging.info(f"Removed {len(stale_ids)} stale pedagogy profiles.")
+
+    write_lexical_index(collection, db_path)
+    write_kb_version(db_path, collection.count())
+    logging.info("--- Pedagogy profile ingestion complete. ---")
+
+
+if __name__ == "__main__":
+    ingest_pedagogy_profiles()
@@ -0,0 +1,97 @@
+# scripts/migrate_mem0_embeddings.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Make the project packages importable when run as `python scripts/migrate_mem0_embeddings.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.mem0_client import shared_mem0_client, build_mem0_config, create_mem0_instance, EMBEDDER_SETTINGS, LEGACY_STORE
+
+# --- Configuration ---
+LEGACY_SOURCE = "legacy"  # The store written before the embedder config took effect (see mem0_client)
+SCROLL_LIMIT = 100_000  # Upper bound on memories read from the source collection
+BATCH_SIZE = 256  # Memories re-embedded and written per batch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def _embed_batch(embedder, texts):
+    if hasattr(embedder, "embed_batch"):
+        return embedder.embed_batch(texts)
+    return [embedder.embed(text, "add") for text in texts]
+
+def legacy_records():
+    """
+    Reads the pre-fix store straight from Qdrant. Only the payloads are needed (the text
+    is re-embedded), so its vectors, and the default embedder that wrote them, are never used.
+    """
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(path=LEGACY_STORE["path"])
+    records, offset = [], None
+    while len(records) < SCROLL_LIMIT:
+        page, offset = client.scroll(
+            collection_name=LEGACY_STORE["collection_name"], limit=BATCH_SIZE, offset=offset,
+            with_payload=True, with_vectors=False,
+        )
+        records.extend(page)
+        if offset is None:
+            break
+    return records
+
+def migrate(source_provider: str, target_provider: str) -> None:
+    """
+    Copies every memory from the source embedder's collection into the target's,
+    re-embedding the stored text with the target embedder. IDs and payloads (user,
+    metadata, timestamps) are kept, so the switch is transparent to the application.
+    The source collection is left untouched; drop it once the new one is verified.
+    """
+    def instance_for(provider: str):
+        # The shared client already holds its embedder's store open; reuse it.
+        if provider == shared_mem0_client.embedder_provider:
+            return shared_mem0_client.mem0_instance
+        return create_mem0_instance(build_mem0_config(provider), provider)
+
+    target = instance_for(target_provider)
+    if source_provider == LEGACY_SOURCE:
+        records = legacy_records()
+    else:
+        listed = instance_for(source_provider).vector_store.list(limit=SCROLL_LIMIT)
+        # Some vector stores return (records, next_offset), others a plain list.
+        records = listed[0] if isinstance(listed, tuple) or (listed and isinstance(listed[0], list)) else listed
+    logging.info(f"Found {len(records)} memories in the '{source_provider}' collection.")
+
+    migrated = 0
+    for start in range(0, len(records), BATCH_SIZE):
+        batch_start_time = time.time()
+        batch = [r for r in records[start:start + BATCH_SIZE] if (r.payload or {}).get("data")]
+        if not batch:
+            continue
+        vectors = _embed_batch(target.embedding_model, [r.payload["data"] for r in batch])
+        target.vector_store.insert(
+            vectors=vectors,
+            payloads=[r.payload for r in batch],
+            ids=[str(r.id) for r in batch],
+        )
+        migrated += len(batch)
+        logging.info(f"Migrated {migrated}/{len(records)} memories ({time.time() - batch_start_time:.2f}s for this batch).")
+
+    logging.info(f"--- Migration complete: {migrated} memories now in the '{target_provider}' collection. ---")
+    logging.info(f"Set MEM0_EMBEDDER={target_provider} and restart the service to use it.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed existing Mem0 memories for a different embedder.")
+    parser.add_argument(
+        "--from", dest="source", default=LEGACY_SOURCE, choices=[LEGACY_SOURCE] + list(EMBEDDER_SETTINGS),
+        help=f"'{LEGACY_SOURCE}' is the store written before the Gemini embedder config took effect."
+    )
+    parser.add_argument("--to", dest="target", default=os.getenv("MEM0_EMBEDDER", "gemini").lower(), choices=list(EMBEDDER_SETTINGS))
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("--from and --to must differ.")
+    migrate(args.source, args.target)
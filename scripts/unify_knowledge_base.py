@@ -4,138 +4,219 @@ import pandas as pd
 import os
 import logging
 import json
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# --- Configuration ---
+# Source CSV -> knowledge base category
+SOURCE_FILES = {
+    "cowriting_data.csv": "cowriting",
+    "modelling_data.csv": "modelling",
+    "pedagogical_data.csv": "pedagogy",
+    "scaffolding_data.csv": "scaffolding",
+    "teaching_data.csv": "teaching",
+    "feedback_data.csv": "feedback",
+}
+PART_SEPARATOR = " \n "  # Between the labelled parts of one document
+GENERIC_FALLBACK_COLUMNS = 5  # Columns used for a category without a template
+
+# The document embedded for each category, tailored to each unique CSV schema: one
+# (label, columns) pair per line, the columns' values joined by spaces after the label.
+# The pedagogy plan line is added by _pedagogy_reasoning, since it is extracted from JSON.
+DOCUMENT_TEMPLATES: Dict[str, List[Tuple[str, List[str]]]] = {
+    "cowriting": [
+        ("Learning Objective: ", ["Learning_Objective_Focus"]),
+        ("Student Input: ", ["Student_Written_Input_Chunk"]),
+        ("Struggle: ", ["Immediate_Assessment_of_Input"]),
+        ("AI Suggestion: ", ["AI_Spoken_or_Suggested_Text"]),
+        ("AI Rationale: ", ["Rationale_for_Intervention_Style"]),
+    ],
+    "modelling": [
+        ("Task Prompt being modeled: ", ["Example_Prompt_Text"]),
+        ("Intended for student with this struggle: ", ["Student_Struggle_Context"]),
+        ("Setup Script: ", ["pre_modeling_setup_script"]),
+        ("Key takeaways from the model: ", ["post_modeling_summary_and_key_takeaways"]),
+    ],
+    "pedagogy": [
+        ("Student Answers: ", ["Answer One", "Answer Two", "Answer Three"]),
+        ("Teacher's initial impression: ", ["Initial Impression"]),
+        ("Student's assessed strengths: ", ["Speaking Strengths"]),
+    ],
+    "scaffolding": [
+        ("Learning Task: ", ["Learning_Objective_Task"]),
+        ("Specific Student Struggle: ", ["Specific_Struggle_Point"]),
+        ("Reasoning for choosing this scaffold: ", ["reasoning_for_scaffold_choice"]),
+        ("Script to deliver the scaffold to the student: ", ["scaffold_delivery_script"]),
+    ],
+    "feedback": [
+        ("Student Proficiency and Task: ", ["Proficiency", "Task"]),
+        ("Observed Student Behavior: ", ["Behavior Factor"]),
+        ("Specific Error Made by Student: ", ["Error"]),
+        ("Expert Diagnosis of the Error: ", ["Diagnose"]),
+        ("Strategy to Explain the Correction: ", ["Explain Strategy"]),
+    ],
+    "teaching": [
+        ("Learning Objective: ", ["LEARNING_OBJECTIVE"]),
+        ("Core Teaching Strategy: ", ["CORE_EXPLANATION_STRATEGY"]),
+        ("Key Examples Used: ", ["KEY_EXAMPLES"]),
+        ("Common Misconceptions to Address: ", ["COMMON_MISCONCEPTIONS"]),
+    ],
+}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def create_embedding_document(row: pd.Series, category: str) -> str:
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """A column as strings, the way str() renders each cell (NaN -> 'nan'); '' if the column is missing."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].map(str)
+
+def _pedagogy_plan_line(value: str) -> str:
+    # The 'Pedagogy' column contains a JSON string. We want the reasoning text inside it.
+    try:
+        pedagogy_plan = json.loads(value)
+        if isinstance(pedagogy_plan, dict):
+            return f"Expert reasoning for the curriculum plan: {pedagogy_plan.get('reasoning', '')}"
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return f"Pedagogical Plan: {value}" # Fallback to raw string
+
+def _pedagogy_reasoning(df: pd.DataFrame) -> pd.Series:
+    plans = _text_column(df, "Pedagogy") if "Pedagogy" in df.columns else pd.Series("{}", index=df.index, dtype=object)
+    # Plans repeat across rows, so each distinct JSON string is parsed once.
+    lines = {value: _pedagogy_plan_line(value) for value in plans.unique()}
+    return plans.map(lines)
+
+def create_embedding_documents(df: pd.DataFrame, category: str) -> pd.Series:
     """
-    Intelligently creates a single text document for embedding based on the category.
-    This function is the heart of the standardization process, tailored to each
-    unique CSV schema.
+    Builds the text document for embedding for every row of `df` at once, from the
+    category's template, using whole-column string operations.
     """
-    text_parts = []
-    
+    template = DOCUMENT_TEMPLATES.get(category)
+    if template is None:
+        logging.warning(f"No specific embedding document creation logic for category: '{category}'. Using a generic fallback.")
+        parts = [f"{column}: " + _text_column(df, column) for column in df.columns[:GENERIC_FALLBACK_COLUMNS]]
+    else:
+        parts = []
+        for label, columns in template:
+            values = _text_column(df, columns[0])
+            for column in columns[1:]:
+                values = values + " " + _text_column(df, column)
+            parts.append(label + values)
+        if category == "pedagogy":
+            parts.append(_pedagogy_reasoning(df))
+
+    if not parts:
+        return pd.Series("", index=df.index, dtype=object)
+    documents = parts[0]
+    if len(parts) > 1:
+        documents = documents.str.cat(parts[1:], sep=PART_SEPARATOR)
+    return documents.str.strip()
+
+def standardize_records(df: pd.DataFrame, category: str) -> Iterator[Dict]:
+    """
+    Yields one standardized record per row of `df`: the text to embed plus the row's
+    stringified columns as metadata, tagged with `category`. Rows with an empty document
+    are skipped.
+    """
+    df.columns = df.columns.str.strip() # Strip whitespace from column names
     try:
-        if category == "cowriting":
-            text_parts.append(f"Learning Objective: {row.get('Learning_Objective_Focus', '')}")
-            text_parts.append(f"Student Input: {row.get('Student_Written_Input_Chunk', '')}")
-            text_parts.append(f"Struggle: {row.get('Immediate_Assessment_of_Input', '')}")
-            text_parts.append(f"AI Suggestion: {row.get('AI_Spoken_or_Suggested_Text', '')}")
-            text_parts.append(f"AI Rationale: {row.get('Rationale_for_Intervention_Style', '')}")
-            
-        elif category == "modelling":
-            text_parts.append(f"Task Prompt being modeled: {row.get('Example_Prompt_Text', '')}")
-            text_parts.append(f"Intended for student with this struggle: {row.get('Student_Struggle_Context', '')}")
-            text_parts.append(f"Setup Script: {row.get('pre_modeling_setup_script', '')}")
-            text_parts.append(f"Key takeaways from the model: {row.get('post_modeling_summary_and_key_takeaways', '')}")
-
-        elif category == "pedagogy":
-            text_parts.append(f"Student Answers: {row.get('Answer One', '')} {row.get('Answer Two', '')} {row.get('Answer Three', '')}")
-            text_parts.append(f"Teacher's initial impression: {row.get('Initial Impression', '')}")
-            text_parts.append(f"Student's assessed strengths: {row.get('Speaking Strengths', '')}")
-            # The 'Pedagogy' column contains a JSON string. We want the reasoning text inside it.
-            try:
-                pedagogy_plan = json.loads(row.get('Pedagogy', '{}'))
-                text_parts.append(f"Expert reasoning for the curriculum plan: {pedagogy_plan.get('reasoning', '')}")
-            except (json.JSONDecodeError, TypeError):
-                text_parts.append(f"Pedagogical Plan: {row.get('Pedagogy', '')}") # Fallback to raw string
-
-        elif category == "scaffolding":
-            text_parts.append(f"Learning Task: {row.get('Learning_Objective_Task', '')}")
-            text_parts.append(f"Specific Student Struggle: {row.get('Specific_Struggle_Point', '')}")
-            text_parts.append(f"Reasoning for choosing this scaffold: {row.get('reasoning_for_scaffold_choice', '')}")
-            text_parts.append(f"Script to deliver the scaffold to the student: {row.get('scaffold_delivery_script', '')}")
-            
-        elif category == "feedback":
-            text_parts.append(f"Student Proficiency and Task: {row.get('Proficiency', '')} {row.get('Task', '')}")
-            text_parts.append(f"Observed Student Behavior: {row.get('Behavior Factor', '')}")
-            text_parts.append(f"Specific Error Made by Student: {row.get('Error', '')}")
-            text_parts.append(f"Expert Diagnosis of the Error: {row.get('Diagnose', '')}")
-            text_parts.append(f"Strategy to Explain the Correction: {row.get('Explain Strategy', '')}")
-            
-        elif category == "teaching":
-            text_parts.append(f"Learning Objective: {row.get('LEARNING_OBJECTIVE', '')}")
-            text_parts.append(f"Core Teaching Strategy: {row.get('CORE_EXPLANATION_STRATEGY', '')}")
-            text_parts.append(f"Key Examples Used: {row.get('KEY_EXAMPLES', '')}")
-            text_parts.append(f"Common Misconceptions to Address: {row.get('COMMON_MISCONCEPTIONS', '')}")
-            
-        else:
-            logging.warning(f"No specific embedding document creation logic for category: '{category}'. Using a generic fallback.")
-            text_parts = [f"{k}: {v}" for k, v in row.iloc[:5].items()]
-
-        return " \n ".join(filter(None, text_parts)).strip()
+        documents = create_embedding_documents(df, category)
+        metadatas = pd.DataFrame({column: _text_column(df, column) for column in df.columns}).to_dict(orient="records")
     except Exception as e:
-        logging.error(f"Error creating document for category {category} on row {row.name}: {e}")
-        return "" # Return empty string on error to avoid halting the whole process
+        logging.error(f"Error creating documents for category {category}: {e}", exc_info=True)
+        return
+
+    for document, metadata in zip(documents.tolist(), metadatas):
+        if not document:
+            logging.warning(f"Skipping a row of category '{category}' with an empty document.")
+            continue
+        # Add the 'category' key directly INTO the metadata dictionary.
+        metadata['category'] = category
+        # The top-level object only needs these two keys for the ingest script.
+        yield {
+            "document_for_embedding": document,
+            "metadata": metadata
+        }
+
+def _unify_file(file_path: str, category: str, part_path: str) -> Tuple[int, int, float]:
+    """Pool worker: standardizes one source CSV into its own JSONL part. Returns (rows, records, seconds)."""
+    start_time = time.time()
+    df = pd.read_csv(file_path)
+    records = 0
+    with open(part_path, 'w', encoding='utf-8') as f:
+        for record in standardize_records(df, category):
+            f.write(json.dumps(record) + '\n')
+            records += 1
+    return len(df), records, time.time() - start_time
 
-def unify_and_standardize_cta_data():
+def unify_and_standardize_cta_data(
+    source_dir: Optional[str] = None, output_path: Optional[str] = None, processes: Optional[int] = None
+) -> Dict[str, Tuple[int, int, float]]:
+    """
+    Standardizes every source CSV into the unified JSONL file. Files are processed in
+    parallel across a process pool (`processes`, default one per file up to the CPU count),
+    each into its own part file; the parts are concatenated in SOURCE_FILES order.
+    Returns {filename: (rows, records, seconds)} for the timing report.
+    """
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    source_dir = os.path.join(project_root, 'data', 'source_cta')
-    output_dir = os.path.join(project_root, 'data', 'unified')
-    output_path = os.path.join(output_dir, 'unified_knowledge_base.jsonl')
-    os.makedirs(output_dir, exist_ok=True)
-
-    source_files = {
-        "cowriting_data.csv": "cowriting",
-        "modelling_data.csv": "modelling",
-        "pedagogical_data.csv": "pedagogy",
-        "scaffolding_data.csv": "scaffolding",
-        "teaching_data.csv": "teaching",
-        "feedback_data.csv": "feedback",
-    }
-    
-    final_standardized_records = []
-    logging.info("Starting unification and standardization process...")
-
-    for filename, category in source_files.items():
+    source_dir = source_dir or os.path.join(project_root, 'data', 'source_cta')
+    output_path = output_path or os.path.join(project_root, 'data', 'unified', 'unified_knowledge_base.jsonl')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    jobs = []
+    for filename, category in SOURCE_FILES.items():
         file_path = os.path.join(source_dir, filename)
         if not os.path.exists(file_path):
             logging.warning(f"File not found, skipping: {file_path}")
             continue
+        jobs.append((filename, category, file_path))
+    if not jobs:
+        logging.error("No source files found. Unification failed.")
+        return {}
+
+    start_time = time.time()
+    workers = processes or min(len(jobs), os.cpu_count() or 1)
+    logging.info(f"Starting unification and standardization of {len(jobs)} files across {workers} processes...")
+    timings: Dict[str, Tuple[int, int, float]] = {}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as parts_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                filename: pool.submit(_unify_file, file_path, category, os.path.join(parts_dir, f"{category}.jsonl"))
+                for filename, category, file_path in jobs
+            }
+            for filename, future in futures.items():
+                try:
+                    timings[filename] = future.result()
+                    rows, records, seconds = timings[filename]
+                    logging.info(f"Successfully standardized {records}/{rows} rows from '{filename}' in {seconds:.2f}s.")
+                except Exception as e:
+                    logging.error(f"Failed to process file {filename}. Error: {e}", exc_info=True)
+
+        total_records = sum(records for _, records, _ in timings.values())
+        if not total_records:
+            logging.error("No records were processed. Unification failed.")
+            return timings
+
         try:
-            logging.info(f"Processing '{filename}' for category '{category}'...")
-            df = pd.read_csv(file_path)
-            df.columns = df.columns.str.strip() # Strip whitespace from column names
-
-            for _, row in df.iterrows():
-                embedding_doc = create_embedding_document(row, category)
-                if not embedding_doc:
-                    logging.warning(f"Skipping row {row.name} in {filename} due to an error in document creation.")
-                    continue
-                
-                original_row_dict = row.to_dict()
-                metadata = {k.strip(): str(v) for k, v in original_row_dict.items()}
-                
-                # --- THIS IS THE CRITICAL FIX ---
-                # Add the 'category' key directly INTO the metadata dictionary.
-                metadata['category'] = category
-                
-                # The top-level object only needs these two keys for the ingest script.
-                standardized_record = {
-                    "document_for_embedding": embedding_doc,
-                    "metadata": metadata 
-                }
-                final_standardized_records.append(standardized_record)
-
-            logging.info(f"Successfully processed and standardized {len(df)} rows from '{filename}'.")
+            logging.info(f"Saving unified knowledge base to: {output_path}")
+            tmp_path = output_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                for filename, category, _ in jobs:
+                    if filename in timings:
+                        with open(os.path.join(parts_dir, f"{category}.jsonl"), 'r', encoding='utf-8') as part:
+                            shutil.copyfileobj(part, out)
+            os.replace(tmp_path, output_path)
         except Exception as e:
-            logging.error(f"Failed to process file {filename}. Error: {e}", exc_info=True)
-            continue
-            
-    if not final_standardized_records:
-        logging.error("No records were processed. Unification failed.")
-        return
+            logging.error(f"Failed to save the unified JSONL file. Error: {e}", exc_info=True)
+            return timings
 
-    logging.info(f"Unification complete. Total standardized records: {len(final_standardized_records)}")
-    try:
-        logging.info(f"Saving unified knowledge base to: {output_path}")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for record in final_standardized_records:
-                f.write(json.dumps(record) + '\n')
-        logging.info("Successfully saved the unified JSONL file.")
-    except Exception as e:
-        logging.error(f"Failed to save the unified JSONL file. Error: {e}", exc_info=True)
+    logging.info(f"Unification complete. Total standardized records: {total_records} in {time.time() - start_time:.2f}s.")
+    return timings
 
 if __name__ == "__main__":
-    unify_and_standardize_cta_data()
\ No newline at end of file
+    unify_and_standardize_cta_data()
@@ -31,6 +31,10 @@ AgentGraphState = TypedDict('AgentGraphState', {
     'conversational_tts': Optional[str], # From initial_report_generation_node
     'task_suggestion_llm_output': Optional[Dict[str, Any]], # From pedagogy_generator_node
 
+    # Keys from load_student_data_node, also read and updated by the session nodes
+    'student_memory_context': Optional[Dict[str, Any]],
+    'next_task_details': Optional[Dict[str, Any]],
+
     # === Flow-Specific Context Keys (from app.py) ===
     # These are the keys that were being dropped. Now they are official.
     